@@ -4,12 +4,29 @@ Database Layer
 
 This module contains database management and persistence logic:
 - ChromaDB integration for vector storage
+- Parallel embedding pipeline with a persistent embedding cache
 - RAG database operations
 - Historical data management
+- Persistent background job table
+- Secondary index for metadata substring search
+- BM25 lexical index for hybrid case search
+- Side-store for full bulk records
 """
 
 from .chroma_db import ChromaDBManager
+from .job_store import JobStore
+from .embeddings import EmbeddingPipeline
+from .embedding_cache import EmbeddingCache
+from .metadata_index import MetadataIndex
+from .lexical_index import LexicalIndex
+from .record_store import RecordStore
 
 __all__ = [
-    "ChromaDBManager"
+    "ChromaDBManager",
+    "JobStore",
+    "EmbeddingPipeline",
+    "EmbeddingCache",
+    "MetadataIndex",
+    "LexicalIndex",
+    "RecordStore"
 ]
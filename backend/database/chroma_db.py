@@ -1,18 +1,51 @@
 import chromadb
 from chromadb.config import Settings
 import uuid
-from typing import List, Dict, Any, Optional
+import itertools
+import asyncio
+import base64
+from typing import List, Dict, Any, Optional, Iterable, Callable, Awaitable, Iterator, Sequence
 import os
 from datetime import datetime
 import json
+import numpy as np
+from database.embeddings import EmbeddingPipeline
+from database.embedding_cache import EmbeddingCache
+from database.metadata_index import MetadataIndex
+from database.lexical_index import LexicalIndex
+from database.record_store import RecordStore
+from utils.chunking import chunk_observability
+from utils.log_templates import LogTemplateMiner, summarize_logs
+from utils.dedup import DEDUP_MODES, SimHashIndex, content_id, log_template, simhash
+
+# Called after each bulk batch with (records_written, records_failed)
+BatchCallback = Callable[[int, int], Awaitable[None]]
 
 class ChromaDBManager:
     """Manages ChromaDB for RAG functionality"""
     
-    def __init__(self, persist_directory: str = "./data/chroma_db"):
+    def __init__(self, persist_directory: str = "./data/chroma_db", embedding_workers: Optional[int] = None,
+                 embedding_cache: Optional[EmbeddingCache] = None,
+                 metadata_index: Optional[MetadataIndex] = None,
+                 lexical_index: Optional[LexicalIndex] = None,
+                 lexical_collections: Iterable[str] = ("historical_cases",),
+                 record_store: Optional[RecordStore] = None):
         self.persist_directory = persist_directory
         self.client = None
         self.collections = {}
+        # Writes and queries pass precomputed embeddings instead of letting
+        # Chroma embed inline on the calling thread; cached vectors are reused
+        self.embedder = EmbeddingPipeline(workers=embedding_workers, cache=embedding_cache)
+        # Collection name -> SimHash index for near-duplicate ingest
+        self._near_indexes: Dict[str, SimHashIndex] = {}
+        # Secondary index for substring filters on metadata, kept in step
+        # with every write below
+        self.metadata_index = metadata_index
+        # BM25 index fused with vector search for the listed collections
+        self.lexical_index = lexical_index
+        self.lexical_collections = set(lexical_collections)
+        # Full records of bulk documents stored in schema mode
+        self.record_store = record_store
         
         # Ensure directory exists
         os.makedirs(persist_directory, exist_ok=True)
@@ -42,6 +75,8 @@ class ChromaDBManager:
                         name=name,
                         metadata={"hnsw:space": "cosine"}
                     )
+                self._ensure_metadata_indexed(self.collections[name])
+                self._ensure_lexical_indexed(self.collections[name])
             
             print(f"ChromaDB initialized with {len(self.collections)} collections")
             
@@ -60,29 +95,40 @@ class ChromaDBManager:
             if metadata:
                 base_metadata.update(metadata)
             
-            # Store logs
-            if logs.strip():
-                self.collections["observability_logs"].add(
-                    documents=[logs],
-                    metadatas=[{**base_metadata, "data_type": "logs"}],
-                    ids=[f"logs_{base_metadata['analysis_id']}"]
-                )
-            
-            # Store metrics
-            if metrics.strip():
-                self.collections["observability_metrics"].add(
-                    documents=[metrics],
-                    metadatas=[{**base_metadata, "data_type": "metrics"}],
-                    ids=[f"metrics_{base_metadata['analysis_id']}"]
-                )
+            # Chunk each signal so embeddings cover bounded pieces, then embed
+            # every chunk of the analysis in one batch
+            entries = []
+            for data_type, text in (("logs", logs), ("metrics", metrics), ("traces", traces)):
+                if not text.strip():
+                    continue
+                parent_id = f"{data_type}_{base_metadata['analysis_id']}"
+                template_metadata = {}
+                if data_type == "logs":
+                    text, template_metadata = self._compress_logs(text)
+                chunks = chunk_observability(data_type, text)
+                for index, (chunk_text, chunk_metadata) in enumerate(chunks):
+                    entries.append((data_type, f"{parent_id}_{index}", chunk_text, {
+                        **base_metadata,
+                        # Line ranges of a template listing don't refer to
+                        # lines of the original logs
+                        **(template_metadata or chunk_metadata),
+                        "data_type": data_type,
+                        "parent_id": parent_id,
+                        "chunk_index": index,
+                        "chunk_count": len(chunks)
+                    }))
             
-            # Store traces
-            if traces.strip():
-                self.collections["observability_traces"].add(
-                    documents=[traces],
-                    metadatas=[{**base_metadata, "data_type": "traces"}],
-                    ids=[f"traces_{base_metadata['analysis_id']}"]
-                )
+            embeddings = await self.embedder.embed([entry[2] for entry in entries])
+            for data_type in ("logs", "metrics", "traces"):
+                rows = [i for i, entry in enumerate(entries) if entry[0] == data_type]
+                if rows:
+                    await self._add(
+                        self.collections[f"observability_{data_type}"],
+                        documents=[entries[i][2] for i in rows],
+                        metadatas=[entries[i][3] for i in rows],
+                        ids=[entries[i][1] for i in rows],
+                        embeddings=[embeddings[i] for i in rows]
+                    )
             
             return base_metadata["analysis_id"]
             
@@ -90,6 +136,22 @@ class ChromaDBManager:
             print(f"Error storing observability data: {e}")
             raise
     
+    def _compress_logs(self, logs: str, min_ratio: float = 2.0):
+        """Replace repetitive logs by their template listing
+        
+        Returns (text, metadata). Logs averaging at least min_ratio lines
+        per template are stored as "count x template" lines; others are
+        kept as they are.
+        """
+        miner = LogTemplateMiner().add_text(logs)
+        if not miner.clusters or miner.line_count < min_ratio * len(miner.clusters):
+            return logs, {}
+        return miner.histogram(), {
+            "templated": True,
+            "log_lines": miner.line_count,
+            "log_templates": len(miner.clusters)
+        }
+    
     async def store_rca_result(self, analysis_id: str, rca_result: str, original_data: Any = None):
         """Store RCA result with reference to original data"""
         try:
@@ -102,7 +164,8 @@ class ChromaDBManager:
             if original_data:
                 metadata["has_original_data"] = True
             
-            self.collections["rca_results"].add(
+            await self._add(
+                self.collections["rca_results"],
                 documents=[rca_result],
                 metadatas=[metadata],
                 ids=[f"rca_{analysis_id}"]
@@ -111,26 +174,129 @@ class ChromaDBManager:
             # Also store as historical case for future RAG queries
             combined_text = f"RCA: {rca_result}"
             if original_data:
-                combined_text += f"\nLogs: {original_data.logs[:500]}..."
+                combined_text += f"\nLogs: {summarize_logs(original_data.logs, 500)}"
                 combined_text += f"\nMetrics: {original_data.metrics[:500]}..."
                 combined_text += f"\nTraces: {original_data.traces[:500]}..."
             
-            self.collections["historical_cases"].add(
+            case_id = f"case_{analysis_id}"
+            await self._add(
+                self.collections["historical_cases"],
                 documents=[combined_text],
                 metadatas=[{**metadata, "data_type": "historical_case"}],
-                ids=[f"case_{analysis_id}"]
+                ids=[case_id]
             )
             
+            return case_id
+            
         except Exception as e:
             print(f"Error storing RCA result: {e}")
             raise
     
-    async def search_similar_cases(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
-        """Search for similar historical cases"""
+    async def _add(self, collection, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str],
+                   embeddings: Optional[List[List[float]]] = None):
+        """Add documents with embeddings from the (cached) embedding pipeline"""
+        if embeddings is None:
+            embeddings = await self.embedder.embed(documents)
+        # Index writes wait on the lock bulk ingest holds for whole batches
+        await asyncio.to_thread(self._add_sync, collection, documents, metadatas, ids, embeddings)
+    
+    def _add_sync(self, collection, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str],
+                  embeddings: List[List[float]]):
+        collection.add(documents=documents, metadatas=metadatas, ids=ids, embeddings=embeddings)
+        self._index_metadata(collection, ids, metadatas)
+        self._index_documents(collection, ids, documents)
+    
+    def _index_metadata(self, collection, ids: List[str], metadatas: List[Dict[str, Any]], replace: bool = True):
+        if self.metadata_index is not None:
+            self.metadata_index.upsert(collection.name, ids, metadatas, replace=replace)
+    
+    def _index_documents(self, collection, ids: List[str], documents: List[str]):
+        if self.lexical_index is not None and collection.name in self.lexical_collections:
+            self.lexical_index.upsert(collection.name, zip(ids, documents))
+    
+    def _ensure_lexical_indexed(self, collection, page_size: int = 1000):
+        """Index the text of a collection written before the lexical index existed"""
+        if (self.lexical_index is None or collection.name not in self.lexical_collections
+                or self.lexical_index.is_indexed(collection.name)):
+            return
+        offset = 0
+        while True:
+            page = collection.get(limit=page_size, offset=offset, include=["documents"])
+            if not page["ids"]:
+                break
+            self._index_documents(collection, page["ids"], page["documents"])
+            offset += len(page["ids"])
+        self.lexical_index.mark_indexed(collection.name)
+    
+    def _ensure_metadata_indexed(self, collection, page_size: int = 1000):
+        """Index the metadata of a collection written before the index existed"""
+        if self.metadata_index is None or self.metadata_index.is_indexed(collection.name):
+            return
+        offset = 0
+        while True:
+            page = collection.get(limit=page_size, offset=offset, include=["metadatas"])
+            if not page["ids"]:
+                break
+            self._index_metadata(collection, page["ids"], page["metadatas"])
+            offset += len(page["ids"])
+        self.metadata_index.mark_indexed(collection.name)
+    
+    def _update_sync(self, collection, doc_id: str, metadata: Dict[str, Any]):
+        collection.update(ids=[doc_id], metadatas=[metadata])
+        self._index_metadata(collection, [doc_id], [metadata])
+    
+    async def update_case_metadata(self, case_id: str, updates: Dict[str, Any]):
+        """Merge metadata fields into a stored historical case"""
+        try:
+            collection = self.collections["historical_cases"]
+            existing = collection.get(ids=[case_id], include=["metadatas"])
+            if not existing["ids"]:
+                return False
+            
+            metadata = {**(existing["metadatas"][0] or {}), **updates}
+            await asyncio.to_thread(self._update_sync, collection, case_id, metadata)
+            return True
+            
+        except Exception as e:
+            print(f"Error updating case metadata: {e}")
+            raise
+    
+    async def iter_cases_without_summary(self, batch_size: int = 100):
+        """Yield (case_id, document) for historical cases lacking a stored summary"""
+        collection = self.collections["historical_cases"]
+        offset = 0
+        while True:
+            page = collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas"]
+            )
+            if not page["ids"]:
+                break
+            
+            for i, case_id in enumerate(page["ids"]):
+                metadata = page["metadatas"][i] or {}
+                if not metadata.get("summary"):
+                    yield case_id, page["documents"][i]
+            
+            offset += len(page["ids"])
+    
+    async def search_similar_cases(self, query: str, n_results: int = 5,
+                                   rrf_k: int = 60, candidates: int = 20) -> List[Dict[str, Any]]:
+        """Search for similar historical cases
+        
+        With the lexical index, vector and BM25 rankings are fused by
+        reciprocal rank fusion, so exact tokens (error codes, exception
+        names, hosts) count without padding the query with keywords.
+        """
         try:
-            results = self.collections["historical_cases"].query(
-                query_texts=[query],
-                n_results=n_results,
+            collection = self.collections["historical_cases"]
+            query_embeddings = await self.embedder.embed([query])
+            hybrid = self.lexical_index is not None and "historical_cases" in self.lexical_collections
+            
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=max(candidates, n_results) if hybrid else n_results,
                 include=["documents", "metadatas", "distances"]
             )
             
@@ -138,79 +304,613 @@ class ChromaDBManager:
             if results["documents"] and results["documents"][0]:
                 for i, doc in enumerate(results["documents"][0]):
                     similar_cases.append({
+                        "id": results["ids"][0][i],
                         "document": doc,
                         "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
                         "similarity_score": 1 - results["distances"][0][i] if results["distances"] else 0.0
                     })
             
-            return similar_cases
+            if not hybrid:
+                return similar_cases
+            
+            lexical = await asyncio.to_thread(
+                self.lexical_index.search, "historical_cases", query, max(candidates, n_results)
+            )
+            return self._fuse_rankings(collection, query_embeddings[0], similar_cases, lexical, n_results, rrf_k)
             
         except Exception as e:
             print(f"Error searching similar cases: {e}")
             return []
     
-    async def bulk_store_data(self, data_type: str, data: Any):
-        """Bulk store data of specific type"""
+    def _fuse_rankings(self, collection, query_embedding: List[float], vector_cases: List[Dict[str, Any]],
+                       lexical: List[Any], n_results: int, rrf_k: int) -> List[Dict[str, Any]]:
+        """Merge vector and BM25 rankings by reciprocal rank fusion"""
+        cases = {case["id"]: case for case in vector_cases}
+        scores: Dict[str, float] = {}
+        for rank, case in enumerate(vector_cases, start=1):
+            case["vector_rank"] = rank
+            scores[case["id"]] = 1 / (rrf_k + rank)
+        for rank, (doc_id, bm25_score) in enumerate(lexical, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1 / (rrf_k + rank)
+            cases.setdefault(doc_id, {"id": doc_id}).update(lexical_rank=rank, bm25_score=bm25_score)
+        
+        ranked = sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)[:n_results]
+        
+        # Lexical-only hits still need their text and a similarity score
+        missing = [doc_id for doc_id in ranked if "document" not in cases[doc_id]]
+        if missing:
+            page = collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            for i, doc_id in enumerate(page["ids"]):
+                vector = np.asarray(page["embeddings"][i], dtype=np.float32)
+                norm = float(np.linalg.norm(vector) * np.linalg.norm(query_vector)) or 1.0
+                cases[doc_id].update(
+                    document=page["documents"][i],
+                    metadata=page["metadatas"][i] or {},
+                    similarity_score=float(vector @ query_vector) / norm
+                )
+        
+        fused = []
+        for doc_id in ranked:
+            case = cases[doc_id]
+            if "document" in case:
+                case["rrf_score"] = scores[doc_id]
+                fused.append(case)
+        return fused
+    
+    async def search_observability(self, query: str, n_results: int = 5, data_types: Optional[List[str]] = None,
+                                   chunks_per_analysis: int = 3, candidates: int = 50) -> List[Dict[str, Any]]:
+        """Search stored observability chunks and group the hits by analysis
+        
+        Each collection returns its best candidate chunks; analyses are
+        ranked by their best chunk and carry their top matching chunks.
+        """
         try:
-            collection_name = f"observability_{data_type}"
-            if collection_name not in self.collections:
-                self.collections[collection_name] = self.client.create_collection(
-                    name=collection_name,
-                    metadata={"hnsw:space": "cosine"}
+            query_embeddings = await self.embedder.embed([query])
+            analyses: Dict[str, Dict[str, Any]] = {}
+            for data_type in data_types or ["logs", "metrics", "traces"]:
+                collection = self.collections.get(f"observability_{data_type}")
+                count = collection.count() if collection is not None else 0
+                if not count:
+                    continue
+                results = collection.query(
+                    query_embeddings=query_embeddings,
+                    n_results=min(candidates, count),
+                    include=["documents", "metadatas", "distances"]
                 )
+                if not results["ids"] or not results["ids"][0]:
+                    continue
+                for i, chunk_id in enumerate(results["ids"][0]):
+                    metadata = results["metadatas"][0][i] or {}
+                    analysis_id = metadata.get("analysis_id")
+                    if not analysis_id:
+                        continue
+                    score = 1 - results["distances"][0][i]
+                    analysis = analyses.setdefault(analysis_id, {
+                        "analysis_id": analysis_id,
+                        "timestamp": metadata.get("timestamp"),
+                        "similarity_score": score,
+                        "data_types": [],
+                        "chunks": []
+                    })
+                    analysis["similarity_score"] = max(analysis["similarity_score"], score)
+                    if data_type not in analysis["data_types"]:
+                        analysis["data_types"].append(data_type)
+                    analysis["chunks"].append({
+                        "id": chunk_id,
+                        "data_type": data_type,
+                        # Documents stored before chunking are a single chunk
+                        "chunk_index": metadata.get("chunk_index", 0),
+                        "chunk_count": metadata.get("chunk_count", 1),
+                        "document": results["documents"][0][i],
+                        "similarity_score": score
+                    })
+            
+            ranked = sorted(analyses.values(), key=lambda a: a["similarity_score"], reverse=True)[:n_results]
+            for analysis in ranked:
+                analysis["chunks"].sort(key=lambda c: c["similarity_score"], reverse=True)
+                analysis["matched_chunks"] = len(analysis["chunks"])
+                analysis["chunks"] = analysis["chunks"][:chunks_per_analysis]
+            return ranked
+            
+        except Exception as e:
+            print(f"Error searching observability data: {e}")
+            return []
+    
+    async def search_by_metadata(self, filters: Dict[str, Any], limit: int = 10, offset: int = 0,
+                                 page_size: int = 200) -> List[Dict[str, Any]]:
+        """Find documents across collections whose metadata matches filters
+        
+        String filter values match as case-insensitive substrings and are
+        answered from the metadata index; other values must be equal and are
+        pushed down to Chroma as a where filter. Collections are read a page
+        at a time and the scan stops once offset + limit matches are found.
+        """
+        substrings = {key: value.lower() for key, value in filters.items() if isinstance(value, str)}
+        equals = {key: value for key, value in filters.items() if not isinstance(value, str)}
+        where = self._build_where(equals)
+        
+        results = []
+        skipped = 0
+        for collection_name, collection in list(self.collections.items()):
+            try:
+                for doc_id, document, metadata in self._iter_metadata_matches(
+                    collection, substrings, equals, where, page_size
+                ):
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    results.append({
+                        "id": doc_id,
+                        "document": document,
+                        "metadata": metadata,
+                        "collection": collection_name
+                    })
+                    if len(results) >= limit:
+                        return results
+            except Exception as e:
+                print(f"Error searching collection {collection_name}: {e}")
+        
+        return results
+    
+    @staticmethod
+    def _build_where(equals: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Chroma where clause for the equality filters it can evaluate"""
+        clauses = [
+            {key: {"$eq": value}} for key, value in equals.items()
+            if isinstance(value, (int, float, bool))
+        ]
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+    
+    @staticmethod
+    def _metadata_matches(metadata: Dict[str, Any], substrings: Dict[str, str], equals: Dict[str, Any]) -> bool:
+        for key, substring in substrings.items():
+            if key not in metadata or substring not in str(metadata[key]).lower():
+                return False
+        for key, value in equals.items():
+            if key not in metadata or metadata[key] != value:
+                return False
+        return True
+    
+    def _iter_metadata_matches(self, collection, substrings: Dict[str, str], equals: Dict[str, Any],
+                               where: Optional[Dict[str, Any]], page_size: int):
+        """Yield (id, document, metadata) of matching documents, one page at a time"""
+        include = ["documents", "metadatas"]
+        use_index = (
+            substrings and self.metadata_index is not None
+            and self.metadata_index.is_indexed(collection.name)
+        )
+        
+        offset = 0
+        while True:
+            if use_index:
+                # Drive the scan from the longest, most selective substring
+                key, substring = max(substrings.items(), key=lambda item: len(item[1]))
+                ids = self.metadata_index.search(collection.name, key, substring, page_size, offset)
+                if not ids:
+                    return
+                offset += len(ids)
+                page = collection.get(ids=ids, where=where, include=include)
+                found = {
+                    doc_id: (page["documents"][i], page["metadatas"][i] or {})
+                    for i, doc_id in enumerate(page["ids"])
+                }
+                rows = [(doc_id, *found[doc_id]) for doc_id in ids if doc_id in found]
+            else:
+                page = collection.get(where=where, limit=page_size, offset=offset, include=include)
+                if not page["ids"]:
+                    return
+                offset += len(page["ids"])
+                rows = zip(page["ids"], page["documents"], [m or {} for m in page["metadatas"]])
             
+            # The index narrows candidates; every filter is still checked here
+            for doc_id, document, metadata in rows:
+                if self._metadata_matches(metadata, substrings, equals):
+                    yield doc_id, document, metadata
+    
+    def iter_export(self, collection_name: str, data_type: Optional[str] = None,
+                    analysis_id: Optional[str] = None, since: Optional[str] = None,
+                    until: Optional[str] = None, cursor: Optional[str] = None,
+                    page_size: int = 1000, include_embeddings: bool = False):
+        """Yield (records, next_cursor) pages of a collection for export
+        
+        Pages may hold fewer than page_size records when filters drop some;
+        next_cursor is None on the last page.
+        
+        With the metadata index, pages are keyset ranges over its rows of
+        documents, one per document whether or not it has a timestamp, so
+        each page costs the same however deep the export is and the time
+        range is applied in the index. Without it, pages fall back
+        to Chroma offsets. Only one page is held in memory at a time.
+        """
+        collection = self.collections.get(collection_name)
+        if collection is None:
+            raise KeyError(f"Unknown collection '{collection_name}'")
+        # Validated here, before the first page is requested
+        position = self._decode_cursor(cursor)
+        return self._export_pages(collection, position, data_type, analysis_id, since, until,
+                                  page_size, include_embeddings)
+    
+    async def _export_pages(self, collection, position: Dict[str, int], data_type: Optional[str],
+                            analysis_id: Optional[str], since: Optional[str], until: Optional[str],
+                            page_size: int, include_embeddings: bool):
+        collection_name = collection.name
+        where = None
+        clauses = [{key: {"$eq": value}} for key, value in
+                   (("data_type", data_type), ("analysis_id", analysis_id)) if value is not None]
+        if clauses:
+            where = clauses[0] if len(clauses) == 1 else {"$and": clauses}
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        use_index = self.metadata_index is not None and self.metadata_index.is_indexed(collection_name)
+        
+        while True:
+            if use_index:
+                entries = await asyncio.to_thread(
+                    self.metadata_index.scan, collection_name, position.get("after", 0), page_size,
+                    "timestamp", since, until
+                )
+                if not entries:
+                    return
+                exhausted = len(entries) < page_size
+                position = {"after": entries[-1][0]}
+                ids = [doc_id for _, doc_id in entries]
+                page = await asyncio.to_thread(collection.get, ids=ids, where=where, include=include)
+                order = {doc_id: i for i, doc_id in enumerate(ids)}
+                rows = sorted(range(len(page["ids"])), key=lambda i: order[page["ids"][i]])
+            else:
+                offset = position.get("offset", 0)
+                page = await asyncio.to_thread(
+                    collection.get, where=where, limit=page_size, offset=offset, include=include
+                )
+                if not page["ids"]:
+                    return
+                exhausted = len(page["ids"]) < page_size
+                position = {"offset": offset + len(page["ids"])}
+                rows = range(len(page["ids"]))
+            
+            records = []
+            for i in rows:
+                metadata = page["metadatas"][i] or {}
+                if not use_index:
+                    timestamp = str(metadata.get("timestamp", ""))
+                    if (since and timestamp < since) or (until and timestamp >= until):
+                        continue
+                record = {"id": page["ids"][i], "document": page["documents"][i], "metadata": metadata}
+                if include_embeddings:
+                    record["embedding"] = [float(x) for x in page["embeddings"][i]]
+                records.append(record)
+            
+            # The last page carries no cursor
+            yield records, None if exhausted else self._encode_cursor(position)
+            if exhausted:
+                return
+    
+    @staticmethod
+    def _encode_cursor(position: Dict[str, int]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Dict[str, int]:
+        if not cursor:
+            return {}
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            if not isinstance(position, dict) or not all(isinstance(v, int) for v in position.values()):
+                raise ValueError
+            return position
+        except Exception:
+            raise ValueError("Invalid export cursor")
+    
+    async def bulk_store_data(self, data_type: str, data: Any):
+        """Bulk store data of specific type"""
+        try:
             if isinstance(data, list):
-                documents = []
-                metadatas = []
-                ids = []
-                
-                for i, item in enumerate(data):
-                    doc_id = f"{data_type}_bulk_{uuid.uuid4()}"
-                    
-                    if isinstance(item, dict):
-                        doc_text = json.dumps(item, indent=2)
-                        metadata = {**item, "data_type": data_type, "bulk_upload": True}
-                    else:
-                        doc_text = str(item)
-                        metadata = {"data_type": data_type, "bulk_upload": True}
-                    
-                    metadata["timestamp"] = datetime.now().isoformat()
-                    
-                    documents.append(doc_text)
-                    metadatas.append(metadata)
-                    ids.append(doc_id)
-                
-                # Add in batches to avoid memory issues
-                batch_size = 100
-                for i in range(0, len(documents), batch_size):
-                    batch_docs = documents[i:i+batch_size]
-                    batch_metas = metadatas[i:i+batch_size]
-                    batch_ids = ids[i:i+batch_size]
-                    
-                    self.collections[collection_name].add(
-                        documents=batch_docs,
-                        metadatas=batch_metas,
-                        ids=batch_ids
-                    )
+                await self.bulk_store_records(data_type, data)
             else:
                 # Single document
-                doc_id = f"{data_type}_bulk_{uuid.uuid4()}"
+                collection = self._get_bulk_collection(data_type)
+                doc_id = content_id(data_type, str(data))
                 metadata = {
                     "data_type": data_type,
                     "bulk_upload": True,
                     "timestamp": datetime.now().isoformat()
                 }
                 
-                self.collections[collection_name].add(
-                    documents=[str(data)],
-                    metadatas=[metadata],
-                    ids=[doc_id]
+                embeddings = await self.embedder.embed([str(data)])
+                await asyncio.to_thread(
+                    self._write_batch, collection, ([doc_id], [str(data)], [metadata], [None], {}),
+                    embeddings, "exact"
                 )
                 
         except Exception as e:
             print(f"Error in bulk store: {e}")
             raise
     
+    async def bulk_store_records(self, data_type: str, records: Iterable[Any], batch_size: int = 100,
+                                 on_batch: Optional[BatchCallback] = None,
+                                 continue_on_error: bool = False, dedup: str = "exact",
+                                 metadata_fields: Optional[Sequence[str]] = None) -> int:
+        """Store records from any iterable, flushing fixed-size batches as they fill
+        
+        Records are pulled from the iterable, built into entries and
+        deduplicated on worker threads, embeddings are computed on the
+        embedding worker pool and each batch is written on a background
+        thread, so reading and embedding batch N+1 overlaps the write of
+        batch N and the event loop is never blocked by the ingest.
+        
+        dedup selects how repeated content is handled: "exact" derives ids
+        from the content and upserts, so storing the same record twice keeps
+        one copy; "near" also collapses records that only differ in
+        timestamps, ids and numbers into one document with an
+        occurrence_count; "none" stores every record under a fresh id.
+        
+        on_batch, if given, is awaited after every batch with the number of
+        records written and failed. With continue_on_error a batch Chroma
+        rejects is counted as failed instead of aborting the whole upload.
+        
+        metadata_fields switches dict records to schema mode: only those
+        fields are kept as Chroma metadata, the document is a compact JSON
+        rendering, and the full record goes to the record store.
+        """
+        if dedup not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{dedup}'. Use one of: {', '.join(DEDUP_MODES)}")
+        if metadata_fields is not None and self.record_store is None:
+            raise ValueError("Schema mode needs a record store to keep the full records")
+        
+        try:
+            collection = self._get_bulk_collection(data_type)
+            
+            stored = 0
+            pending_write: Optional[asyncio.Task] = None
+            
+            async def report(written, failed):
+                nonlocal stored
+                stored += written
+                if on_batch:
+                    await on_batch(written, failed)
+            
+            def failed_batch(error: Exception):
+                if dedup == "near":
+                    # The in-memory index may now list documents that were
+                    # never written; rebuild it from the collection
+                    self._near_indexes.pop(collection.name, None)
+                if not continue_on_error:
+                    raise error
+                print(f"Error storing {data_type} batch: {error}")
+            
+            async def write(record_count, batch, embeddings):
+                try:
+                    await asyncio.to_thread(self._write_batch, collection, batch, embeddings, dedup)
+                    return record_count, 0
+                except Exception as e:
+                    failed_batch(e)
+                    return 0, record_count
+            
+            async def finish_pending():
+                nonlocal pending_write
+                if pending_write is not None:
+                    task, pending_write = pending_write, None
+                    await report(*await task)
+            
+            async def flush(documents, metadatas, full_records):
+                nonlocal pending_write
+                # Collapse duplicates first so they are never embedded
+                batch = await asyncio.to_thread(
+                    self._deduplicate, collection, data_type, documents, metadatas, full_records, dedup
+                )
+                unique_documents = batch[1]
+                # The previous batch is still being written while this one
+                # is embedded; at most two batches are held in memory
+                try:
+                    embeddings = await self.embedder.embed(unique_documents)
+                except Exception as e:
+                    failed_batch(e)
+                    embeddings = None
+                await finish_pending()
+                if embeddings is None:
+                    await report(0, len(documents))
+                    return
+                pending_write = asyncio.create_task(write(len(documents), batch, embeddings))
+            
+            records = iter(records)
+            try:
+                while True:
+                    # Reading and parsing the source, building entries and
+                    # deduplicating are CPU and file work; they run on a
+                    # worker thread so the event loop keeps serving requests
+                    documents, metadatas, full_records = await asyncio.to_thread(
+                        self._read_bulk_batch, records, data_type, batch_size, metadata_fields
+                    )
+                    if not documents:
+                        break
+                    await flush(documents, metadatas, full_records)
+                await finish_pending()
+            finally:
+                if pending_write is not None and not pending_write.done():
+                    pending_write.cancel()
+            
+            return stored
+            
+        except Exception as e:
+            print(f"Error in bulk store: {e}")
+            raise
+    
+    def _read_bulk_batch(self, records: Iterator[Any], data_type: str, batch_size: int,
+                         metadata_fields: Optional[Sequence[str]]):
+        """Pull up to batch_size records and build their bulk entries
+        
+        Returns (documents, metadatas, full_records); empty once records is
+        exhausted.
+        """
+        documents, metadatas, full_records = [], [], []
+        for item in itertools.islice(records, batch_size):
+            doc_text, metadata, full_record = self._build_bulk_entry(data_type, item, metadata_fields)
+            documents.append(doc_text)
+            metadatas.append(metadata)
+            full_records.append(full_record)
+        return documents, metadatas, full_records
+    
+    def _deduplicate(self, collection, data_type: str, documents: List[str],
+                     metadatas: List[Dict[str, Any]], full_records: List[Optional[Dict[str, Any]]], dedup: str):
+        """Assign ids to a batch and drop or collapse duplicate records
+        
+        Returns (ids, documents, metadatas, full_records, occurrences),
+        where occurrences maps already stored documents to their new
+        occurrence_count.
+        """
+        if dedup == "none":
+            ids = [f"{data_type}_bulk_{uuid.uuid4()}" for _ in documents]
+            return ids, documents, metadatas, full_records, {}
+        
+        ids, unique_documents, unique_metadatas, unique_records = [], [], [], []
+        occurrences: Dict[str, int] = {}
+        
+        if dedup == "exact":
+            # Upserting the same id twice in one call is an error, keep the last
+            positions: Dict[str, int] = {}
+            for doc_text, metadata, full_record in zip(documents, metadatas, full_records):
+                doc_id = content_id(data_type, doc_text)
+                if doc_id in positions:
+                    unique_metadatas[positions[doc_id]] = metadata
+                    continue
+                positions[doc_id] = len(ids)
+                ids.append(doc_id)
+                unique_documents.append(doc_text)
+                unique_metadatas.append(metadata)
+                unique_records.append(full_record)
+            return ids, unique_documents, unique_metadatas, unique_records, occurrences
+        
+        index = self._get_near_index(collection)
+        # Templates first seen in this batch: doc id -> fingerprint
+        new_fingerprints: Dict[str, int] = {}
+        for doc_text, metadata, full_record in zip(documents, metadatas, full_records):
+            fingerprint = simhash(log_template(doc_text))
+            match = index.find(fingerprint)
+            if match is not None:
+                doc_id, count = index.documents[match]
+                index.documents[match] = (doc_id, count + 1)
+                if doc_id not in new_fingerprints:
+                    occurrences[doc_id] = count + 1
+                continue
+            
+            doc_id = f"{data_type}_t{fingerprint:016x}"
+            index.add(fingerprint, doc_id)
+            new_fingerprints[doc_id] = fingerprint
+            ids.append(doc_id)
+            unique_documents.append(doc_text)
+            unique_metadatas.append({**metadata, "simhash": f"{fingerprint:016x}"})
+            unique_records.append(full_record)
+        
+        for doc_id, metadata in zip(ids, unique_metadatas):
+            metadata["occurrence_count"] = index.documents[new_fingerprints[doc_id]][1]
+        return ids, unique_documents, unique_metadatas, unique_records, occurrences
+    
+    def _write_batch(self, collection, batch, embeddings, dedup: str):
+        ids, documents, metadatas, full_records, occurrences = batch
+        if ids:
+            if dedup == "none":
+                collection.add(documents=documents, metadatas=metadatas, ids=ids, embeddings=embeddings)
+                self._index_metadata(collection, ids, metadatas)
+            else:
+                # Upserts merge metadata keys, and so does the index
+                collection.upsert(documents=documents, metadatas=metadatas, ids=ids, embeddings=embeddings)
+                self._index_metadata(collection, ids, metadatas, replace=False)
+            self._index_documents(collection, ids, documents)
+            stored = [(doc_id, record) for doc_id, record in zip(ids, full_records) if record is not None]
+            if stored and self.record_store is not None:
+                self.record_store.put_many(collection.name, *map(list, zip(*stored)))
+        if occurrences:
+            last_seen = datetime.now().isoformat()
+            updates = [{"occurrence_count": count, "last_seen": last_seen} for count in occurrences.values()]
+            collection.update(ids=list(occurrences), metadatas=updates)
+            self._index_metadata(collection, list(occurrences), updates, replace=False)
+    
+    def _get_near_index(self, collection, page_size: int = 1000) -> SimHashIndex:
+        """Load the SimHash index of a collection on first use"""
+        index = self._near_indexes.get(collection.name)
+        if index is not None:
+            return index
+        
+        index = SimHashIndex()
+        offset = 0
+        while True:
+            page = collection.get(
+                where={"simhash": {"$ne": ""}},
+                limit=page_size,
+                offset=offset,
+                include=["metadatas"]
+            )
+            if not page["ids"]:
+                break
+            for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+                index.add(int(metadata["simhash"], 16), doc_id, metadata.get("occurrence_count", 1))
+            offset += len(page["ids"])
+        
+        self._near_indexes[collection.name] = index
+        return index
+    
+    def _get_bulk_collection(self, data_type: str):
+        """Get or create the collection that bulk records of a type go to"""
+        collection_name = f"observability_{data_type}"
+        if collection_name not in self.collections:
+            self.collections[collection_name] = self.client.get_or_create_collection(
+                name=collection_name,
+                metadata={"hnsw:space": "cosine"}
+            )
+            self._ensure_metadata_indexed(self.collections[collection_name])
+            self._ensure_lexical_indexed(self.collections[collection_name])
+        return self.collections[collection_name]
+    
+    def _build_bulk_entry(self, data_type: str, item: Any, metadata_fields: Optional[Sequence[str]] = None):
+        """Build the (document, metadata, full record) stored for one bulk record
+        
+        The full record is only set in schema mode, when it is kept in the
+        record store instead of in Chroma.
+        """
+        full_record = None
+        if isinstance(item, dict) and metadata_fields is not None:
+            doc_text = json.dumps(item, separators=(",", ":"), default=str)
+            metadata = {
+                **self._sanitize_metadata({key: item[key] for key in metadata_fields if key in item}),
+                "data_type": data_type,
+                "bulk_upload": True
+            }
+            full_record = item
+        elif isinstance(item, dict):
+            doc_text = json.dumps(item, indent=2, default=str)
+            metadata = {**self._sanitize_metadata(item), "data_type": data_type, "bulk_upload": True}
+        else:
+            doc_text = str(item)
+            metadata = {"data_type": data_type, "bulk_upload": True}
+        
+        metadata["timestamp"] = datetime.now().isoformat()
+        return doc_text, metadata, full_record
+    
+    @staticmethod
+    def _sanitize_metadata(fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Make record fields valid Chroma metadata
+        
+        Chroma only takes str, int, float and bool values: None and empty
+        values are dropped, nested values are stored as compact JSON.
+        """
+        metadata = {}
+        for key, value in fields.items():
+            if value is None or value == "" or value != value:  # value != value: NaN
+                continue
+            if isinstance(value, (str, int, float, bool)):
+                metadata[str(key)] = value
+            else:
+                metadata[str(key)] = json.dumps(value, separators=(",", ":"), default=str)
+        return metadata
+    
+    async def get_records(self, collection_name: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Full records of documents stored in schema mode, by document id"""
+        if self.record_store is None:
+            return {}
+        return await asyncio.to_thread(self.record_store.get_many, collection_name, ids)
+    
     async def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about all collections"""
         stats = {}
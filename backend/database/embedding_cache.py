@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.helpers import create_hash
+
+class EmbeddingCache:
+    """Persistent cache of embedding vectors keyed by model and document hash
+
+    Vectors live in a memory-mapped float32 matrix file, one row per entry,
+    and a SQLite table maps each key to its row. Once max_entries rows are
+    used, new vectors overwrite the oldest rows in turn.
+    """
+
+    def __init__(self, directory: str = "./data/embedding_cache", max_entries: int = 1_000_000,
+                 initial_capacity: int = 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.initial_capacity = min(initial_capacity, max_entries)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._capacity = 0
+        self.stats_counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        self._db = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_index (
+                key TEXT PRIMARY KEY,
+                row INTEGER NOT NULL UNIQUE
+            )
+        """)
+        self._db.execute("CREATE TABLE IF NOT EXISTS embedding_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.commit()
+
+        meta = dict(self._db.execute("SELECT name, value FROM embedding_meta"))
+        self.dimensions: Optional[int] = meta.get("dimensions")
+        self._next_row = meta.get("next_row", 0)
+
+        # Key -> row for lookups, and row -> key to drop overwritten entries
+        self._rows: Dict[str, int] = dict(self._db.execute("SELECT key, row FROM embedding_index"))
+        self._row_keys: Dict[int, str] = {row: key for key, row in self._rows.items()}
+
+        if self.dimensions and os.path.exists(self.vectors_path):
+            row_bytes = self.dimensions * 4
+            self._open_vectors(os.path.getsize(self.vectors_path) // row_bytes)
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> str:
+        """Hash the model id with whitespace-normalized text"""
+        return create_hash(f"{model_id}\x00{' '.join(text.split())}")
+
+    def _open_vectors(self, capacity: int):
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._capacity = capacity
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+",
+                                  shape=(capacity, self.dimensions))
+
+    def _ensure_capacity(self, rows: int):
+        """Grow the vector file by doubling until it holds rows entries"""
+        if rows <= self._capacity:
+            return
+        capacity = max(self._capacity, self.initial_capacity)
+        while capacity < rows:
+            capacity *= 2
+        capacity = min(capacity, self.max_entries)
+        with open(self.vectors_path, "ab") as vectors_file:
+            vectors_file.truncate(capacity * self.dimensions * 4)
+        self._open_vectors(capacity)
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """Look up vectors for keys; misses come back as None"""
+        with self._lock:
+            results = []
+            for key in keys:
+                row = self._rows.get(key)
+                if row is None or self._vectors is None:
+                    self.stats_counters["misses"] += 1
+                    results.append(None)
+                else:
+                    self.stats_counters["hits"] += 1
+                    results.append(self._vectors[row].tolist())
+            return results
+
+    def put_many(self, keys: List[str], vectors: List[Any]):
+        """Store vectors, overwriting the oldest entries once full"""
+        if not keys:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = matrix.shape[1]
+                self._db.execute("INSERT OR REPLACE INTO embedding_meta VALUES ('dimensions', ?)", (self.dimensions,))
+            elif matrix.shape[1] != self.dimensions:
+                raise ValueError(f"Embedding has {matrix.shape[1]} dimensions, cache holds {self.dimensions}")
+
+            rows = []
+            for key in keys:
+                row = self._rows.get(key)
+                if row is None:
+                    row = self._next_row
+                    self._next_row = (self._next_row + 1) % self.max_entries
+                    evicted = self._row_keys.pop(row, None)
+                    if evicted is not None:
+                        del self._rows[evicted]
+                        self.stats_counters["evictions"] += 1
+                    self._rows[key] = row
+                    self._row_keys[row] = key
+                rows.append(row)
+
+            self._ensure_capacity(max(rows) + 1)
+            self._vectors[rows] = matrix
+            self._vectors.flush()
+
+            # Vectors are flushed before the index points at them. The unique
+            # row column makes each insert replace an evicted key's mapping.
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embedding_index (key, row) VALUES (?, ?)",
+                list(zip(keys, rows))
+            )
+            self._db.execute("INSERT OR REPLACE INTO embedding_meta VALUES ('next_row', ?)", (self._next_row,))
+            self._db.commit()
+            self.stats_counters["writes"] += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM embedding_index")
+            self._db.execute("DELETE FROM embedding_meta")
+            self._db.commit()
+            self._rows.clear()
+            self._row_keys.clear()
+            self._vectors = None
+            self._capacity = 0
+            self._next_row = 0
+            self.dimensions = None
+            if os.path.exists(self.vectors_path):
+                os.remove(self.vectors_path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats_counters["hits"] + self.stats_counters["misses"]
+            return {
+                **self.stats_counters,
+                "hit_rate": round(self.stats_counters["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._rows),
+                "max_entries": self.max_entries,
+                "dimensions": self.dimensions,
+                "file_bytes": os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+            }
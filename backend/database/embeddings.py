@@ -0,0 +1,109 @@
+from chromadb.utils import embedding_functions
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Callable, Dict, Tuple
+from database.embedding_cache import EmbeddingCache
+import asyncio
+import os
+import threading
+
+EmbeddingFunction = Callable[[List[str]], List[List[float]]]
+
+class EmbeddingPipeline:
+    """Computes document embeddings on a pool of worker threads
+
+    A batch is split into one slice per worker and the slices are embedded
+    concurrently. The default ONNX model releases the GIL while it runs,
+    so throughput scales with the number of cores. With a cache, only
+    documents whose vectors are not already cached are embedded; embed()
+    reads and writes the cache in a thread, as it shares a lock with
+    ingest threads writing whole batches.
+    """
+
+    def __init__(self, embedding_function: Optional[EmbeddingFunction] = None,
+                 workers: Optional[int] = None, min_slice: int = 8,
+                 cache: Optional[EmbeddingCache] = None):
+        # Same model Chroma uses for collections created without one
+        self.embedding_function = embedding_function or embedding_functions.DefaultEmbeddingFunction()
+        self.model_id = getattr(self.embedding_function, "MODEL_NAME", type(self.embedding_function).__name__)
+        self.workers = workers or os.cpu_count() or 1
+        # Smaller slices cost more in per-call overhead than they gain
+        self.min_slice = min_slice
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embedding")
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    def _compute(self, documents: List[str]) -> List[List[float]]:
+        if not self._loaded:
+            # The model loads lazily on first use; load it once rather than
+            # in every worker thread at the same time
+            with self._load_lock:
+                if not self._loaded:
+                    self.embedding_function(documents[:1])
+                    self._loaded = True
+        return [
+            vector.tolist() if hasattr(vector, "tolist") else list(vector)
+            for vector in self.embedding_function(documents)
+        ]
+
+    def _lookup(self, documents: List[str]) -> Tuple[List[Optional[List[float]]], Dict[str, List[int]], List[str]]:
+        """Return cached vectors, positions of each missing key, and one text per missing key"""
+        if self.cache is None:
+            keys = [str(i) for i in range(len(documents))]
+            return [None] * len(documents), {key: [i] for i, key in enumerate(keys)}, list(documents)
+
+        keys = [EmbeddingCache.make_key(self.model_id, document) for document in documents]
+        vectors = self.cache.get_many(keys)
+        missing: Dict[str, List[int]] = {}
+        for i, (key, vector) in enumerate(zip(keys, vectors)):
+            if vector is None:
+                missing.setdefault(key, []).append(i)
+        # Identical documents in one batch are embedded once
+        return vectors, missing, [documents[positions[0]] for positions in missing.values()]
+
+    def _fill(self, vectors: List[Optional[List[float]]], missing: Dict[str, List[int]],
+              computed: List[List[float]]) -> List[List[float]]:
+        for positions, vector in zip(missing.values(), computed):
+            for i in positions:
+                vectors[i] = vector
+        if self.cache is not None and computed:
+            try:
+                self.cache.put_many(list(missing.keys()), computed)
+            except Exception as e:
+                print(f"Error caching embeddings: {e}")
+        return vectors
+
+    def embed_sync(self, documents: List[str]) -> List[List[float]]:
+        """Embed documents on the calling thread"""
+        vectors, missing, texts = self._lookup(documents)
+        computed = self._compute(texts) if texts else []
+        return self._fill(vectors, missing, computed)
+
+    async def embed(self, documents: List[str]) -> List[List[float]]:
+        """Embed documents across the worker pool, preserving order"""
+        if not documents:
+            return []
+
+        vectors, missing, texts = await self._in_thread(self._lookup, documents)
+        computed = []
+        if texts:
+            loop = asyncio.get_running_loop()
+            slice_size = max(self.min_slice, -(-len(texts) // self.workers))
+            slices = [texts[i:i + slice_size] for i in range(0, len(texts), slice_size)]
+            results = await asyncio.gather(*[
+                loop.run_in_executor(self.executor, self._compute, chunk) for chunk in slices
+            ])
+            computed = [vector for result in results for vector in result]
+        return await self._in_thread(self._fill, vectors, missing, computed)
+
+    async def _in_thread(self, func, *args):
+        # Without a cache there is no I/O worth a thread hop
+        if self.cache is None:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    def stats(self):
+        return self.cache.stats() if self.cache is not None else {"enabled": False}
+
+    def close(self):
+        self.executor.shutdown(wait=False)
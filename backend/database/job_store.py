@@ -0,0 +1,170 @@
+from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, select, update
+from sqlalchemy.orm import declarative_base, sessionmaker
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+import json
+import os
+import uuid
+
+Base = declarative_base()
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+TERMINAL_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+class Job(Base):
+    """Persistent background job record"""
+    __tablename__ = "jobs"
+
+    id = Column(String(64), primary_key=True)
+    kind = Column(String(32), nullable=False, index=True)
+    status = Column(String(16), nullable=False, index=True, default=JOB_QUEUED)
+    payload = Column(Text, nullable=False, default="{}")
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    progress = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+            "progress": json.loads(self.progress) if self.progress else None,
+            "attempts": self.attempts,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class JobStore:
+    """SQLite-backed job table that survives restarts"""
+
+    def __init__(self, db_path: str = "./data/jobs.db"):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.engine = create_engine(
+            f"sqlite:///{db_path}",
+            connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+
+    def create_job(self, kind: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Insert a queued job and return it"""
+        now = datetime.now()
+        job = Job(
+            id=job_id or str(uuid.uuid4()),
+            kind=kind,
+            status=JOB_QUEUED,
+            payload=json.dumps(payload),
+            created_at=now,
+            updated_at=now
+        )
+        with self.Session() as session:
+            session.add(job)
+            session.commit()
+        return job.to_dict()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.Session() as session:
+            job = session.get(Job, job_id)
+            return job.to_dict() if job else None
+
+    def get_payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.Session() as session:
+            job = session.get(Job, job_id)
+            return json.loads(job.payload) if job else None
+
+    def mark_running(self, job_id: str) -> bool:
+        """Move a queued job to running; False if another worker got it first"""
+        now = datetime.now()
+        with self.Session() as session:
+            claimed = session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == JOB_QUEUED)
+                .values(status=JOB_RUNNING, started_at=now, updated_at=now, attempts=Job.attempts + 1)
+            ).rowcount
+            session.commit()
+            return claimed == 1
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]):
+        with self.Session() as session:
+            session.execute(
+                update(Job)
+                .where(Job.id == job_id)
+                .values(progress=json.dumps(progress), updated_at=datetime.now())
+            )
+            session.commit()
+
+    def finish_job(self, job_id: str, result: Any = None, error: Optional[str] = None):
+        """Record the outcome of a job"""
+        now = datetime.now()
+        with self.Session() as session:
+            session.execute(
+                update(Job)
+                .where(Job.id == job_id)
+                .values(
+                    status=JOB_FAILED if error else JOB_SUCCEEDED,
+                    result=json.dumps(result) if result is not None else None,
+                    error=error,
+                    updated_at=now,
+                    finished_at=now
+                )
+            )
+            session.commit()
+
+    def fail_interrupted(self, max_attempts: int, kind: Optional[str] = None) -> int:
+        """Fail jobs left running by a previous process that have used up their attempts"""
+        now = datetime.now()
+        with self.Session() as session:
+            statement = update(Job).where(Job.status == JOB_RUNNING, Job.attempts >= max_attempts)
+            if kind:
+                statement = statement.where(Job.kind == kind)
+            count = session.execute(
+                statement.values(
+                    status=JOB_FAILED,
+                    error=f"Interrupted {max_attempts} times, giving up",
+                    updated_at=now,
+                    finished_at=now
+                )
+            ).rowcount
+            session.commit()
+            return count
+
+    def requeue_interrupted(self, kind: Optional[str] = None) -> int:
+        """Put jobs left running by a previous process back in the queue"""
+        with self.Session() as session:
+            statement = update(Job).where(Job.status == JOB_RUNNING)
+            if kind:
+                statement = statement.where(Job.kind == kind)
+            count = session.execute(
+                statement.values(status=JOB_QUEUED, updated_at=datetime.now())
+            ).rowcount
+            session.commit()
+            return count
+
+    def list_queued(self, kind: Optional[str] = None) -> List[str]:
+        """Ids of queued jobs, oldest first"""
+        with self.Session() as session:
+            statement = select(Job.id).where(Job.status == JOB_QUEUED).order_by(Job.created_at)
+            if kind:
+                statement = statement.where(Job.kind == kind)
+            return list(session.scalars(statement))
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self.Session() as session:
+            counts = {}
+            for status in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED):
+                counts[status] = session.query(Job).filter(Job.status == status).count()
+            return counts
@@ -0,0 +1,119 @@
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from utils.keyword_extractor import STOPWORDS
+
+# Identifiers as they appear in logs, including dotted, dashed and colon
+# separated compounds (java.net.SocketTimeoutException, db-primary-01, ERR-5003)
+TERM_PATTERN = re.compile(r'[A-Za-z0-9_]+(?:[.\-:/][A-Za-z0-9_]+)*')
+PART_PATTERN = re.compile(r'[.\-:/]')
+
+# Long queries (whole log excerpts) are cut to their first distinct terms
+MAX_QUERY_TERMS = 64
+
+def lexical_terms(text: str) -> List[str]:
+    """Lowercase terms of text; compounds are indexed whole and by their parts"""
+    terms = []
+    for token in TERM_PATTERN.findall(text):
+        token = token.lower()
+        parts = PART_PATTERN.split(token)
+        for term in ([token] + parts if len(parts) > 1 else parts):
+            if term and term not in STOPWORDS:
+                terms.append(term)
+    return terms
+
+class LexicalIndex:
+    """Persistent BM25 index over document text, one FTS5 table per collection
+
+    Documents are stored as their pre-tokenized terms, so exact tokens like
+    error codes, exception names and hostnames match as written, and ranked
+    with FTS5's built-in bm25(). Each collection keeps its own table so
+    document frequencies are not mixed between collections.
+    """
+
+    def __init__(self, db_path: str = "./data/lexical_index.db"):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS lexical_documents (
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                PRIMARY KEY (collection, doc_id),
+                UNIQUE (collection, row)
+            );
+            CREATE TABLE IF NOT EXISTS lexical_collections (collection TEXT PRIMARY KEY);
+        """)
+        self._db.commit()
+        self._tables: Dict[str, str] = {}
+
+    def _table(self, collection: str) -> str:
+        table = self._tables.get(collection)
+        if table is None:
+            table = "lexical_" + re.sub(r'[^A-Za-z0-9_]', '_', collection)
+            # Terms are already split; only whitespace separates them
+            self._db.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                f"terms, tokenize = \"unicode61 tokenchars '._-:/'\")"
+            )
+            self._tables[collection] = table
+        return table
+
+    def upsert(self, collection: str, documents: Iterable[Tuple[str, str]]):
+        """Index (doc id, text) pairs, replacing earlier versions of each document"""
+        with self._lock:
+            table = self._table(collection)
+            for doc_id, text in documents:
+                existing = self._db.execute(
+                    "SELECT row FROM lexical_documents WHERE collection = ? AND doc_id = ?", (collection, doc_id)
+                ).fetchone()
+                if existing:
+                    self._db.execute(f"DELETE FROM {table} WHERE rowid = ?", existing)
+                row = self._db.execute(
+                    f"INSERT INTO {table} (terms) VALUES (?)", (" ".join(lexical_terms(text or "")),)
+                ).lastrowid
+                self._db.execute(
+                    "INSERT OR REPLACE INTO lexical_documents (collection, doc_id, row) VALUES (?, ?, ?)",
+                    (collection, doc_id, row)
+                )
+            self._db.commit()
+
+    def search(self, collection: str, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """(doc id, BM25 score) of the best matching documents, best first"""
+        terms = list(dict.fromkeys(lexical_terms(query)))[:MAX_QUERY_TERMS]
+        if not terms:
+            return []
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        with self._lock:
+            table = self._table(collection)
+            # bm25() is lower for better matches; negate it to a score
+            rows = self._db.execute(f"""
+                SELECT d.doc_id, -bm25({table}) FROM {table}
+                JOIN lexical_documents d ON d.collection = ? AND d.row = {table}.rowid
+                WHERE {table} MATCH ?
+                ORDER BY bm25({table}) LIMIT ?
+            """, (collection, match, limit)).fetchall()
+        return [(doc_id, score) for doc_id, score in rows]
+
+    def is_indexed(self, collection: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM lexical_collections WHERE collection = ?", (collection,)
+            ).fetchone() is not None
+
+    def mark_indexed(self, collection: str):
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO lexical_collections VALUES (?)", (collection,))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute(
+                "SELECT collection, COUNT(*) FROM lexical_documents GROUP BY collection"
+            ).fetchall())
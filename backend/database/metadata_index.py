@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Substrings shorter than a trigram cannot use the full-text index
+MIN_INDEXED_LENGTH = 3
+
+class MetadataIndex:
+    """SQLite secondary index over the metadata values of Chroma documents
+
+    Every metadata value is stored as text in metadata_values, with an
+    external-content FTS5 trigram table over it, so case-insensitive
+    substring filters are answered from the index instead of by loading
+    whole collections. indexed_documents gives each document one stable
+    row, kept across upserts, for keyset scans in insertion order.
+    """
+
+    def __init__(self, db_path: str = "./data/metadata_index.db"):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS metadata_values (
+                id INTEGER PRIMARY KEY,
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_metadata_doc ON metadata_values (collection, doc_id);
+            CREATE INDEX IF NOT EXISTS idx_metadata_key ON metadata_values (collection, key);
+            CREATE VIRTUAL TABLE IF NOT EXISTS metadata_fts USING fts5(
+                value, content='metadata_values', content_rowid='id', tokenize='trigram'
+            );
+            CREATE TRIGGER IF NOT EXISTS metadata_values_ai AFTER INSERT ON metadata_values BEGIN
+                INSERT INTO metadata_fts (rowid, value) VALUES (new.id, new.value);
+            END;
+            CREATE TRIGGER IF NOT EXISTS metadata_values_ad AFTER DELETE ON metadata_values BEGIN
+                INSERT INTO metadata_fts (metadata_fts, rowid, value) VALUES ('delete', old.id, old.value);
+            END;
+            CREATE TABLE IF NOT EXISTS indexed_collections (collection TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS indexed_documents (
+                id INTEGER PRIMARY KEY,
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                UNIQUE (collection, doc_id)
+            );
+        """)
+        # Indexes written before indexed_documents existed
+        if self._db.execute("SELECT 1 FROM indexed_documents LIMIT 1").fetchone() is None:
+            self._db.execute("""
+                INSERT OR IGNORE INTO indexed_documents (collection, doc_id)
+                SELECT collection, doc_id FROM metadata_values
+                GROUP BY collection, doc_id ORDER BY MIN(id)
+            """)
+        self._db.commit()
+
+    def upsert(self, collection: str, ids: List[str], metadatas: List[Dict[str, Any]], replace: bool = True):
+        """Index metadata for documents
+
+        With replace, each document's previous entries are dropped first;
+        otherwise only the given keys are overwritten, matching a Chroma
+        metadata update.
+        """
+        rows = []
+        with self._lock:
+            for doc_id, metadata in zip(ids, metadatas):
+                metadata = metadata or {}
+                if replace:
+                    self._db.execute(
+                        "DELETE FROM metadata_values WHERE collection = ? AND doc_id = ?", (collection, doc_id)
+                    )
+                else:
+                    self._db.executemany(
+                        "DELETE FROM metadata_values WHERE collection = ? AND doc_id = ? AND key = ?",
+                        [(collection, doc_id, key) for key in metadata]
+                    )
+                rows.extend((collection, doc_id, key, str(value))
+                            for key, value in metadata.items() if value is not None)
+            self._db.executemany(
+                "INSERT INTO metadata_values (collection, doc_id, key, value) VALUES (?, ?, ?, ?)", rows
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO indexed_documents (collection, doc_id) VALUES (?, ?)",
+                [(collection, doc_id) for doc_id in ids]
+            )
+            self._db.commit()
+
+    def search(self, collection: str, key: str, substring: str, limit: int, offset: int = 0) -> List[str]:
+        """Ids of documents whose metadata value for key contains substring, in insertion order"""
+        with self._lock:
+            if len(substring) >= MIN_INDEXED_LENGTH:
+                query = '"' + substring.replace('"', '""') + '"'
+                cursor = self._db.execute("""
+                    SELECT m.doc_id FROM metadata_fts f
+                    JOIN metadata_values m ON m.id = f.rowid
+                    WHERE metadata_fts MATCH ? AND m.collection = ? AND m.key = ?
+                    ORDER BY m.id LIMIT ? OFFSET ?
+                """, (query, collection, key, limit, offset))
+            else:
+                pattern = "%" + substring.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                cursor = self._db.execute("""
+                    SELECT doc_id FROM metadata_values
+                    WHERE collection = ? AND key = ? AND value LIKE ? ESCAPE '\\'
+                    ORDER BY id LIMIT ? OFFSET ?
+                """, (collection, key, pattern, limit, offset))
+            return [row[0] for row in cursor]
+
+    def scan(self, collection: str, after: int = 0, limit: int = 1000, key: Optional[str] = None,
+             min_value: Optional[str] = None, max_value: Optional[str] = None) -> List[Tuple[int, str]]:
+        """(row id, doc id) pairs of a collection's documents, in insertion order
+
+        Each document appears once, under a row id that is stable across
+        upserts. Resumes after a previous row id, so a full scan costs one
+        indexed range query per page. min_value/max_value bound the value of
+        key as text, which orders ISO timestamps chronologically; documents
+        without key compare as an empty string.
+        """
+        join = ""
+        clauses = ["d.collection = ?", "d.id > ?"]
+        params: List[Any] = [collection, after]
+        if key is not None and (min_value is not None or max_value is not None):
+            join = "LEFT JOIN metadata_values m ON m.collection = d.collection AND m.doc_id = d.doc_id AND m.key = ?"
+            params.insert(0, key)
+            if min_value is not None:
+                clauses.append("COALESCE(m.value, '') >= ?")
+                params.append(min_value)
+            if max_value is not None:
+                clauses.append("COALESCE(m.value, '') < ?")
+                params.append(max_value)
+        params.append(limit)
+        with self._lock:
+            return self._db.execute(
+                f"SELECT d.id, d.doc_id FROM indexed_documents d {join} "
+                f"WHERE {' AND '.join(clauses)} ORDER BY d.id LIMIT ?",
+                params
+            ).fetchall()
+
+    def is_indexed(self, collection: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM indexed_collections WHERE collection = ?", (collection,)
+            ).fetchone() is not None
+
+    def mark_indexed(self, collection: str):
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO indexed_collections VALUES (?)", (collection,))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": self._db.execute("SELECT COUNT(*) FROM metadata_values").fetchone()[0],
+                "collections": [row[0] for row in self._db.execute("SELECT collection FROM indexed_collections")]
+            }
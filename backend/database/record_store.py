@@ -0,0 +1,56 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List
+
+class RecordStore:
+    """Side-store for the full structured records behind bulk documents
+
+    In schema mode only a few indexable fields go into Chroma metadata;
+    the complete record is kept here once, as compact JSON keyed by
+    collection and document id.
+    """
+
+    def __init__(self, db_path: str = "./data/records.db"):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS records (
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                record TEXT NOT NULL,
+                PRIMARY KEY (collection, doc_id)
+            ) WITHOUT ROWID;
+        """)
+        self._db.commit()
+
+    def put_many(self, collection: str, ids: List[str], records: List[Dict[str, Any]]):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO records (collection, doc_id, record) VALUES (?, ?, ?)",
+                [(collection, doc_id, json.dumps(record, separators=(",", ":"), default=str))
+                 for doc_id, record in zip(ids, records)]
+            )
+            self._db.commit()
+
+    def get_many(self, collection: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored records by document id; ids without a record are left out"""
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT doc_id, record FROM records WHERE collection = ? AND doc_id IN ({','.join('?' * len(ids))})",
+                [collection, *ids]
+            ).fetchall()
+        return {doc_id: json.loads(record) for doc_id, record in rows}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT collection, COUNT(*) FROM records GROUP BY collection"))
+            page_count = self._db.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+        return {"records": counts, "file_bytes": page_count * page_size}
@@ -1,17 +1,31 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import json
+import os
+import tempfile
 import uuid
 from typing import List, Optional
-import pandas as pd
-import io
 
-from models.schemas import ObservabilityData, BulkUploadResponse, RCAResponse
+from models.schemas import ObservabilityData, BulkUploadResponse, RCAResponse, JobResponse, MetadataSearchRequest
 from services.rca_service import RCAService
 from services.rag_service import RAGService
+from services.llm_service import LLMService
+from services.llm_cache import LLMResponseCache
+from services.llm_scheduler import LLMScheduler, SchedulerOverloadedError
+from services.ollama_pool import NoHealthyHostError
+from services.job_service import JobManager, JobQueueFullError
+from services.ingest_service import IngestionService
 from database.chroma_db import ChromaDBManager
+from database.embedding_cache import EmbeddingCache
+from database.metadata_index import MetadataIndex
+from database.lexical_index import LexicalIndex
+from database.record_store import RecordStore
+from utils.dedup import DEDUP_MODES
+from utils.export_writers import iter_ndjson, write_parquet
+from database.job_store import JobStore
 
 app = FastAPI(title="AI Observability RCA System", version="1.0.0")
 
@@ -28,15 +42,53 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 
 # Initialize services
-chroma_manager = ChromaDBManager()
-rag_service = RAGService(chroma_manager)
+chroma_manager = ChromaDBManager(
+    embedding_cache=EmbeddingCache("./data/embedding_cache"),
+    metadata_index=MetadataIndex("./data/metadata_index.db"),
+    lexical_index=LexicalIndex("./data/lexical_index.db"),
+    record_store=RecordStore("./data/records.db")
+)
+# OLLAMA_HOSTS takes a comma-separated list of endpoints to load balance over
+ollama_hosts = [
+    url.strip()
+    for url in os.getenv("OLLAMA_HOSTS", os.getenv("OLLAMA_HOST", "http://localhost:11434")).split(",")
+    if url.strip()
+]
+llm_service = LLMService(
+    model_name=os.getenv("OLLAMA_MODEL", "llama3"),
+    hosts=ollama_hosts,
+    max_connections=4,
+    cache=LLMResponseCache(disk_path="./data/llm_cache.db"),
+    # 4 per host while every host is up; LLMService binds the pool so
+    # admission shrinks as circuits open
+    scheduler=LLMScheduler(max_concurrency=4 * len(ollama_hosts), max_queue_depth=100)
+)
+rag_service = RAGService(chroma_manager, llm_service=llm_service)
 rca_service = RCAService(rag_service)
+job_store = JobStore("./data/jobs.db")
+job_manager = JobManager(job_store, num_workers=4)
+# Bulk ingestion gets its own workers so large uploads cannot starve analyses
+ingest_manager = JobManager(job_store, num_workers=2, max_pending=100)
+ingestion_service = IngestionService(rag_service, ingest_manager)
 
-@app.on_startup
+@app.on_event("startup")
 async def startup_event():
     """Initialize database and services on startup"""
     await chroma_manager.initialize()
     print("ChromaDB initialized successfully")
+    # Not rag_service.initialize(): an unreachable Ollama must not block startup
+    await rag_service.seed_keyword_corpus()
+    llm_service.pool.start_health_checks()
+    await job_manager.start()
+    await ingest_manager.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and release connections and threads"""
+    await job_manager.stop()
+    await ingest_manager.stop()
+    await llm_service.close()
+    chroma_manager.embedder.close()
 
 @app.get("/", response_class=HTMLResponse)
 async def get_main_page():
@@ -50,6 +102,37 @@ async def get_bulk_upload_page():
     with open("frontend/bulk_upload.html", "r") as file:
         return HTMLResponse(content=file.read())
 
+def format_sse(data: dict, event: Optional[str] = None) -> str:
+    """Format a payload as a server-sent event"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+async def run_analysis_pipeline(data: ObservabilityData, analysis_id: str) -> str:
+    """Store the data, generate the RCA and store the result"""
+    # Store the data in ChromaDB
+    await rag_service.store_observability_data(
+        logs=data.logs,
+        metrics=data.metrics,
+        traces=data.traces,
+        metadata={"analysis_id": analysis_id}
+    )
+    
+    # Generate RCA using LLM and RAG
+    rca_result = await rca_service.generate_rca(
+        logs=data.logs,
+        metrics=data.metrics,
+        traces=data.traces
+    )
+    
+    # Store the RCA result
+    await rag_service.store_rca_result(
+        analysis_id=analysis_id,
+        rca_result=rca_result,
+        original_data=data
+    )
+    
+    return rca_result
+
 @app.post("/api/analyze", response_model=RCAResponse)
 async def analyze_observability_data(data: ObservabilityData):
     """
@@ -59,27 +142,7 @@ async def analyze_observability_data(data: ObservabilityData):
         # Generate unique ID for this analysis
         analysis_id = str(uuid.uuid4())
         
-        # Store the data in ChromaDB
-        await rag_service.store_observability_data(
-            logs=data.logs,
-            metrics=data.metrics,
-            traces=data.traces,
-            metadata={"analysis_id": analysis_id}
-        )
-        
-        # Generate RCA using LLM and RAG
-        rca_result = await rca_service.generate_rca(
-            logs=data.logs,
-            metrics=data.metrics,
-            traces=data.traces
-        )
-        
-        # Store the RCA result
-        await rag_service.store_rca_result(
-            analysis_id=analysis_id,
-            rca_result=rca_result,
-            original_data=data
-        )
+        rca_result = await run_analysis_pipeline(data, analysis_id)
         
         return RCAResponse(
             analysis_id=analysis_id,
@@ -87,19 +150,205 @@ async def analyze_observability_data(data: ObservabilityData):
             status="success"
         )
         
+    except (SchedulerOverloadedError, NoHealthyHostError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+async def run_analysis_job(job_id: str, payload: dict) -> dict:
+    """Job handler executing the RCA pipeline for a queued analysis"""
+    data = ObservabilityData(**payload)
+    rca_result = await run_analysis_pipeline(data, job_id)
+    return {"analysis_id": job_id, "rca_result": rca_result}
+
+job_manager.register_handler("analysis", run_analysis_job)
+
+@app.post("/api/jobs/analyze", response_model=JobResponse, status_code=202)
+async def submit_analysis_job(data: ObservabilityData):
+    """
+    Queue an RCA analysis and return a job id immediately
+    """
+    try:
+        # The job id doubles as the analysis id of the stored result
+        return await job_manager.submit("analysis", data.model_dump(mode="json"))
+        
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job submission failed: {str(e)}")
+
+def split_fields(value: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated form field into a list of names"""
+    return [name.strip() for name in value.split(",") if name.strip()] if value else None
+
+@app.post("/api/jobs/bulk-upload", response_model=JobResponse, status_code=202)
+async def submit_bulk_upload_job(
+    logs_file: Optional[UploadFile] = File(None),
+    metrics_file: Optional[UploadFile] = File(None),
+    traces_file: Optional[UploadFile] = File(None),
+    rca_file: Optional[UploadFile] = File(None),
+    columns: Optional[str] = Form(None),
+    dedup: str = Form("exact"),
+    metadata_fields: Optional[str] = Form(None)
+):
+    """
+    Spool uploaded files to disk and ingest them as a background job
+    
+    Poll GET /api/jobs/{job_id} for records parsed, embedded, written and
+    failed, bytes read and throughput. `dedup` is "exact" (default), "near"
+    or "none". `metadata_fields` (comma-separated) selects schema mode: only
+    those fields are kept as metadata and full records go to the record store.
+    """
+    if dedup not in DEDUP_MODES:
+        raise HTTPException(status_code=400, detail=f"dedup must be one of: {', '.join(DEDUP_MODES)}")
+    
+    files_map = {
+        "logs": logs_file,
+        "metrics": metrics_file,
+        "traces": traces_file,
+        "rca": rca_file
+    }
+    files = [
+        {"data_type": file_type, "filename": file.filename, "fileobj": file.file}
+        for file_type, file in files_map.items()
+        if file and file.filename
+    ]
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+    
+    try:
+        return await ingestion_service.submit_upload(
+            files, columns=split_fields(columns), dedup=dedup, metadata_fields=split_fields(metadata_fields)
+        )
+        
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job submission failed: {str(e)}")
+
+def manager_for_job(job: dict) -> JobManager:
+    """Pick the job manager whose workers run a job's kind"""
+    return ingest_manager if job["kind"] in ingest_manager.handlers else job_manager
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job_status(job_id: str):
+    """
+    Get the status, progress and result of a background job
+    """
+    job = await job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def subscribe_job_events(job_id: str):
+    """
+    Stream job state changes as server-sent events until the job finishes
+    """
+    job = await job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    manager = manager_for_job(job)
+    
+    async def event_stream():
+        async for job in manager.subscribe(job_id):
+            yield format_sse(job, event=job["status"])
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/jobs")
+async def get_job_stats():
+    """
+    Get background job worker and queue statistics
+    """
+    return {**await job_manager.stats(), "ingest": await ingest_manager.stats()}
+
+@app.post("/api/analyze/stream")
+async def analyze_observability_data_stream(data: ObservabilityData):
+    """
+    Analyze logs, metrics, and traces, streaming the RCA as server-sent events
+    """
+    analysis_id = str(uuid.uuid4())
+    
+    async def event_stream():
+        # Send the analysis id right away so clients get a first byte
+        # before any storage or model work happens
+        yield format_sse({"analysis_id": analysis_id}, event="start")
+        
+        try:
+            await rag_service.store_observability_data(
+                logs=data.logs,
+                metrics=data.metrics,
+                traces=data.traces,
+                metadata={"analysis_id": analysis_id}
+            )
+            
+            context = await rag_service.get_relevant_context(data.logs, data.metrics, data.traces)
+            similar_cases = context.get("similar_cases", [])
+            
+            chunks = []
+            async for token in llm_service.analyze_observability_data_stream(
+                logs=data.logs,
+                metrics=data.metrics,
+                traces=data.traces,
+                similar_cases=similar_cases
+            ):
+                chunks.append(token)
+                yield format_sse({"token": token})
+            
+            rca_result = "".join(chunks)
+            
+            # Persist the full report once the stream completes
+            await rag_service.store_rca_result(
+                analysis_id=analysis_id,
+                rca_result=rca_result,
+                original_data=data
+            )
+            
+            yield format_sse({
+                "analysis_id": analysis_id,
+                "rca_result": rca_result,
+                "similar_cases": similar_cases,
+                "status": "success"
+            }, event="done")
+            
+        except (SchedulerOverloadedError, NoHealthyHostError) as e:
+            yield format_sse({"detail": str(e), "status_code": 503}, event="error")
+        except Exception as e:
+            yield format_sse({"detail": f"Analysis failed: {str(e)}"}, event="error")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/bulk-upload", response_model=BulkUploadResponse)
 async def bulk_upload_data(
     logs_file: Optional[UploadFile] = File(None),
     metrics_file: Optional[UploadFile] = File(None),
     traces_file: Optional[UploadFile] = File(None),
-    rca_file: Optional[UploadFile] = File(None)
+    rca_file: Optional[UploadFile] = File(None),
+    columns: Optional[str] = Form(None),
+    dedup: str = Form("exact"),
+    metadata_fields: Optional[str] = Form(None)
 ):
     """
     Bulk upload logs, metrics, traces, and RCA data
+    
+    Accepts JSON, NDJSON/JSONL, CSV, XLSX, Parquet and plain text files.
+    `columns` optionally limits Parquet files to a comma-separated column list.
+    `dedup` is "exact" (default), "near" or "none". `metadata_fields`
+    (comma-separated) selects schema mode: only those fields are kept as
+    metadata and full records go to the record store.
     """
+    if dedup not in DEDUP_MODES:
+        raise HTTPException(status_code=400, detail=f"dedup must be one of: {', '.join(DEDUP_MODES)}")
+    
     try:
         uploaded_files = []
         processed_count = 0
@@ -112,32 +361,25 @@ async def bulk_upload_data(
             "rca": rca_file
         }
         
+        projected_columns = split_fields(columns)
+        schema_fields = split_fields(metadata_fields)
+        
         for file_type, file in files_map.items():
             if file and file.filename:
-                content = await file.read()
-                
-                # Determine file format and process
-                if file.filename.endswith('.json'):
-                    data = json.loads(content.decode('utf-8'))
-                elif file.filename.endswith(('.csv', '.xlsx')):
-                    if file.filename.endswith('.csv'):
-                        df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-                    else:
-                        df = pd.read_excel(io.BytesIO(content))
-                    data = df.to_dict('records')
-                else:
-                    # Treat as text
-                    data = content.decode('utf-8')
-                
-                # Store in ChromaDB
-                await rag_service.bulk_store_data(file_type, data)
+                # Parse the spooled upload incrementally and write fixed-size
+                # batches as records arrive, instead of reading it whole
+                stored = await rag_service.bulk_store_file(
+                    file_type, file.filename, file.file, columns=projected_columns, dedup=dedup,
+                    metadata_fields=schema_fields
+                )
                 
                 uploaded_files.append({
                     "type": file_type,
                     "filename": file.filename,
-                    "size": len(content)
+                    "size": file.size,
+                    "records": stored
                 })
-                processed_count += len(data) if isinstance(data, list) else 1
+                processed_count += stored
         
         return BulkUploadResponse(
             uploaded_files=uploaded_files,
@@ -160,6 +402,188 @@ async def search_similar_cases(query: str, limit: int = 5):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@app.get("/api/search-observability")
+async def search_observability(query: str, limit: int = Query(5, ge=1, le=100),
+                               data_types: Optional[List[str]] = Query(None)):
+    """
+    Search stored logs, metrics and traces chunks, grouped by analysis
+    """
+    if data_types and not set(data_types) <= {"logs", "metrics", "traces"}:
+        raise HTTPException(status_code=400, detail="data_types must be logs, metrics or traces")
+    try:
+        analyses = await rag_service.search_observability(query, limit, data_types=data_types)
+        return {"analyses": analyses}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+@app.post("/api/search-metadata")
+async def search_by_metadata(request: MetadataSearchRequest):
+    """
+    Search stored documents by metadata, a page at a time
+    """
+    try:
+        results = await rag_service.search_by_metadata(request.filters, limit=request.limit, offset=request.offset)
+        return {
+            "results": results,
+            "offset": request.offset,
+            "limit": request.limit,
+            # A full page means there may be more
+            "next_offset": request.offset + len(results) if len(results) == request.limit else None
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Metadata search failed: {str(e)}")
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+@app.get("/api/records/{collection_name}/{doc_id}")
+async def get_full_record(collection_name: str, doc_id: str):
+    """
+    Return the full structured record of a document stored in schema mode
+    """
+    records = await chroma_manager.get_records(collection_name, [doc_id])
+    if doc_id not in records:
+        raise HTTPException(status_code=404, detail=f"No stored record for {doc_id}")
+    return {"id": doc_id, "collection": collection_name, "record": records[doc_id]}
+
+@app.get("/api/export/{collection_name}")
+async def export_collection(
+    collection_name: str,
+    format: str = "ndjson",
+    data_type: Optional[str] = None,
+    analysis_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    include_embeddings: bool = False
+):
+    """
+    Export a collection as NDJSON or Parquet
+    
+    Without `limit` the whole (filtered) collection is streamed. With
+    `limit`, one page of at most that many records is returned and the
+    X-Next-Cursor header holds the cursor for the next page; it is absent
+    on the last page. `since`/`until` bound the ISO `timestamp` metadata.
+    """
+    if collection_name not in chroma_manager.collections:
+        raise HTTPException(status_code=404, detail=f"Collection {collection_name} not found")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    
+    try:
+        pages = chroma_manager.iter_export(
+            collection_name, data_type=data_type, analysis_id=analysis_id, since=since, until=until,
+            cursor=cursor, page_size=limit or 1000, include_embeddings=include_embeddings
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"Content-Disposition": f'attachment; filename="{collection_name}.{format}"'}
+    
+    try:
+        if limit:
+            try:
+                records, next_cursor = await pages.__anext__()
+            except StopAsyncIteration:
+                records, next_cursor = [], None
+            await pages.aclose()
+            if next_cursor:
+                headers["X-Next-Cursor"] = next_cursor
+            
+            async def single_page():
+                yield records
+            selected = single_page()
+        else:
+            async def all_pages():
+                async for records, _ in pages:
+                    yield records
+            selected = all_pages()
+        
+        if format == "ndjson":
+            if limit:
+                # Buffer the single page so errors surface before headers are sent
+                body = b"".join([chunk async for chunk in iter_ndjson(selected)])
+                return Response(content=body, media_type=EXPORT_FORMATS[format], headers=headers)
+            return StreamingResponse(iter_ndjson(selected), media_type=EXPORT_FORMATS[format], headers=headers)
+        
+        # Parquet needs its footer written before it can be read, so row
+        # groups are spooled to a temporary file and then streamed
+        spool = tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024)
+        await write_parquet(selected, spool, include_embeddings=include_embeddings)
+        spool.seek(0)
+        
+        def read_spool():
+            with spool:
+                while chunk := spool.read(1024 * 1024):
+                    yield chunk
+        return StreamingResponse(read_spool(), media_type=EXPORT_FORMATS[format], headers=headers)
+        
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+
+@app.post("/api/admin/backfill-summaries")
+async def backfill_case_summaries():
+    """
+    Queue background summaries for historical cases stored without one
+    """
+    try:
+        queued = await rag_service.backfill_case_summaries()
+        return {"status": "success", "queued": queued}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Backfill failed: {str(e)}")
+
+@app.get("/api/llm/scheduler")
+async def get_llm_scheduler_stats():
+    """
+    Get LLM scheduler concurrency, queue depth and wait time statistics
+    """
+    return llm_service.scheduler.stats()
+
+@app.get("/api/llm/hosts")
+async def get_llm_host_stats():
+    """
+    Get per-host load, health and circuit breaker state for the Ollama pool
+    """
+    return llm_service.pool.stats()
+
+@app.get("/api/llm/cache")
+async def get_llm_cache_stats():
+    """
+    Get LLM response cache hit/miss statistics
+    """
+    return await asyncio.to_thread(llm_service.cache.stats)
+
+@app.delete("/api/llm/cache")
+async def clear_llm_cache():
+    """
+    Clear the LLM response cache
+    """
+    await asyncio.to_thread(llm_service.cache.clear)
+    return {"status": "success", "message": "LLM cache cleared"}
+
+@app.get("/api/embeddings/cache")
+async def get_embedding_cache_stats():
+    """
+    Get embedding cache hit rate, size and eviction statistics
+    """
+    return await asyncio.to_thread(chroma_manager.embedder.stats)
+
+@app.delete("/api/embeddings/cache")
+async def clear_embedding_cache():
+    """
+    Clear the embedding cache
+    """
+    if chroma_manager.embedder.cache is not None:
+        await asyncio.to_thread(chroma_manager.embedder.cache.clear)
+    return {"status": "success", "message": "Embedding cache cleared"}
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
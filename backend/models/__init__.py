@@ -11,7 +11,9 @@ from .schemas import (
     RCAResponse,
     BulkUploadResponse,
     HistoricalCase,
-    SimilarCaseResult
+    SimilarCaseResult,
+    JobResponse,
+    MetadataSearchRequest
 )
 
 __all__ = [
@@ -19,5 +21,7 @@ __all__ = [
     "RCAResponse", 
     "BulkUploadResponse",
     "HistoricalCase",
-    "SimilarCaseResult"
+    "SimilarCaseResult",
+    "JobResponse",
+    "MetadataSearchRequest"
 ]
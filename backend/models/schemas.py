@@ -28,6 +28,12 @@ class BulkUploadResponse(BaseModel):
     status: str
     errors: Optional[List[str]] = None
 
+class MetadataSearchRequest(BaseModel):
+    """Schema for a paginated metadata search"""
+    filters: Dict[str, Any] = Field(default_factory=dict, description="String values match as case-insensitive substrings, others must be equal")
+    limit: int = Field(10, ge=1, le=1000)
+    offset: int = Field(0, ge=0)
+
 class HistoricalCase(BaseModel):
     """Schema for historical case data"""
     case_id: str
@@ -47,3 +53,17 @@ class SimilarCaseResult(BaseModel):
     rca_summary: str
     timestamp: datetime
     metadata: Optional[Dict[str, Any]] = None
+
+class JobResponse(BaseModel):
+    """Schema for background job status"""
+    job_id: str
+    kind: str
+    status: str
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None
+    attempts: int = 0
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -6,14 +6,30 @@ This module contains the core business logic services:
 - LLM Service: Integration with Ollama/Llama3
 - RAG Service: Retrieval-Augmented Generation functionality
 - RCA Service: Root Cause Analysis orchestration
+- Job Manager: Persistent background job execution
+- Ingestion Service: Background bulk upload ingestion
+- Prompt Builder: Token-budgeted analysis prompts
+
+Services are imported on first access, so importing one service module
+(services.llm_service, say) does not pull in every other service and its
+dependencies.
 """
 
-from .llm_service import LLMService
-from .rag_service import RAGService
-from .rca_service import RCAService
+import importlib
+
+_EXPORTS = {
+    "LLMService": "llm_service",
+    "RAGService": "rag_service",
+    "RCAService": "rca_service",
+    "JobManager": "job_service",
+    "IngestionService": "ingest_service",
+    "PromptBuilder": "prompt_builder"
+}
+
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    "LLMService",
-    "RAGService", 
-    "RCAService"
-]
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
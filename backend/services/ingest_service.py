@@ -0,0 +1,163 @@
+from typing import List, Dict, Any, Optional, BinaryIO, Iterator
+from services.rag_service import RAGService
+from services.job_service import JobManager
+from utils.stream_parsers import iter_upload_records
+import asyncio
+import itertools
+import os
+import shutil
+import time
+import uuid
+
+INGEST_JOB_KIND = "ingest"
+
+class IngestionService:
+    """Spools bulk uploads to disk and stores them on background job workers
+
+    Progress is persisted on the job after every batch, so an ingest
+    interrupted by a restart resumes after the last batch written.
+    """
+
+    def __init__(self, rag_service: RAGService, job_manager: JobManager,
+                 spool_dir: str = "./data/uploads", batch_size: int = 100):
+        self.rag_service = rag_service
+        self.job_manager = job_manager
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        os.makedirs(spool_dir, exist_ok=True)
+        job_manager.register_handler(INGEST_JOB_KIND, self.run_ingest_job)
+
+    async def submit_upload(self, files: List[Dict[str, Any]], columns: Optional[List[str]] = None,
+                            dedup: str = "exact", metadata_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Spool uploaded files to disk and queue an ingest job for them
+
+        Each entry of files has data_type, filename and fileobj keys.
+        """
+        job_id = str(uuid.uuid4())
+        job_dir = os.path.join(self.spool_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+        try:
+            spooled = []
+            for entry in files:
+                path = os.path.join(job_dir, f"{entry['data_type']}_{os.path.basename(entry['filename'])}")
+                size = await asyncio.to_thread(self._spool_file, entry["fileobj"], path)
+                spooled.append({
+                    "data_type": entry["data_type"],
+                    "filename": entry["filename"],
+                    "path": path,
+                    "size": size
+                })
+
+            return await self.job_manager.submit(
+                INGEST_JOB_KIND,
+                {"files": spooled, "columns": columns, "dedup": dedup, "metadata_fields": metadata_fields},
+                job_id=job_id
+            )
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+    @staticmethod
+    def _spool_file(fileobj: BinaryIO, path: str) -> int:
+        fileobj.seek(0)
+        with open(path, "wb") as target:
+            shutil.copyfileobj(fileobj, target, 1024 * 1024)
+        return os.path.getsize(path)
+
+    async def run_ingest_job(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Job handler storing every spooled file of an upload"""
+        job = await self.job_manager.get_job(job_id)
+        # Progress left by an interrupted run tells us where to resume
+        progress = (job or {}).get("progress") or {}
+        file_states = progress.get("files") or {}
+        started = time.monotonic()
+        written_this_run = 0
+
+        async def report():
+            totals = {key: sum(state[key] for state in file_states.values())
+                      for key in ("parsed", "embedded", "written", "failed", "bytes_read", "bytes_total")}
+            elapsed = time.monotonic() - started
+            await self.job_manager.report_progress(job_id, {
+                **totals,
+                "records_per_second": round(written_this_run / elapsed, 1) if elapsed > 0 else 0.0,
+                "files": file_states
+            })
+
+        try:
+            for entry in payload["files"]:
+                data_type = entry["data_type"]
+                state = file_states.setdefault(data_type, {
+                    "filename": entry["filename"],
+                    "parsed": 0,
+                    "embedded": 0,
+                    "written": 0,
+                    "failed": 0,
+                    "bytes_read": 0,
+                    "bytes_total": entry["size"],
+                    "done": False
+                })
+                if state["done"]:
+                    continue
+
+                with open(entry["path"], "rb") as fileobj:
+                    # XLSX is parsed whole when the iterator is created
+                    records = await asyncio.to_thread(
+                        iter_upload_records, entry["filename"], fileobj, payload.get("columns")
+                    )
+                    # Records up to the last reported batch are already stored
+                    resume_from = state["written"] + state["failed"]
+                    state["parsed"] = resume_from
+
+                    def counted(records: Iterator[Any]) -> Iterator[Any]:
+                        for record in itertools.islice(records, resume_from, None):
+                            state["parsed"] += 1
+                            yield record
+
+                    async def on_batch(written: int, failed: int):
+                        nonlocal written_this_run
+                        # Chroma embeds each batch as part of writing it
+                        state["embedded"] += written
+                        state["written"] += written
+                        state["failed"] += failed
+                        state["bytes_read"] = min(fileobj.tell(), state["bytes_total"])
+                        written_this_run += written
+                        await report()
+
+                    await self.rag_service.bulk_store_records(
+                        data_type, counted(records), self.batch_size,
+                        on_batch=on_batch, continue_on_error=True,
+                        dedup=payload.get("dedup", "exact"),
+                        metadata_fields=payload.get("metadata_fields")
+                    )
+
+                state["bytes_read"] = state["bytes_total"]
+                state["done"] = True
+                await report()
+        except asyncio.CancelledError:
+            # Shutting down: keep the spooled files so the job can resume
+            raise
+        except Exception:
+            self._remove_spool(job_id)
+            raise
+
+        self._remove_spool(job_id)
+        uploaded_files = [
+            {
+                "type": entry["data_type"],
+                "filename": entry["filename"],
+                "size": entry["size"],
+                "records": file_states[entry["data_type"]]["written"],
+                "failed": file_states[entry["data_type"]]["failed"]
+            }
+            for entry in payload["files"]
+        ]
+        return {
+            "uploaded_files": uploaded_files,
+            "total_processed": sum(item["records"] for item in uploaded_files),
+            "total_failed": sum(item["failed"] for item in uploaded_files),
+            "status": "success"
+        }
+
+    def _remove_spool(self, job_id: str):
+        shutil.rmtree(os.path.join(self.spool_dir, job_id), ignore_errors=True)
@@ -0,0 +1,155 @@
+from typing import Dict, Any, Optional, Callable, Awaitable
+from database.job_store import JobStore, TERMINAL_STATUSES
+import asyncio
+
+JobHandler = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+class JobQueueFullError(Exception):
+    """Raised when too many jobs are waiting to accept another one"""
+    pass
+
+class JobManager:
+    """Runs persistent background jobs on a pool of asyncio workers
+
+    Job store calls run in threads so SQLite I/O never blocks the event
+    loop. A job interrupted by a restart is requeued until it has been
+    started max_attempts times, then failed.
+    """
+
+    def __init__(self, job_store: JobStore, num_workers: int = 4, max_pending: int = 1000,
+                 max_attempts: int = 3):
+        self.job_store = job_store
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        # Notified whenever any job changes state, for status subscribers
+        self._changed: Optional[asyncio.Condition] = None
+
+    def register_handler(self, kind: str, handler: JobHandler):
+        """Register the coroutine that executes jobs of a given kind"""
+        self.handlers[kind] = handler
+
+    async def start(self):
+        """Start workers and resume jobs interrupted by a restart"""
+        if self._workers:
+            return
+
+        self._queue = asyncio.Queue()
+        self._changed = asyncio.Condition()
+
+        # Managers can share a job store; each one resumes only the kinds
+        # of job it has handlers for
+        for kind in self.handlers:
+            failed = await asyncio.to_thread(self.job_store.fail_interrupted, self.max_attempts, kind)
+            if failed:
+                print(f"Failed {failed} interrupted {kind} jobs after {self.max_attempts} attempts")
+            requeued = await asyncio.to_thread(self.job_store.requeue_interrupted, kind)
+            if requeued:
+                print(f"Requeued {requeued} interrupted {kind} jobs")
+            for job_id in await asyncio.to_thread(self.job_store.list_queued, kind):
+                self._queue.put_nowait(job_id)
+
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.num_workers)]
+        print(f"Job manager started with {self.num_workers} workers")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, kind: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Persist a new job and queue it for execution"""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        if self._queue is None:
+            await self.start()
+        if self._queue.qsize() >= self.max_pending:
+            raise JobQueueFullError(f"Job queue is full ({self.max_pending} pending)")
+
+        job = await asyncio.to_thread(self.job_store.create_job, kind, payload, job_id)
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.job_store.get_job, job_id)
+
+    async def report_progress(self, job_id: str, progress: Dict[str, Any]):
+        """Persist progress for a running job and notify subscribers"""
+        await asyncio.to_thread(self.job_store.update_progress, job_id, progress)
+        await self._notify()
+
+    async def wait_for_change(self, timeout: float = 15.0):
+        """Block until any job changes state or the timeout expires"""
+        if self._changed is None:
+            await asyncio.sleep(timeout)
+            return
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def subscribe(self, job_id: str, timeout: float = 15.0):
+        """Yield the job's state each time it changes, until it finishes"""
+        last_seen = None
+        while True:
+            job = await self.get_job(job_id)
+            if job is None:
+                return
+            snapshot = (job["status"], job["updated_at"])
+            if snapshot != last_seen:
+                last_seen = snapshot
+                yield job
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            await self.wait_for_change(timeout)
+
+    async def _notify(self):
+        if self._changed is not None:
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        if not await asyncio.to_thread(self.job_store.mark_running, job_id):
+            return
+        await self._notify()
+
+        job = await self.get_job(job_id)
+        payload = await asyncio.to_thread(self.job_store.get_payload, job_id)
+        handler = self.handlers.get(job["kind"])
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{job['kind']}'")
+            result = await handler(job_id, payload)
+            await asyncio.to_thread(self.job_store.finish_job, job_id, result=result)
+        except asyncio.CancelledError:
+            # Leave the job running in the store; it is requeued on restart
+            raise
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            await asyncio.to_thread(self.job_store.finish_job, job_id, error=str(e))
+
+        await self._notify()
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "pending": self._queue.qsize() if self._queue else 0,
+            "max_pending": self.max_pending,
+            "max_attempts": self.max_attempts,
+            "jobs": await asyncio.to_thread(self.job_store.count_by_status)
+        }
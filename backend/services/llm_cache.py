@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from utils.helpers import create_hash
+
+class LLMResponseCache:
+    """Content-addressed cache for LLM responses with TTL and LRU eviction
+
+    Coroutines use aget/aset, which serve the memory tier inline and run
+    SQLite reads and writes of the disk tier in a thread.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_chars: int = 10_000_000,
+                 ttl_seconds: Optional[float] = 24 * 3600, disk_path: Optional[str] = None,
+                 max_disk_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+
+        # In-memory tier: key -> (created_at, response), ordered by recency
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_chars = 0
+        self._lock = threading.Lock()
+        # Held for SQLite access only, so memory hits never wait on the disk
+        self._disk_lock = threading.Lock()
+
+        self.stats_counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "writes": 0
+        }
+
+        # Optional on-disk tier that survives restarts
+        self.disk_path = disk_path
+        self._disk = None
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._disk.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+            self._disk.commit()
+
+    @staticmethod
+    def make_key(model: str, options: Dict[str, Any], system_prompt: Optional[str], prompt: str) -> str:
+        """Build the cache key from everything that determines the response"""
+        payload = json.dumps({
+            "model": model,
+            "options": options,
+            "system": system_prompt or "",
+            "prompt": prompt
+        }, sort_keys=True)
+        return create_hash(payload)
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached response, promoting disk hits into memory"""
+        response = self._get_memory(key)
+        if response is None and self._disk is not None:
+            response = self._get_disk(key)
+        if response is None:
+            self._count("misses")
+        return response
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get() for the event loop: memory hits inline, disk lookups in a thread"""
+        response = self._get_memory(key)
+        if response is None and self._disk is not None:
+            response = await asyncio.to_thread(self._get_disk, key)
+        if response is None:
+            self._count("misses")
+        return response
+
+    def set(self, key: str, response: str):
+        """Store a response in every enabled tier"""
+        now = time.time()
+        self._set_memory(key, now, response)
+        if self._disk is not None:
+            self._set_disk(key, now, response)
+
+    async def aset(self, key: str, response: str):
+        """set() for the event loop, writing the disk tier in a thread"""
+        now = time.time()
+        self._set_memory(key, now, response)
+        if self._disk is not None:
+            await asyncio.to_thread(self._set_disk, key, now, response)
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.stats_counters[counter] += 1
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            created_at, response = entry
+            if not self._is_expired(created_at):
+                self._memory.move_to_end(key)
+                self.stats_counters["memory_hits"] += 1
+                return response
+            self._remove_memory(key)
+            self.stats_counters["expired"] += 1
+            return None
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        with self._disk_lock:
+            row = self._disk.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if self._is_expired(created_at):
+                self._disk.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._disk.commit()
+                self._count("expired")
+                return None
+            self._disk.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._disk.commit()
+        with self._lock:
+            self._put_memory(key, created_at, response)
+            self.stats_counters["disk_hits"] += 1
+        return response
+
+    def _set_memory(self, key: str, created_at: float, response: str):
+        with self._lock:
+            self._put_memory(key, created_at, response)
+            self.stats_counters["writes"] += 1
+
+    def _set_disk(self, key: str, created_at: float, response: str):
+        with self._disk_lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, created_at, created_at)
+            )
+            self._prune_disk()
+            self._disk.commit()
+
+    def _put_memory(self, key: str, created_at: float, response: str):
+        if len(response) > self.max_chars:
+            return
+        if key in self._memory:
+            self._remove_memory(key)
+        self._memory[key] = (created_at, response)
+        self._memory_chars += len(response)
+
+        # Evict least recently used entries until within limits
+        while self._memory and (len(self._memory) > self.max_entries or self._memory_chars > self.max_chars):
+            oldest_key = next(iter(self._memory))
+            self._remove_memory(oldest_key)
+            self.stats_counters["evictions"] += 1
+
+    def _remove_memory(self, key: str):
+        _, response = self._memory.pop(key)
+        self._memory_chars -= len(response)
+
+    def _prune_disk(self):
+        if self.ttl_seconds is not None:
+            self._disk.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._disk.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_disk_entries,))
+
+    def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_chars = 0
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM llm_cache")
+                self._disk.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current tier sizes"""
+        with self._lock:
+            hits = self.stats_counters["memory_hits"] + self.stats_counters["disk_hits"]
+            lookups = hits + self.stats_counters["misses"]
+            stats = {
+                **self.stats_counters,
+                "hits": hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_chars": self._memory_chars,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_enabled": self._disk is not None
+            }
+        if self._disk is not None:
+            with self._disk_lock:
+                stats["disk_entries"] = self._disk.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return stats
@@ -0,0 +1,148 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from services.ollama_pool import OllamaHostPool
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background"
+}
+
+class SchedulerOverloadedError(Exception):
+    """Raised when the LLM request queue is full and a request is rejected"""
+    pass
+
+class LLMScheduler:
+    """Bounded-concurrency priority scheduler for LLM requests
+
+    With an Ollama host pool, admission follows the pool's per-host limits:
+    at most the summed limit of hosts whose circuit admits requests (one
+    trial for a half-open host) run at once, capped by max_concurrency.
+    Requests beyond that wait here, in priority order, rather than in the
+    pool's first-come host limiters. At least one request is always
+    admitted so an all-down pool fails fast instead of queueing.
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_queue_depth: int = 100, wait_sample_size: int = 1000,
+                 pool: Optional[OllamaHostPool] = None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.wait_sample_size = wait_sample_size
+        self.pool = pool
+
+        self._active = 0
+        # Waiters still in the queue, kept as a counter so checking the
+        # depth doesn't walk the heap
+        self._waiting = 0
+        # Heap of (priority, sequence, future, enqueued_at); the sequence
+        # keeps FIFO order within a priority class
+        self._queue = []
+        self._sequence = itertools.count()
+
+        self._wait_samples = {priority: deque(maxlen=wait_sample_size) for priority in PRIORITY_NAMES}
+        self.counters = {
+            "admitted": 0,
+            "rejected": 0,
+            "cancelled": 0
+        }
+
+    @property
+    def capacity(self) -> int:
+        """Number of requests allowed to run at once"""
+        if self.pool is None:
+            return self.max_concurrency
+        return max(1, min(self.max_concurrency, self.pool.capacity()))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE):
+        """Hold a concurrency slot for the duration of the block"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE):
+        """Wait for a concurrency slot, rejecting immediately if the queue is full"""
+        if self._active < self.capacity and not self.queue_depth:
+            self._admit(priority, 0.0)
+            return
+
+        if self.queue_depth >= self.max_queue_depth:
+            self.counters["rejected"] += 1
+            raise SchedulerOverloadedError(
+                f"LLM request queue is full ({self.max_queue_depth} waiting)"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future, time.monotonic()))
+        self._waiting += 1
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as we were cancelled; hand it on
+                self.release()
+            else:
+                self._waiting -= 1
+                self.counters["cancelled"] += 1
+            raise
+
+    def release(self):
+        """Return a slot and wake the highest-priority waiter"""
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._queue and self._active < self.capacity:
+            priority, _, future, enqueued_at = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._waiting -= 1
+            self._admit(priority, time.monotonic() - enqueued_at)
+            future.set_result(None)
+
+    def _admit(self, priority: int, waited: float):
+        self._active += 1
+        self.counters["admitted"] += 1
+        self._wait_samples.setdefault(priority, deque(maxlen=self.wait_sample_size)).append(waited)
+
+    def stats(self) -> Dict[str, Any]:
+        """Concurrency, queue depth and queue wait time statistics"""
+        wait_times = {}
+        for priority, samples in self._wait_samples.items():
+            ordered = sorted(samples)
+            name = PRIORITY_NAMES.get(priority, str(priority))
+            wait_times[name] = {
+                "samples": len(ordered),
+                "avg_seconds": sum(ordered) / len(ordered) if ordered else 0.0,
+                "p95_seconds": ordered[math.ceil(0.95 * len(ordered)) - 1] if ordered else 0.0,
+                "max_seconds": ordered[-1] if ordered else 0.0
+            }
+
+        return {
+            **self.counters,
+            "active": self._active,
+            "capacity": self.capacity,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "wait_times": wait_times
+        }
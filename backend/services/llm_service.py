@@ -1,69 +1,190 @@
-import ollama
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import json
 import re
 
+from services.llm_cache import LLMResponseCache
+from services.llm_scheduler import LLMScheduler, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from services.ollama_pool import OllamaHostPool
+from services.prompt_builder import PromptBuilder
+from utils.keyword_extractor import KeywordExtractor
+
+KEYWORD_MODES = ("local", "llm", "hybrid")
+
 class LLMService:
     """Service for interacting with Ollama and Llama3"""
     
-    def __init__(self, model_name: str = "llama3", host: str = "http://localhost:11434"):
+    def __init__(self, model_name: str = "llama3", host: str = "http://localhost:11434",
+                 max_connections: int = 10, timeout: float = 300.0,
+                 keyword_mode: str = "local", keyword_extractor: Optional[KeywordExtractor] = None,
+                 cache: Optional[LLMResponseCache] = None, scheduler: Optional[LLMScheduler] = None,
+                 hosts: Optional[List[str]] = None, prompt_builder: Optional[PromptBuilder] = None):
+        if keyword_mode not in KEYWORD_MODES:
+            raise ValueError(f"keyword_mode must be one of {KEYWORD_MODES}, got {keyword_mode!r}")
+        
         self.model_name = model_name
-        self.host = host
-        self.client = ollama.Client(host=host)
+        self.hosts = hosts or [host]
+        self.host = self.hosts[0]
+        # "local" uses the deterministic extractor only, "llm" asks the model,
+        # "hybrid" refines the local keywords with the model's
+        self.keyword_mode = keyword_mode
+        self.keyword_extractor = keyword_extractor or KeywordExtractor()
+        # Fits the observability data and similar cases into a token budget
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.options = {
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "max_tokens": 2048
+        }
+        # Identical (model, options, system prompt, prompt) requests are
+        # served from the cache instead of regenerating
+        self.cache = cache if cache is not None else LLMResponseCache()
+        # Caps concurrent generations (max_connections per healthy Ollama
+        # host) and orders waiting requests by priority
+        self.scheduler = scheduler or LLMScheduler(max_concurrency=max_connections * len(self.hosts))
+        # Non-blocking HTTP transport to the Ollama REST API. Each host keeps
+        # a pool of keep-alive connections; requests go to the least loaded
+        # healthy host and fail over to another one on errors.
+        self.pool = OllamaHostPool(
+            self.hosts,
+            max_connections_per_host=max_connections,
+            timeout=timeout
+        )
+        # Admission follows the capacity of the hosts that are up
+        if self.scheduler.pool is None:
+            self.scheduler.pool = self.pool
+    
+    async def close(self):
+        """Close the pooled HTTP connections to Ollama"""
+        await self.pool.close()
+    
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a JSON payload to the Ollama API and return the decoded body"""
+        return await self.pool.request("POST", path, payload)
         
     async def ensure_model_available(self):
-        """Ensure the specified model is available"""
+        """Ensure the specified model is available on every Ollama host"""
         try:
-            # Check if model exists
-            models = self.client.list()
-            model_names = [model["name"] for model in models["models"]]
-            
-            if self.model_name not in model_names and f"{self.model_name}:latest" not in model_names:
-                print(f"Model {self.model_name} not found. Pulling...")
-                self.client.pull(self.model_name)
-                print(f"Model {self.model_name} pulled successfully")
-            else:
-                print(f"Model {self.model_name} is available")
+            for ollama_host in self.pool.hosts:
+                # Check if model exists
+                response = await ollama_host.client.get("/api/tags")
+                response.raise_for_status()
+                models = response.json()
+                model_names = [model["name"] for model in models.get("models", [])]
+                
+                if self.model_name not in model_names and f"{self.model_name}:latest" not in model_names:
+                    print(f"Model {self.model_name} not found on {ollama_host.url}. Pulling...")
+                    pull = await ollama_host.client.post("/api/pull", json={"name": self.model_name, "stream": False})
+                    pull.raise_for_status()
+                    print(f"Model {self.model_name} pulled successfully on {ollama_host.url}")
+                else:
+                    print(f"Model {self.model_name} is available on {ollama_host.url}")
                 
         except Exception as e:
             print(f"Error checking/pulling model: {e}")
             raise
     
-    async def generate_response(self, prompt: str, system_prompt: str = None) -> str:
+    async def generate_response(self, prompt: str, system_prompt: str = None, use_cache: bool = True,
+                                priority: int = PRIORITY_INTERACTIVE) -> str:
         """Generate response from Llama3"""
         try:
-            messages = []
+            cache_key = None
+            if use_cache and self.cache is not None:
+                cache_key = self.cache.make_key(self.model_name, self.options, system_prompt, prompt)
+                cached = await self.cache.aget(cache_key)
+                if cached is not None:
+                    return cached
             
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
+            async with self.scheduler.slot(priority):
+                response = await self._post("/api/chat", {
+                    "model": self.model_name,
+                    "messages": self._build_messages(prompt, system_prompt),
+                    "stream": False,
+                    "options": self.options
                 })
             
-            messages.append({
-                "role": "user", 
-                "content": prompt
-            })
+            content = response["message"]["content"]
+            if cache_key is not None:
+                await self.cache.aset(cache_key, content)
             
-            response = self.client.chat(
-                model=self.model_name,
-                messages=messages,
-                options={
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "max_tokens": 2048
-                }
-            )
-            
-            return response["message"]["content"]
+            return content
             
         except Exception as e:
             print(f"Error generating LLM response: {e}")
             raise
     
+    async def generate_stream(self, prompt: str, system_prompt: str = None, use_cache: bool = True,
+                              priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[str]:
+        """Generate a response from Llama3, yielding tokens as they arrive"""
+        cache_key = None
+        if use_cache and self.cache is not None:
+            cache_key = self.cache.make_key(self.model_name, self.options, system_prompt, prompt)
+            cached = await self.cache.aget(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        chunks = []
+        try:
+            async with self.scheduler.slot(priority), self.pool.stream("POST", "/api/chat", {
+                "model": self.model_name,
+                "messages": self._build_messages(prompt, system_prompt),
+                "stream": True,
+                "options": self.options
+            }) as response:
+                # Ollama streams one JSON object per line
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(chunk["error"])
+                    
+                    token = chunk.get("message", {}).get("content", "")
+                    if token:
+                        chunks.append(token)
+                        yield token
+                    
+                    if chunk.get("done"):
+                        break
+            
+        except Exception as e:
+            print(f"Error streaming LLM response: {e}")
+            raise
+        
+        if cache_key is not None:
+            await self.cache.aset(cache_key, "".join(chunks))
+    
+    def _build_messages(self, prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        """Build the chat message list for a prompt"""
+        messages = []
+        
+        if system_prompt:
+            messages.append({
+                "role": "system",
+                "content": system_prompt
+            })
+        
+        messages.append({
+            "role": "user", 
+            "content": prompt
+        })
+        
+        return messages
+    
     async def analyze_observability_data(self, logs: str, metrics: str, traces: str, similar_cases: List[Dict] = None) -> str:
         """Analyze observability data and generate RCA"""
+        prompt, system_prompt = self._build_analysis_prompt(logs, metrics, traces, similar_cases)
+        return await self.generate_response(prompt, system_prompt)
+    
+    async def analyze_observability_data_stream(self, logs: str, metrics: str, traces: str, similar_cases: List[Dict] = None) -> AsyncIterator[str]:
+        """Analyze observability data and stream the RCA as it is generated"""
+        prompt, system_prompt = self._build_analysis_prompt(logs, metrics, traces, similar_cases)
+        async for token in self.generate_stream(prompt, system_prompt):
+            yield token
+    
+    def _build_analysis_prompt(self, logs: str, metrics: str, traces: str, similar_cases: List[Dict] = None) -> Tuple[str, str]:
+        """Build the (prompt, system prompt) pair for an RCA analysis"""
         
         system_prompt = """You are an expert Site Reliability Engineer (SRE) and DevOps specialist with deep expertise in:
 - System observability and monitoring
@@ -86,26 +207,26 @@ Guidelines for analysis:
 
 Format your response as a structured RCA report."""
 
-        # Prepare the analysis prompt
+        # Errors, distinct log templates, anomalous metrics and failing
+        # spans are kept first when the data exceeds the token budget
+        sections = self.prompt_builder.build(logs, metrics, traces, similar_cases)
         prompt = f"""
 Please analyze the following observability data and provide a comprehensive root cause analysis:
 
 **LOGS:**
-{logs[:2000]}...
+{sections["logs"]}
 
 **METRICS:**
-{metrics[:2000]}...
+{sections["metrics"]}
 
 **TRACES:**
-{traces[:2000]}...
+{sections["traces"]}
 """
 
         # Add similar cases if available
         if similar_cases:
             prompt += "\n**SIMILAR HISTORICAL CASES:**\n"
-            for i, case in enumerate(similar_cases[:3]):
-                prompt += f"Case {i+1} (Similarity: {case.get('similarity_score', 0):.2f}):\n"
-                prompt += f"{case.get('document', '')[:500]}...\n\n"
+            prompt += sections["similar_cases"] + "\n"
 
         prompt += """
 **ANALYSIS REQUIREMENTS:**
@@ -119,7 +240,7 @@ Please analyze the following observability data and provide a comprehensive root
 Please provide a detailed, structured response following the above format.
 """
 
-        return await self.generate_response(prompt, system_prompt)
+        return prompt, system_prompt
     
     async def summarize_case(self, rca_result: str) -> str:
         """Generate a summary of an RCA case"""
@@ -136,10 +257,21 @@ Focus on:
 - The resolution approach
 """
 
-        return await self.generate_response(prompt, system_prompt)
+        return await self.generate_response(prompt, system_prompt, priority=PRIORITY_BACKGROUND)
     
-    async def extract_keywords(self, text: str) -> List[str]:
+    async def extract_keywords(self, text: str, mode: Optional[str] = None) -> List[str]:
         """Extract relevant keywords from observability data"""
+        mode = self._resolve_keyword_mode(mode)
+        if mode == "local":
+            return self.keyword_extractor.extract(text)
+        
+        keywords = await self._extract_keywords_llm(text)
+        if mode == "hybrid":
+            keywords = self._merge_keywords(self.keyword_extractor.extract(text), keywords)
+        return keywords
+    
+    async def _extract_keywords_llm(self, text: str) -> List[str]:
+        """Extract keywords with a single LLM generation"""
         system_prompt = "You are an expert at extracting relevant technical keywords from system logs, metrics, and traces."
         
         prompt = f"""
@@ -156,10 +288,107 @@ Return only the keywords as a comma-separated list.
 Text: {text[:1000]}...
 """
 
-        response = await self.generate_response(prompt, system_prompt)
+        response = await self.generate_response(prompt, system_prompt, priority=PRIORITY_BACKGROUND)
+        
+        return self._clean_keywords(response.split(","))
+    
+    async def extract_keywords_batch(self, texts: Dict[str, str], mode: Optional[str] = None) -> Dict[str, List[str]]:
+        """Extract keywords for several labelled texts with at most one LLM call"""
+        mode = self._resolve_keyword_mode(mode)
+        if mode == "local":
+            return {label: self.keyword_extractor.extract(text) for label, text in texts.items()}
+        
+        results = await self._extract_keywords_batch_llm(texts)
+        if mode == "hybrid":
+            results = {
+                label: self._merge_keywords(self.keyword_extractor.extract(texts[label]), keywords)
+                for label, keywords in results.items()
+            }
+        return results
+    
+    async def _extract_keywords_batch_llm(self, texts: Dict[str, str]) -> Dict[str, List[str]]:
+        """Extract keywords for several labelled texts with a single LLM call"""
+        labels = [label for label, text in texts.items() if text and text.strip()]
+        results = {label: [] for label in texts}
+        if not labels:
+            return results
         
-        # Clean and parse keywords
-        keywords = [kw.strip().lower() for kw in response.split(",")]
+        system_prompt = "You are an expert at extracting relevant technical keywords from system logs, metrics, and traces. You always answer with valid JSON."
+        
+        sections = "\n\n".join(
+            f"### {label}\n{texts[label][:1000]}..." for label in labels
+        )
+        prompt = f"""
+Extract the most relevant technical keywords from each of the following observability inputs.
+Focus on:
+- Error types and codes
+- Service names
+- System components
+- Performance indicators
+- Technology stack components
+
+Return only a JSON object mapping each input name to a list of keywords, for example:
+{json.dumps({label: ["keyword1", "keyword2"] for label in labels})}
+
+{sections}
+"""
+        
+        response = await self.generate_response(prompt, system_prompt, priority=PRIORITY_BACKGROUND)
+        parsed = self._parse_keyword_json(response, labels)
+        
+        for label in labels:
+            results[label] = self._clean_keywords(parsed.get(label, []))
+        
+        return results
+    
+    def _parse_keyword_json(self, response: str, labels: List[str]) -> Dict[str, List[str]]:
+        """Parse a label -> keywords mapping from an LLM response"""
+        # Models often wrap JSON in prose or code fences; decode the first object
+        decoder = json.JSONDecoder()
+        for match in re.finditer(r'\{', response):
+            try:
+                obj, _ = decoder.raw_decode(response[match.start():])
+            except json.JSONDecodeError:
+                continue
+            if isinstance(obj, dict):
+                parsed = {}
+                for key, value in obj.items():
+                    label = next((l for l in labels if l.lower() == str(key).strip().lower()), None)
+                    if label is None:
+                        continue
+                    if isinstance(value, str):
+                        value = value.split(",")
+                    if isinstance(value, list):
+                        parsed[label] = [str(v) for v in value]
+                if parsed:
+                    return parsed
+        
+        # Fall back to "label: kw1, kw2" lines
+        parsed = {}
+        for line in response.split('\n'):
+            key, sep, value = line.partition(":")
+            key = re.sub(r'^[#*\-\s"]+|[*"\s]+$', '', key).lower()
+            label = next((l for l in labels if l.lower() == key), None)
+            if sep and label:
+                parsed[label] = value.split(",")
+        
+        return parsed
+    
+    def _resolve_keyword_mode(self, mode: Optional[str]) -> str:
+        """Resolve a per-call keyword mode against the service default"""
+        mode = mode or self.keyword_mode
+        if mode not in KEYWORD_MODES:
+            raise ValueError(f"keyword mode must be one of {KEYWORD_MODES}, got {mode!r}")
+        return mode
+    
+    def _merge_keywords(self, local_keywords: List[str], llm_keywords: List[str]) -> List[str]:
+        """Merge LLM keywords into the local ones, keeping order and uniqueness"""
+        merged = list(dict.fromkeys(local_keywords[:10] + llm_keywords + local_keywords[10:]))
+        return merged[:20]
+    
+    def _clean_keywords(self, keywords: List[str]) -> List[str]:
+        """Normalize, filter and cap a list of raw keywords"""
+        keywords = [kw.strip().strip('"\'').lower() for kw in keywords]
         keywords = [kw for kw in keywords if kw and len(kw) > 2]
         
         return keywords[:20]  # Limit to top 20 keywords
@@ -0,0 +1,255 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+class NoHealthyHostError(Exception):
+    """Raised when no Ollama host is available to serve a request"""
+    pass
+
+class OllamaHost:
+    """A single Ollama endpoint with its connection pool, concurrency limit and circuit state"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, url: str, max_connections: int = 10, timeout: float = 300.0,
+                 max_concurrency: Optional[int] = None):
+        self.url = url.rstrip("/")
+        self.client = httpx.AsyncClient(
+            base_url=self.url,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+        # Requests generating on this host at once; outstanding also counts
+        # the ones waiting for the limiter
+        self.max_concurrency = max_concurrency or max_connections
+        self.limiter = asyncio.Semaphore(self.max_concurrency)
+        self.active = 0
+        self.outstanding = 0
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.total_requests = 0
+        self.total_failures = 0
+        self.last_error: Optional[str] = None
+
+    def is_available(self, reset_timeout: float) -> bool:
+        """Whether the circuit lets a request through right now"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= reset_timeout:
+            self.state = self.HALF_OPEN
+        # Half-open circuits admit a single trial request
+        return self.state == self.HALF_OPEN and not self.trial_in_flight
+
+    def release(self):
+        """Return the slot of a request whose response is done with"""
+        self.outstanding -= 1
+        self.active -= 1
+        self.limiter.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "consecutive_failures": self.consecutive_failures,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+            "last_error": self.last_error
+        }
+
+class OllamaHostPool:
+    """Load-balanced pool of Ollama hosts with health checks and circuit breaking"""
+
+    def __init__(self, hosts: List[str], max_connections_per_host: int = 10, timeout: float = 300.0,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 health_check_interval: float = 15.0, max_attempts: Optional[int] = None,
+                 max_concurrency_per_host: Optional[int] = None):
+        if not hosts:
+            raise ValueError("At least one Ollama host is required")
+
+        self.hosts = [
+            OllamaHost(url, max_connections_per_host, timeout, max_concurrency_per_host) for url in hosts
+        ]
+        self.max_connections_per_host = max_connections_per_host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.health_check_interval = health_check_interval
+        # By default every host gets one attempt per request
+        self.max_attempts = max_attempts or len(self.hosts)
+        self._health_task: Optional[asyncio.Task] = None
+
+    def select_host(self, exclude: Set[OllamaHost] = frozenset()) -> OllamaHost:
+        """Pick the available host with the fewest outstanding requests"""
+        candidates = [
+            host for host in self.hosts
+            if host not in exclude and host.is_available(self.reset_timeout)
+        ]
+        if not candidates:
+            raise NoHealthyHostError("No healthy Ollama host available")
+
+        fewest = min(host.outstanding for host in candidates)
+        host = random.choice([host for host in candidates if host.outstanding == fewest])
+        if host.state == OllamaHost.HALF_OPEN:
+            host.trial_in_flight = True
+        return host
+
+    def capacity(self) -> int:
+        """Requests the hosts whose circuit admits them can run at once"""
+        total = 0
+        for host in self.hosts:
+            if host.state == OllamaHost.CLOSED:
+                total += host.max_concurrency
+            elif host.state == OllamaHost.HALF_OPEN or time.monotonic() - host.opened_at >= self.reset_timeout:
+                # A single trial request
+                total += 1
+        return total
+
+    def record_success(self, host: OllamaHost):
+        host.consecutive_failures = 0
+        host.trial_in_flight = False
+        host.state = OllamaHost.CLOSED
+
+    def record_failure(self, host: OllamaHost, error: Exception):
+        host.total_failures += 1
+        host.consecutive_failures += 1
+        host.trial_in_flight = False
+        host.last_error = str(error) or type(error).__name__
+
+        if host.state == OllamaHost.HALF_OPEN or host.consecutive_failures >= self.failure_threshold:
+            if host.state != OllamaHost.OPEN:
+                print(f"Opening circuit for Ollama host {host.url}: {host.last_error}")
+            host.state = OllamaHost.OPEN
+            host.opened_at = time.monotonic()
+
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, httpx.TransportError):
+            return True
+        return isinstance(error, httpx.HTTPStatusError) and error.response.status_code >= 500
+
+    async def _send(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None,
+                    stream: bool = False) -> Tuple[OllamaHost, httpx.Response]:
+        """Send a request, retrying retryable failures on other hosts"""
+        tried: Set[OllamaHost] = set()
+        last_error: Optional[Exception] = None
+
+        for _ in range(self.max_attempts):
+            try:
+                host = self.select_host(exclude=tried)
+            except NoHealthyHostError:
+                break
+
+            tried.add(host)
+            host.outstanding += 1
+            acquired = handed_off = False
+            try:
+                # Picked first, so a request waits only on its own host's limit
+                await host.limiter.acquire()
+                acquired = True
+                host.active += 1
+                host.total_requests += 1
+                request = host.client.build_request(method, path, json=payload)
+                response = await host.client.send(request, stream=stream)
+                if response.status_code >= 500:
+                    if stream:
+                        await response.aread()
+                        await response.aclose()
+                    response.raise_for_status()
+                # The host answered; 4xx errors are the caller's problem
+                self.record_success(host)
+                handed_off = True
+                return host, response
+
+            except Exception as e:
+                if not self._is_retryable(e):
+                    raise
+                self.record_failure(host, e)
+                last_error = e
+                print(f"Ollama host {host.url} failed, retrying on another host: {host.last_error}")
+
+            finally:
+                # Also reached when the caller is cancelled mid-request; the
+                # caller releases the host once it has the response
+                if not handed_off:
+                    if acquired:
+                        host.release()
+                    else:
+                        host.outstanding -= 1
+                    host.trial_in_flight = False
+
+        if last_error is not None:
+            raise last_error
+        raise NoHealthyHostError("No healthy Ollama host available")
+
+    async def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send a request to the least loaded healthy host and decode the JSON body"""
+        host, response = await self._send(method, path, payload)
+        try:
+            response.raise_for_status()
+            return response.json()
+        finally:
+            host.release()
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None):
+        """Open a streaming response; retries only happen before the first byte"""
+        host, response = await self._send(method, path, payload, stream=True)
+        try:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            yield response
+        except httpx.TransportError as e:
+            self.record_failure(host, e)
+            raise
+        finally:
+            host.release()
+            await response.aclose()
+
+    async def check_health(self):
+        """Actively probe every host and update its circuit state"""
+        async def probe(host: OllamaHost):
+            try:
+                response = await host.client.get("/api/version", timeout=5.0)
+                response.raise_for_status()
+                self.record_success(host)
+            except Exception as e:
+                self.record_failure(host, e)
+
+        await asyncio.gather(*[probe(host) for host in self.hosts])
+
+    async def _run_health_checks(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.check_health()
+
+    def start_health_checks(self):
+        """Start periodic active health checks on the running event loop"""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self._run_health_checks())
+
+    async def close(self):
+        """Stop health checks and close every host's connections"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+        await asyncio.gather(*[host.client.aclose() for host in self.hosts])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hosts": [host.stats() for host in self.hosts],
+            "available_hosts": sum(1 for host in self.hosts if host.state != OllamaHost.OPEN),
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout
+        }
@@ -0,0 +1,218 @@
+import json
+import re
+import statistics
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.chunking import parse_spans
+from utils.dedup import TEMPLATE_PATTERNS, log_template
+from utils.log_templates import LogTemplateMiner
+
+# Approximates a BPE tokenizer: words up to 8 letters, numbers in groups of
+# three digits (as Llama 3 splits them), and single punctuation marks
+TOKEN_PATTERN = re.compile(r"[A-Za-z]{1,8}|\d{1,3}|[^\sA-Za-z\d]")
+
+ERROR_PATTERN = re.compile(
+    r'\b(?:FATAL|CRITICAL|ERROR|SEVERE|PANIC|Traceback|\w*Exception|\w*Error|failed|failure|refused|timed? ?out)\b',
+    re.IGNORECASE
+)
+WARNING_PATTERN = re.compile(r'\b(?:WARN|WARNING)\b', re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+TIMESTAMP_PATTERN = TEMPLATE_PATTERNS[0][0]
+
+# Metric samples this many standard deviations from their series mean are anomalous
+ANOMALY_Z = 2.0
+SLOW_SPAN_MS = 1000
+
+# An item competing for a section's budget: (priority, position, text)
+Item = Tuple[float, int, str]
+
+def estimate_tokens(text: str) -> int:
+    """Fast local estimate of the model's token count for text"""
+    return len(TOKEN_PATTERN.findall(text))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens"""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    return text[:max(int(len(text) * max_tokens / tokens) - 3, 0)] + "..."
+
+class PromptBuilder:
+    """Fits logs, metrics, traces and similar cases into a token budget
+
+    Each signal is split into items ranked by how informative they are:
+    log lines are deduplicated into templates with errors first, metric
+    samples are ranked by how anomalous they are within their series
+    (with their neighbours as a window), and error and slow spans come
+    first. The budget is shared out by weight; a section that needs less
+    than its share hands the rest to the others. Selected items are shown
+    in their original order.
+    """
+
+    def __init__(self, max_tokens: int = 1600, case_tokens: int = 200,
+                 weights: Optional[Dict[str, float]] = None):
+        self.max_tokens = max_tokens
+        # Upper bound for any one similar case
+        self.case_tokens = case_tokens
+        self.weights = weights or {"logs": 4.0, "metrics": 2.0, "traces": 2.0, "similar_cases": 2.0}
+
+    def build(self, logs: str, metrics: str, traces: str,
+              similar_cases: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Return the text of each section and the estimated tokens it uses"""
+        sections = {
+            "logs": self.log_items(logs),
+            "metrics": self.metric_items(metrics),
+            "traces": self.trace_items(traces),
+            "similar_cases": self.case_items(similar_cases or [])
+        }
+        weights = dict(self.weights)
+        # Sections carrying errors or anomalies get a larger share
+        for name, items in sections.items():
+            if name != "similar_cases" and any(priority >= 3 for priority, _, _ in items):
+                weights[name] *= 2
+
+        budgets = self.allocate({name: self._cost(items) for name, items in sections.items()}, weights)
+        result: Dict[str, Any] = {"tokens": {}}
+        for name, items in sections.items():
+            text, used = self.select(items, budgets[name])
+            result[name] = text
+            result["tokens"][name] = used
+        return result
+
+    @staticmethod
+    def _cost(items: List[Item]) -> int:
+        return sum(estimate_tokens(text) + 1 for _, _, text in items)
+
+    def allocate(self, needs: Dict[str, int], weights: Dict[str, float]) -> Dict[str, int]:
+        """Split max_tokens by weight, giving unneeded shares to the others"""
+        budgets = {name: 0 for name in needs}
+        remaining = self.max_tokens
+        active = {name for name, need in needs.items() if need > 0}
+        while active:
+            total_weight = sum(weights[name] for name in active)
+            shares = {name: remaining * weights[name] / total_weight for name in active}
+            satisfied = {name for name in active if needs[name] <= shares[name]}
+            if not satisfied:
+                for name in active:
+                    budgets[name] = int(shares[name])
+                break
+            for name in satisfied:
+                budgets[name] = needs[name]
+                remaining -= needs[name]
+            active -= satisfied
+        return budgets
+
+    @staticmethod
+    def select(items: List[Item], budget: int) -> Tuple[str, int]:
+        """Take the highest priority items that fit, rendered in original order"""
+        chosen: List[Tuple[int, str]] = []
+        used = 0
+        for _, position, text in sorted(items, key=lambda item: (-item[0], item[1])):
+            tokens = estimate_tokens(text) + 1
+            if used + tokens <= budget:
+                chosen.append((position, text))
+                used += tokens
+        if not chosen and items and budget > 0:
+            # Nothing fits whole: show the most important item cut down
+            _, position, text = max(items, key=lambda item: (item[0], -item[1]))
+            text = truncate_to_tokens(text, budget)
+            chosen.append((position, text))
+            used = estimate_tokens(text)
+
+        if not items:
+            return "(none provided)", 0
+        lines = [text for _, text in sorted(chosen)]
+        if len(chosen) < len(items):
+            lines.append(f"[{len(items) - len(chosen)} lower priority entries omitted]")
+        return "\n".join(lines), used
+
+    @staticmethod
+    def _line_priority(line: str) -> float:
+        if ERROR_PATTERN.search(line):
+            return 3.0
+        if WARNING_PATTERN.search(line):
+            return 2.0
+        return 1.0
+
+    def log_items(self, logs: str) -> List[Item]:
+        """One item per log template, showing a sample line and its count"""
+        if not logs.strip():
+            return []
+        miner = LogTemplateMiner().add_text(logs)
+        return [
+            (
+                self._line_priority(cluster.sample),
+                cluster.cluster_id,
+                cluster.sample if cluster.count == 1 else f"[{cluster.count}x] {cluster.sample}"
+            )
+            for cluster in miner.clusters
+        ]
+
+    def metric_items(self, metrics: str) -> List[Item]:
+        """One item per metric line, ranked by anomaly within its series
+
+        Anomalous samples get priority 3 + z and their neighbours in the
+        series slightly less; the latest sample of each series is kept
+        ahead of ordinary ones so every series shows a current value.
+        """
+        lines = [line.strip() for line in metrics.splitlines() if line.strip()]
+        series: Dict[str, List[Tuple[int, float]]] = {}
+        priorities = [0.0] * len(lines)
+        for position, line in enumerate(lines):
+            numbers = NUMBER_PATTERN.findall(TIMESTAMP_PATTERN.sub("", line))
+            if numbers:
+                series.setdefault(log_template(line), []).append((position, float(numbers[-1])))
+            else:
+                priorities[position] = 1.0
+
+        for samples in series.values():
+            values = [value for _, value in samples]
+            mean = statistics.fmean(values)
+            stdev = statistics.pstdev(values) if len(values) >= 3 else 0.0
+            for index, (position, value) in enumerate(samples):
+                z = abs(value - mean) / stdev if stdev else 0.0
+                if z >= ANOMALY_Z:
+                    priorities[position] = max(priorities[position], 3.0 + z)
+                    for neighbour in (index - 1, index + 1):
+                        if 0 <= neighbour < len(samples):
+                            neighbour_position = samples[neighbour][0]
+                            priorities[neighbour_position] = max(priorities[neighbour_position], 2.5 + z / 2)
+                else:
+                    priorities[position] = max(priorities[position], z / ANOMALY_Z)
+            last_position = samples[-1][0]
+            priorities[last_position] = max(priorities[last_position], 1.5)
+
+        return [(priorities[position], position, line) for position, line in enumerate(lines)]
+
+    def trace_items(self, traces: str) -> List[Item]:
+        """One item per span, errors first, then slow spans by duration"""
+        if not traces.strip():
+            return []
+        spans = parse_spans(traces)
+        if spans is None:
+            return self.log_items(traces)
+
+        items = []
+        for position, span in enumerate(spans):
+            duration = span.get("duration_ms") or 0
+            duration = duration if isinstance(duration, (int, float)) else 0
+            if span.get("status") == "error" or span.get("error"):
+                priority = 3.0
+            elif duration > SLOW_SPAN_MS:
+                priority = 2.0 + min(duration / SLOW_SPAN_MS, 100) / 100
+            else:
+                priority = 1.0 + min(duration / SLOW_SPAN_MS, 1) / 2
+            items.append((priority, position, json.dumps(span, default=str, separators=(",", ":"))))
+        return items
+
+    def case_items(self, similar_cases: List[Dict[str, Any]]) -> List[Item]:
+        """One item per similar case, its stored summary when there is one"""
+        items = []
+        for position, case in enumerate(similar_cases[:3]):
+            text = (case.get("metadata") or {}).get("summary") or case.get("summary") or case.get("document", "")
+            if not text:
+                continue
+            score = case.get("similarity_score") or 0.0
+            header = f"Case {position + 1} (Similarity: {score:.2f}):\n"
+            items.append((score, position, header + truncate_to_tokens(text, self.case_tokens) + "\n"))
+        return items
@@ -1,47 +1,127 @@
-from typing import List, Dict, Any, Optional
-from database.chroma_db import ChromaDBManager
+from typing import List, Dict, Any, Optional, Awaitable, Iterable, Iterator, BinaryIO
+from database.chroma_db import ChromaDBManager, BatchCallback
 from services.llm_service import LLMService
+from utils.stream_parsers import iter_upload_records
+from datetime import datetime
+import asyncio
 import json
 
 class RAGService:
     """Service for Retrieval-Augmented Generation functionality"""
     
-    def __init__(self, chroma_manager: ChromaDBManager):
+    def __init__(self, chroma_manager: ChromaDBManager, stage_timeout: float = 60.0,
+                 llm_service: Optional[LLMService] = None):
         self.chroma_manager = chroma_manager
-        self.llm_service = LLMService()
+        self.llm_service = llm_service or LLMService()
+        # Upper bound for each independent context-gathering stage
+        self.stage_timeout = stage_timeout
+        # Case summaries are computed once, off the request path, by a
+        # background worker draining this queue
+        self._summary_queue: Optional[asyncio.Queue] = None
+        self._summary_worker: Optional[asyncio.Task] = None
+        self._pending_summaries = set()
         
     async def initialize(self):
         """Initialize the RAG service"""
         await self.llm_service.ensure_model_available()
+        await self.seed_keyword_corpus()
         print("RAG Service initialized successfully")
     
+    async def seed_keyword_corpus(self):
+        """Seed the keyword IDF statistics in a thread; reading and tokenizing cases blocks"""
+        await asyncio.to_thread(self._seed_keyword_corpus)
+    
+    def _seed_keyword_corpus(self, limit: int = 1000):
+        """Seed local keyword IDF statistics from stored historical cases"""
+        collection = self.chroma_manager.collections.get("historical_cases")
+        if collection is None:
+            return
+        try:
+            stored = collection.get(limit=limit, include=["documents"])
+            self.llm_service.keyword_extractor.fit(stored["documents"] or [])
+        except Exception as e:
+            print(f"Error seeding keyword corpus: {e}")
+    
     async def store_observability_data(self, logs: str, metrics: str, traces: str, metadata: Dict[str, Any] = None):
         """Store observability data in ChromaDB"""
+        self.llm_service.keyword_extractor.fit([logs, metrics, traces])
         return await self.chroma_manager.store_observability_data(logs, metrics, traces, metadata)
     
     async def store_rca_result(self, analysis_id: str, rca_result: str, original_data: Any = None):
         """Store RCA result in ChromaDB"""
-        await self.chroma_manager.store_rca_result(analysis_id, rca_result, original_data)
+        self.llm_service.keyword_extractor.add_document(rca_result)
+        case_id = await self.chroma_manager.store_rca_result(analysis_id, rca_result, original_data)
+        
+        if case_id and len(rca_result) > 500:
+            self.enqueue_case_summary(case_id, rca_result)
     
-    async def search_similar_cases(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def enqueue_case_summary(self, case_id: str, document: str):
+        """Schedule a historical case for background summarization"""
+        if case_id in self._pending_summaries:
+            return
+        
+        if self._summary_queue is None:
+            self._summary_queue = asyncio.Queue()
+        if self._summary_worker is None or self._summary_worker.done():
+            self._summary_worker = asyncio.get_running_loop().create_task(self._run_summary_worker())
+        
+        self._pending_summaries.add(case_id)
+        self._summary_queue.put_nowait((case_id, document))
+    
+    async def _run_summary_worker(self):
+        """Summarize queued cases and persist the summaries in case metadata"""
+        while True:
+            case_id, document = await self._summary_queue.get()
+            try:
+                summary = await self.llm_service.summarize_case(document)
+                await self.chroma_manager.update_case_metadata(case_id, {
+                    "summary": summary,
+                    "summarized_at": datetime.now().isoformat()
+                })
+            except Exception as e:
+                print(f"Error summarizing case {case_id}: {e}")
+            finally:
+                self._pending_summaries.discard(case_id)
+                self._summary_queue.task_done()
+    
+    async def backfill_case_summaries(self, wait: bool = False, batch_size: int = 100) -> int:
+        """Queue summaries for stored historical cases that do not have one yet"""
+        queued = 0
+        async for case_id, document in self.chroma_manager.iter_cases_without_summary(batch_size):
+            if document and len(document) > 500:
+                self.enqueue_case_summary(case_id, document)
+                queued += 1
+        
+        if wait and self._summary_queue is not None:
+            await self._summary_queue.join()
+        
+        return queued
+    
+    async def search_similar_cases(self, query: str, limit: int = 5, keywords: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Search for similar historical cases using vector similarity"""
         try:
-            # Extract keywords from query for better search
-            keywords = await self.llm_service.extract_keywords(query)
-            enhanced_query = f"{query} {' '.join(keywords)}"
+            enhanced_query = query
+            # Hybrid search matches exact tokens itself; pure vector search
+            # needs the query padded with keywords
+            if not self.hybrid_search:
+                if keywords is None:
+                    keywords = await self.llm_service.extract_keywords(query)
+                enhanced_query = f"{query} {' '.join(keywords)}"
             
             # Search in historical cases
             similar_cases = await self.chroma_manager.search_similar_cases(enhanced_query, limit)
             
-            # Enhance results with summaries if needed
+            # Serve precomputed summaries; long cases stored before summaries
+            # existed are queued for the background worker instead of
+            # being summarized inline
             enhanced_cases = []
             for case in similar_cases:
                 if case.get("document"):
-                    # Extract RCA summary if document is long
-                    doc = case["document"]
-                    if len(doc) > 500:
-                        summary = await self.llm_service.summarize_case(doc)
+                    summary = (case.get("metadata") or {}).get("summary")
+                    if summary:
                         case["summary"] = summary
+                    elif len(case["document"]) > 500 and case.get("id"):
+                        self.enqueue_case_summary(case["id"], case["document"])
                     
                     enhanced_cases.append(case)
             
@@ -51,38 +131,109 @@ class RAGService:
             print(f"Error searching similar cases: {e}")
             return []
     
+    async def search_observability(self, query: str, limit: int = 5,
+                                   data_types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Search stored logs, metrics and traces, aggregated to their analyses"""
+        return await self.chroma_manager.search_observability(query, n_results=limit, data_types=data_types)
+    
+    @property
+    def hybrid_search(self) -> bool:
+        """Whether case search fuses BM25 with vector similarity"""
+        manager = self.chroma_manager
+        return manager.lexical_index is not None and "historical_cases" in manager.lexical_collections
+    
     async def get_relevant_context(self, logs: str, metrics: str, traces: str) -> Dict[str, Any]:
         """Get relevant historical context for current observability data"""
         try:
             # Combine all data for context search
             combined_data = f"Logs: {logs[:500]} Metrics: {metrics[:500]} Traces: {traces[:500]}"
             
-            # Search for similar cases
-            similar_cases = await self.search_similar_cases(combined_data, limit=3)
-            
-            # Extract relevant patterns from logs
-            log_keywords = await self.llm_service.extract_keywords(logs)
-            metric_keywords = await self.llm_service.extract_keywords(metrics)
-            trace_keywords = await self.llm_service.extract_keywords(traces)
+            # One batched LLM call extracts keywords for the query and every
+            # signal, instead of one generation per input
+            texts = {"logs": logs, "metrics": metrics, "traces": traces}
+            if self.hybrid_search:
+                # Hybrid search ranks the raw text, so both stages run at once
+                (keywords, keywords_ok), (similar_cases, cases_ok) = await asyncio.gather(
+                    self._run_stage("keywords", self.llm_service.extract_keywords_batch(texts)),
+                    self._run_stage("similar_cases", self.search_similar_cases(combined_data, limit=3))
+                )
+                keywords = keywords or {}
+            else:
+                # Plain vector search pads the query with its keywords first
+                texts["query"] = combined_data
+                keywords, keywords_ok = await self._run_stage(
+                    "keywords",
+                    self.llm_service.extract_keywords_batch(texts)
+                )
+                keywords = keywords or {}
+                similar_cases, cases_ok = await self._run_stage(
+                    "similar_cases",
+                    self.search_similar_cases(combined_data, limit=3, keywords=keywords.get("query", []))
+                )
+            similar_cases = similar_cases or []
+            failed_stages = [name for name, ok in (("keywords", keywords_ok), ("similar_cases", cases_ok)) if not ok]
             
             return {
                 "similar_cases": similar_cases,
                 "keywords": {
-                    "logs": log_keywords,
-                    "metrics": metric_keywords, 
-                    "traces": trace_keywords
+                    name: keywords.get(name, [])
+                    for name in ("logs", "metrics", "traces")
                 },
-                "context_available": len(similar_cases) > 0
+                "context_available": len(similar_cases) > 0,
+                "failed_stages": failed_stages
             }
             
         except Exception as e:
             print(f"Error getting relevant context: {e}")
             return {"similar_cases": [], "keywords": {}, "context_available": False}
     
+    async def _run_stage(self, name: str, coro: Awaitable, timeout: Optional[float] = None):
+        """Await one context stage with a timeout, returning (result, succeeded)"""
+        timeout = timeout if timeout is not None else self.stage_timeout
+        try:
+            return await asyncio.wait_for(coro, timeout=timeout), True
+        except asyncio.TimeoutError:
+            print(f"Context stage '{name}' timed out after {timeout}s")
+        except Exception as e:
+            print(f"Context stage '{name}' failed: {e}")
+        return None, False
+    
     async def bulk_store_data(self, data_type: str, data: Any):
         """Bulk store data in ChromaDB"""
+        if isinstance(data, list):
+            self.llm_service.keyword_extractor.fit(
+                json.dumps(item) if isinstance(item, dict) else str(item) for item in data
+            )
+        else:
+            self.llm_service.keyword_extractor.add_document(str(data))
         await self.chroma_manager.bulk_store_data(data_type, data)
     
+    async def bulk_store_records(self, data_type: str, records: Iterable[Any], batch_size: int = 100,
+                                 on_batch: Optional[BatchCallback] = None,
+                                 continue_on_error: bool = False, dedup: str = "exact",
+                                 metadata_fields: Optional[List[str]] = None) -> int:
+        """Stream records into ChromaDB in batches, returning how many were stored"""
+        return await self.chroma_manager.bulk_store_records(
+            data_type, self._track_keyword_corpus(records), batch_size,
+            on_batch=on_batch, continue_on_error=continue_on_error, dedup=dedup,
+            metadata_fields=metadata_fields
+        )
+    
+    async def bulk_store_file(self, data_type: str, filename: str, fileobj: BinaryIO,
+                              columns: Optional[List[str]] = None, batch_size: int = 100,
+                              dedup: str = "exact", metadata_fields: Optional[List[str]] = None) -> int:
+        """Stream a JSON, NDJSON, CSV, XLSX, Parquet or text file into ChromaDB"""
+        records = iter_upload_records(filename, fileobj, columns=columns)
+        return await self.bulk_store_records(data_type, records, batch_size, dedup=dedup,
+                                             metadata_fields=metadata_fields)
+    
+    def _track_keyword_corpus(self, records: Iterable[Any]) -> Iterator[Any]:
+        """Feed records to the keyword IDF statistics as they stream past"""
+        extractor = self.llm_service.keyword_extractor
+        for item in records:
+            extractor.add_document(json.dumps(item, default=str) if isinstance(item, dict) else str(item))
+            yield item
+    
     async def enhance_query_with_context(self, query: str, context_limit: int = 3) -> str:
         """Enhance a search query with relevant historical context"""
         try:
@@ -116,57 +267,11 @@ class RAGService:
         """Get database statistics"""
         return await self.chroma_manager.get_collection_stats()
     
-    async def search_by_metadata(self, metadata_filters: Dict[str, Any], limit: int = 10) -> List[Dict[str, Any]]:
-        """Search cases by metadata filters"""
+    async def search_by_metadata(self, metadata_filters: Dict[str, Any], limit: int = 10,
+                                 offset: int = 0) -> List[Dict[str, Any]]:
+        """Search cases by metadata filters, a page at a time"""
         try:
-            results = []
-            
-            # Search across different collections
-            for collection_name, collection in self.chroma_manager.collections.items():
-                try:
-                    # ChromaDB doesn't support complex metadata filtering in query
-                    # So we'll get all results and filter in memory
-                    all_results = collection.get(
-                        include=["documents", "metadatas"]
-                    )
-                    
-                    if all_results["documents"] and all_results["metadatas"]:
-                        for i, doc in enumerate(all_results["documents"]):
-                            metadata = all_results["metadatas"][i]
-                            
-                            # Check if metadata matches filters
-                            match = True
-                            for key, value in metadata_filters.items():
-                                if key in metadata:
-                                    if isinstance(value, str):
-                                        if value.lower() not in str(metadata[key]).lower():
-                                            match = False
-                                            break
-                                    elif metadata[key] != value:
-                                        match = False
-                                        break
-                                else:
-                                    match = False
-                                    break
-                            
-                            if match:
-                                results.append({
-                                    "document": doc,
-                                    "metadata": metadata,
-                                    "collection": collection_name
-                                })
-                                
-                                if len(results) >= limit:
-                                    break
-                    
-                    if len(results) >= limit:
-                        break
-                        
-                except Exception as e:
-                    print(f"Error searching collection {collection_name}: {e}")
-                    continue
-            
-            return results[:limit]
+            return await self.chroma_manager.search_by_metadata(metadata_filters, limit=limit, offset=offset)
             
         except Exception as e:
             print(f"Error in metadata search: {e}")
@@ -0,0 +1,188 @@
+"""
+Observability Chunking
+======================
+
+Splits large log, metric and trace blobs into bounded chunks before they
+are embedded, since the embedding model only sees the start of a long
+text. Chunk boundaries follow the structure of each signal:
+
+* logs are split between records, keeping continuation lines such as
+  stack traces with the line they belong to;
+* traces are split between spans, grouped by trace id;
+* metrics are grouped by series (the line with its values templated out),
+  so each chunk holds whole series where possible.
+
+Consecutive chunks share up to overlap_chars of trailing units, so context
+spanning a boundary is found from either side.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.dedup import log_template
+
+# MiniLM embeds at most 256 word pieces, roughly this many characters
+DEFAULT_CHUNK_CHARS = 1000
+DEFAULT_OVERLAP_CHARS = 150
+
+# A chunk: its text and the metadata describing what it covers
+Chunk = Tuple[str, Dict[str, Any]]
+
+def _is_continuation(line: str) -> bool:
+    """Lines that continue the previous log record (stack frames, wrapped text)"""
+    stripped = line.lstrip()
+    return bool(stripped) and (
+        line[0] in " \t" or stripped.startswith(("at ", "Caused by", "...", "File \""))
+    )
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Split one oversized unit, preferring whitespace boundaries"""
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind(" ", max_chars // 2, max_chars)
+        cut = cut if cut > 0 else max_chars
+        pieces.append(text[:cut])
+        text = text[cut:].lstrip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+def _pack(units: List[Tuple[str, Any]], max_chars: int, overlap_chars: int,
+          overlap_same_tag: bool = False) -> List[Tuple[str, List[Any]]]:
+    """Greedily pack (text, tag) units into chunks of at most max_chars
+
+    Returns (text, tags) per chunk. Trailing units of a chunk, up to
+    overlap_chars, are repeated at the start of the next one; with
+    overlap_same_tag, only if they share the next unit's tag.
+    """
+    expanded = []
+    for text, tag in units:
+        if len(text) > max_chars:
+            expanded.extend((piece, tag) for piece in _split_long(text, max_chars))
+        else:
+            expanded.append((text, tag))
+
+    chunks = []
+    current: List[Tuple[str, Any]] = []
+    size = 0
+    fresh = 0  # Units in current that are not overlap from the previous chunk
+    for text, tag in expanded:
+        if current and size + len(text) + 1 > max_chars:
+            chunks.append(("\n".join(t for t, _ in current), [g for _, g in current]))
+            carried: List[Tuple[str, Any]] = []
+            carried_size = 0
+            for unit in reversed(current):
+                if overlap_same_tag and unit[1] != tag:
+                    break
+                if carried_size + len(unit[0]) + 1 > overlap_chars or \
+                        carried_size + len(unit[0]) + len(text) + 2 > max_chars:
+                    break
+                carried.insert(0, unit)
+                carried_size += len(unit[0]) + 1
+            current, size = carried, carried_size
+            fresh = 0
+        current.append((text, tag))
+        size += len(text) + 1
+        fresh += 1
+    if current and fresh:
+        chunks.append(("\n".join(t for t, _ in current), [g for _, g in current]))
+    return chunks
+
+def chunk_logs(text: str, max_chars: int = DEFAULT_CHUNK_CHARS,
+               overlap_chars: int = DEFAULT_OVERLAP_CHARS) -> List[Chunk]:
+    """Chunk log text between records; metadata holds the line range"""
+    # (record text, (first line, last line))
+    records: List[Tuple[str, Tuple[int, int]]] = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        if records and _is_continuation(line):
+            previous, (start, _) = records[-1]
+            records[-1] = (previous + "\n" + line, (start, number))
+        else:
+            records.append((line, (number, number)))
+
+    return [
+        (chunk_text, {"start_line": lines[0][0], "end_line": lines[-1][1]})
+        for chunk_text, lines in _pack(records, max_chars, overlap_chars)
+    ]
+
+def parse_spans(text: str) -> Optional[List[Dict[str, Any]]]:
+    """Spans from a JSON trace export ({"spans": [...]}, a list, or NDJSON)"""
+    stripped = text.strip()
+    try:
+        parsed = json.loads(stripped)
+    except json.JSONDecodeError:
+        try:
+            parsed = [json.loads(line) for line in stripped.splitlines() if line.strip()]
+        except json.JSONDecodeError:
+            return None
+    if isinstance(parsed, dict):
+        parsed = parsed.get("spans")
+    if not isinstance(parsed, list) or not all(isinstance(span, dict) for span in parsed):
+        return None
+    return parsed
+
+def _trace_id(span: Dict[str, Any]) -> str:
+    for key in ("trace_id", "traceId", "traceID"):
+        if span.get(key):
+            return str(span[key])
+    return ""
+
+def chunk_traces(text: str, max_chars: int = DEFAULT_CHUNK_CHARS,
+                 overlap_chars: int = DEFAULT_OVERLAP_CHARS) -> List[Chunk]:
+    """Chunk traces between spans, keeping each trace's spans together
+
+    Text that is not a JSON span export is chunked like logs.
+    """
+    spans = parse_spans(text)
+    if spans is None:
+        return chunk_logs(text, max_chars, overlap_chars)
+
+    by_trace: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        by_trace.setdefault(_trace_id(span), []).append(span)
+    units = [
+        (json.dumps(span, default=str, separators=(",", ":")), trace_id)
+        for trace_id, trace_spans in by_trace.items() for span in trace_spans
+    ]
+
+    chunks = []
+    for chunk_text, trace_ids in _pack(units, max_chars, overlap_chars, overlap_same_tag=True):
+        span_count = len(trace_ids)
+        trace_ids = list(dict.fromkeys(trace_id for trace_id in trace_ids if trace_id))
+        chunks.append((chunk_text, {"span_count": span_count, "trace_ids": ",".join(trace_ids)}))
+    return chunks
+
+def chunk_metrics(text: str, max_chars: int = DEFAULT_CHUNK_CHARS,
+                  overlap_chars: int = DEFAULT_OVERLAP_CHARS) -> List[Chunk]:
+    """Chunk metrics by series, so samples of one series stay together
+
+    A series is identified by the line with timestamps and numbers
+    templated out, e.g. "<ts> cpu_usage: <num>%".
+    """
+    series: Dict[str, List[str]] = {}
+    for line in text.splitlines():
+        if line.strip():
+            series.setdefault(log_template(line), []).append(line.strip())
+
+    units = [(line, key) for key, lines in series.items() for line in lines]
+    chunks = []
+    # Overlap only continues a series; a chunk never opens with the tail
+    # of an unrelated one
+    for chunk_text, keys in _pack(units, max_chars, overlap_chars, overlap_same_tag=True):
+        names = list(dict.fromkeys(keys))
+        chunks.append((chunk_text, {"series_count": len(names), "series": " | ".join(names)[:500]}))
+    return chunks
+
+CHUNKERS = {
+    "logs": chunk_logs,
+    "traces": chunk_traces,
+    "metrics": chunk_metrics
+}
+
+def chunk_observability(data_type: str, text: str, max_chars: int = DEFAULT_CHUNK_CHARS,
+                        overlap_chars: int = DEFAULT_OVERLAP_CHARS) -> List[Chunk]:
+    """Chunk a logs, metrics or traces blob; other types are chunked like logs"""
+    chunker = CHUNKERS.get(data_type, chunk_logs)
+    return chunker(text, max_chars, overlap_chars)
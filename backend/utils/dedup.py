@@ -0,0 +1,107 @@
+"""
+Content Deduplication
+=====================
+
+Content-addressed document ids and SimHash near-duplicate detection for
+ingest. Exact duplicates share an id, so storing them again is an upsert.
+Near duplicates are lines or records that differ only in variable parts
+(timestamps, numbers, ids); they are reduced to a template first, and
+templates whose SimHash fingerprints are within a few bits of each other
+are treated as the same document.
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+
+from utils.helpers import create_hash
+
+DEDUP_MODES = ("none", "exact", "near")
+
+# Variable parts of log lines, replaced by placeholders in templates
+TEMPLATE_PATTERNS = [
+    (re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'), '<ts>'),
+    (re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.IGNORECASE), '<uuid>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'), '<ip>'),
+    (re.compile(r'\b0x[0-9a-f]+\b|\b[0-9a-f]{12,}\b', re.IGNORECASE), '<hex>'),
+    # Numbers, including ones with a unit suffix like 250ms, but not digits inside names
+    (re.compile(r'(?<![A-Za-z_])\d+(?:\.\d+)?'), '<num>'),
+]
+
+WORD_PATTERN = re.compile(r'\S+')
+
+FINGERPRINT_BITS = 64
+# Fingerprints within this many differing bits are near duplicates. With
+# MAX_DISTANCE + 1 bands, two such fingerprints always share a whole band.
+MAX_DISTANCE = 3
+BAND_BITS = FINGERPRINT_BITS // (MAX_DISTANCE + 1)
+
+def normalize_document(text: str) -> str:
+    """Collapse whitespace so formatting differences don't change the id"""
+    return " ".join(text.split())
+
+def content_id(data_type: str, text: str) -> str:
+    """Deterministic document id from the data type and normalized content"""
+    return f"{data_type}_{create_hash(data_type + chr(0) + normalize_document(text))}"
+
+def log_template(text: str) -> str:
+    """Replace timestamps, ids, addresses and numbers with placeholders"""
+    text = normalize_document(text)
+    for pattern, placeholder in TEMPLATE_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of the word shingles of a template"""
+    words = WORD_PATTERN.findall(text)
+    features = [" ".join(words[i:i + 2]) for i in range(max(len(words) - 1, 1))] if words else [""]
+    weights = [0] * FINGERPRINT_BITS
+    for feature in features:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if digest >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class SimHashIndex:
+    """In-memory index of fingerprints for near-duplicate lookups
+
+    Fingerprints are bucketed by each of their bands, so a lookup only
+    compares against candidates sharing at least one band.
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._bands: Dict[Tuple[int, int], List[int]] = {}
+        # fingerprint -> (document id, occurrence count)
+        self.documents: Dict[int, Tuple[str, int]] = {}
+
+    @staticmethod
+    def _band_keys(fingerprint: int):
+        mask = (1 << BAND_BITS) - 1
+        return [(band, fingerprint >> (band * BAND_BITS) & mask) for band in range(MAX_DISTANCE + 1)]
+
+    def find(self, fingerprint: int) -> Optional[int]:
+        """Return a stored fingerprint within max_distance bits, if any"""
+        if fingerprint in self.documents:
+            return fingerprint
+        for band_key in self._band_keys(fingerprint):
+            for candidate in self._bands.get(band_key, ()):
+                if hamming_distance(candidate, fingerprint) <= self.max_distance:
+                    return candidate
+        return None
+
+    def add(self, fingerprint: int, document_id: str, count: int = 1):
+        if fingerprint not in self.documents:
+            for band_key in self._band_keys(fingerprint):
+                self._bands.setdefault(band_key, []).append(fingerprint)
+        self.documents[fingerprint] = (document_id, count)
+
+    def __len__(self):
+        return len(self.documents)
@@ -0,0 +1,56 @@
+"""
+Export Writers
+==============
+
+Serializers for collection exports. Both consume an async iterator of
+record pages and write one page at a time, so memory use is bounded by
+the page size rather than the size of the collection.
+"""
+
+import json
+from typing import Any, AsyncIterator, BinaryIO, Dict, List
+
+RecordPages = AsyncIterator[List[Dict[str, Any]]]
+
+async def iter_ndjson(pages: RecordPages) -> AsyncIterator[bytes]:
+    """Yield one encoded JSON line per record"""
+    async for records in pages:
+        if records:
+            yield "".join(json.dumps(record, default=str) + "\n" for record in records).encode("utf-8")
+
+async def write_parquet(pages: RecordPages, fileobj: BinaryIO, include_embeddings: bool = False) -> int:
+    """Write records to Parquet, one row group per page; returns the row count
+
+    Metadata is stored as a JSON string column, since its keys differ
+    between records.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow. Install with: pip install pyarrow")
+
+    fields = [
+        pa.field("id", pa.string()),
+        pa.field("document", pa.string()),
+        pa.field("metadata", pa.string())
+    ]
+    if include_embeddings:
+        fields.append(pa.field("embedding", pa.list_(pa.float32())))
+    schema = pa.schema(fields)
+
+    rows = 0
+    with pq.ParquetWriter(fileobj, schema, compression="zstd") as writer:
+        async for records in pages:
+            if not records:
+                continue
+            columns = {
+                "id": [record["id"] for record in records],
+                "document": [record["document"] for record in records],
+                "metadata": [json.dumps(record["metadata"], default=str) for record in records]
+            }
+            if include_embeddings:
+                columns["embedding"] = [record["embedding"] for record in records]
+            writer.write_table(pa.table(columns, schema=schema))
+            rows += len(records)
+    return rows
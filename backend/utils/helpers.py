@@ -40,54 +40,16 @@ def sanitize_text(text: str, max_length: int = 10000) -> str:
     
     return text
 
-def extract_error_patterns(log_text: str) -> List[Dict[str, Any]]:
-    """Extract common error patterns from log text"""
-    patterns = [
-        {
-            'name': 'HTTP_ERROR',
-            'pattern': r'HTTP (\d{3})',
-            'description': 'HTTP status codes'
-        },
-        {
-            'name': 'EXCEPTION',
-            'pattern': r'(Exception|Error|Failed|Timeout)',
-            'description': 'General exceptions and errors'
-        },
-        {
-            'name': 'DATABASE_ERROR',
-            'pattern': r'(database|sql|connection|query).*?(error|failed|timeout)',
-            'description': 'Database related errors'
-        },
-        {
-            'name': 'NETWORK_ERROR',
-            'pattern': r'(network|connection|socket).*?(error|failed|refused|timeout)',
-            'description': 'Network connectivity issues'
-        },
-        {
-            'name': 'MEMORY_ERROR',
-            'pattern': r'(memory|heap|oom|out of memory)',
-            'description': 'Memory related issues'
-        },
-        {
-            'name': 'DISK_ERROR',
-            'pattern': r'(disk|storage|filesystem).*?(full|error|failed)',
-            'description': 'Disk and storage issues'
-        }
-    ]
-    
-    found_patterns = []
-    
-    for pattern_info in patterns:
-        matches = re.findall(pattern_info['pattern'], log_text, re.IGNORECASE)
-        if matches:
-            found_patterns.append({
-                'pattern_name': pattern_info['name'],
-                'description': pattern_info['description'],
-                'matches': matches,
-                'count': len(matches)
-            })
-    
-    return found_patterns
+def extract_error_patterns(log_text: str, patterns: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Extract common error patterns from log text
+
+    patterns replaces the default pack; see utils.pattern_scanner for the format.
+    """
+    # Imported here so importing helpers stays cheap
+    from utils.pattern_scanner import PatternScanner, default_scanner
+
+    scanner = PatternScanner(patterns) if patterns else default_scanner()
+    return scanner.scan_text(log_text)
 
 def calculate_similarity(text1: str, text2: str) -> float:
     """Calculate simple similarity score between two texts"""
@@ -114,7 +76,16 @@ def generate_analysis_id() -> str:
     return f"RCA_{timestamp}_{random_part}"
 
 def extract_metrics_summary(metrics_text: str) -> Dict[str, Any]:
-    """Extract summary statistics from metrics text"""
+    """Extract summary statistics from metrics text
+
+    Common metrics are read from "cpu usage: 85%" style text, or else from
+    series with a matching name; 'series' holds the statistics of every
+    series found, see utils.metrics_engine.
+    """
+    # numpy and pandas are only loaded once metrics are summarized
+    import numpy as np
+    from utils.metrics_engine import MetricsEngine, parse_free_text
+
     summary = {
         'cpu_usage': [],
         'memory_usage': [],
@@ -126,24 +97,34 @@ def extract_metrics_summary(metrics_text: str) -> Dict[str, Any]:
     
     # Look for common metric patterns
     patterns = {
-        'cpu': r'cpu[_\s]*usage?[:\s]*(\d+\.?\d*)%?',
-        'memory': r'memory[_\s]*usage?[:\s]*(\d+\.?\d*)%?',
-        'disk': r'disk[_\s]*io[:\s]*(\d+\.?\d*)',
-        'network': r'network[_\s]*io[:\s]*(\d+\.?\d*)',
-        'error': r'error[_\s]*rate[:\s]*(\d+\.?\d*)%?',
-        'response': r'response[_\s]*time[:\s]*(\d+\.?\d*)'
+        'cpu': r'cpu[_\s]*usage?',
+        'memory': r'memory[_\s]*usage?',
+        'disk': r'disk[_\s]*io',
+        'network': r'network[_\s]*io',
+        'error': r'error[_\s]*rate',
+        'response': r'response[_\s]*time'
     }
     
+    try:
+        engine = MetricsEngine().add_text(metrics_text)
+    except Exception as e:
+        # Malformed CSV or JSON: fall back to "name: value" pairs
+        print(f"Could not parse metrics, reading name/value pairs instead: {e}")
+        engine = MetricsEngine().add_batches(parse_free_text(metrics_text))
     for metric_type, pattern in patterns.items():
-        matches = re.findall(pattern, metrics_text, re.IGNORECASE)
+        matches = re.findall(pattern + r'[: \t]*(\d+\.?\d*)%?', metrics_text, re.IGNORECASE)
         if matches:
-            values = [float(m) for m in matches if m.replace('.', '').isdigit()]
-            if values:
-                summary[f'{metric_type}_values'] = values
-                summary[f'{metric_type}_avg'] = sum(values) / len(values)
-                summary[f'{metric_type}_max'] = max(values)
-                summary[f'{metric_type}_min'] = min(values)
+            values = np.array(matches, dtype=np.float64)
+        else:
+            series = [s.samples()[0] for key, s in engine.series.items() if re.search(pattern, key, re.IGNORECASE)]
+            values = np.concatenate(series) if series else np.empty(0)
+        if len(values):
+            summary[f'{metric_type}_values'] = values.tolist()
+            summary[f'{metric_type}_avg'] = float(values.mean())
+            summary[f'{metric_type}_max'] = float(values.max())
+            summary[f'{metric_type}_min'] = float(values.min())
     
+    summary['series'] = engine.summary()
     return summary
 
 def extract_trace_summary(trace_text: str) -> Dict[str, Any]:
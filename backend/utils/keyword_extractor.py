@@ -0,0 +1,149 @@
+"""
+Keyword Extraction
+==================
+
+Deterministic, LLM-free keyword extraction for observability text. Tokens
+are scored with TF-IDF against the stored corpus, and structured entities
+(HTTP status codes, exception class names, service names, hostnames) are
+always ranked first.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from utils.helpers import clean_log_entry, extract_error_patterns, parse_key_value_pairs
+
+# Identifiers as they appear in logs: dotted/dashed names, snake_case, CamelCase
+TOKEN_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*(?:[.\-:][A-Za-z0-9_]+)*')
+
+EXCEPTION_PATTERN = re.compile(r'\b(?:[a-z_][\w]*\.)*([A-Z]\w*(?:Exception|Error|Fault|Timeout))\b')
+HOSTNAME_PATTERN = re.compile(r'\b((?:[a-z0-9](?:[a-z0-9\-]{0,61}[a-z0-9])?\.)+[a-z]{2,}|[a-z][a-z0-9]*(?:-[a-z0-9]+)+-\d+)\b')
+COMPONENT_PATTERN = re.compile(r'\[([A-Za-z][\w.\-]{2,})\]')
+ERROR_CODE_PATTERN = re.compile(r'\b([A-Z]{1,6}[-_]?\d{2,6}|E(?:CONN\w+|ADDR\w+|HOST\w+|NET\w+|TIMEDOUT|PIPE|NOENT|ACCES|MFILE|NOMEM|NOSPC|AGAIN))\b')
+
+SERVICE_KEYS = {"service", "svc", "app", "application", "component", "host", "hostname", "pod", "node", "container"}
+
+NOISE_PATTERN = re.compile(r'^(?:[0-9a-f]{8,}|[0-9a-f\-]{32,36}|\d+(?:[.:]\d+)*|[tz]?\d+[a-z]{0,2})$', re.IGNORECASE)
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his how
+i if in into is it its itself just me more most my no nor not now of off on once only or other our out over own same
+she should so some such than that the their them then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your
+info debug trace warn warning notice log logs message msg level line value values data time timestamp
+true false null none nan ms sec secs seconds utc gmt jan feb mar apr may jun jul aug sep oct nov dec
+mon tue wed thu fri sat sun metrics traces span spans id ids
+""".split())
+
+class KeywordExtractor:
+    """TF-IDF keyword extractor tuned for log, metric and trace text"""
+
+    def __init__(self, max_keywords: int = 20, max_chars: int = 20000, max_terms: int = 100_000):
+        self.max_keywords = max_keywords
+        # Extraction only needs a representative prefix of very large blobs
+        self.max_chars = max_chars
+        # Vocabulary bound: streamed corpora are full of one-off ids and
+        # hostnames, so once twice this many terms are tracked only the
+        # max_terms most frequent are kept
+        self.max_terms = max_terms
+        self.document_count = 0
+        self.document_frequencies: Counter = Counter()
+        # Ingest threads add documents concurrently; requests only read
+        self._lock = threading.Lock()
+
+    def tokenize(self, text: str) -> List[str]:
+        """Split text into lowercase candidate terms, dropping noise and stopwords"""
+        tokens = []
+        for token in TOKEN_PATTERN.findall(text):
+            token = token.strip('.-:').lower()
+            if len(token) <= 2 or token in STOPWORDS or NOISE_PATTERN.match(token):
+                continue
+            tokens.append(token)
+        return tokens
+
+    def add_document(self, text: str):
+        """Add a document to the corpus statistics used for IDF"""
+        if not text:
+            return
+        terms = set(self.tokenize(text[:self.max_chars]))
+        with self._lock:
+            self.document_frequencies.update(terms)
+            self.document_count += 1
+            if len(self.document_frequencies) > 2 * self.max_terms:
+                self._prune()
+
+    def _prune(self):
+        """Drop all but the max_terms most frequent terms; called with the lock held
+
+        Dropped terms were rare, and an unknown term already gets the
+        highest IDF. The counter is swapped rather than edited in place so
+        requests reading it without the lock never see it half pruned.
+        """
+        self.document_frequencies = Counter(dict(self.document_frequencies.most_common(self.max_terms)))
+
+    def fit(self, documents: Iterable[str]):
+        """Add many documents to the corpus statistics"""
+        for document in documents:
+            self.add_document(document)
+
+    def idf(self, term: str) -> float:
+        """Smoothed inverse document frequency of a term"""
+        return math.log((1 + self.document_count) / (1 + self.document_frequencies.get(term, 0))) + 1
+
+    def extract_entities(self, text: str) -> List[str]:
+        """Extract structured entities: status codes, exceptions, services, hosts"""
+        entities = []
+
+        for pattern in extract_error_patterns(text):
+            if pattern['pattern_name'] == 'HTTP_ERROR':
+                entities.extend(f"http {code}" for code in pattern['matches'])
+
+        entities.extend(ERROR_CODE_PATTERN.findall(text))
+        entities.extend(EXCEPTION_PATTERN.findall(text))
+
+        for key, value in parse_key_value_pairs(text).items():
+            if key.lower() in SERVICE_KEYS:
+                entities.append(value.strip('"\''))
+
+        entities.extend(COMPONENT_PATTERN.findall(text))
+        entities.extend(HOSTNAME_PATTERN.findall(text))
+
+        return self._dedupe(entity.lower() for entity in entities)
+
+    def score_terms(self, text: str) -> Dict[str, float]:
+        """Score each term in the text by TF-IDF against the corpus"""
+        counts = Counter(self.tokenize(text))
+        if not counts:
+            return {}
+        total = sum(counts.values())
+        return {term: (count / total) * self.idf(term) for term, count in counts.items()}
+
+    def extract(self, text: str, max_keywords: Optional[int] = None) -> List[str]:
+        """Extract ranked keywords from text"""
+        max_keywords = max_keywords or self.max_keywords
+        if not text or not text.strip():
+            return []
+
+        text = clean_log_entry(text[:self.max_chars])
+
+        scores = self.score_terms(text)
+        ranked_terms = sorted(scores, key=lambda term: (-scores[term], term))
+
+        keywords = self._dedupe(self.extract_entities(text) + ranked_terms)
+        keywords = [kw for kw in keywords if len(kw) > 2]
+
+        return keywords[:max_keywords]
+
+    def _dedupe(self, items: Iterable[str]) -> List[str]:
+        """Remove duplicates while preserving order"""
+        seen = set()
+        result = []
+        for item in items:
+            if item and item not in seen:
+                seen.add(item)
+                result.append(item)
+        return result
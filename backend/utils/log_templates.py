@@ -0,0 +1,166 @@
+"""
+Log Template Mining
+===================
+
+Online Drain-style clustering of log lines into templates. Variable parts
+(timestamps, ids, addresses, numbers) are masked first; lines are then
+routed through a fixed-depth prefix tree keyed by token count and leading
+tokens, and join the most similar cluster in the leaf, whose template
+turns differing tokens into <*> parameter slots.
+
+Lines are first keyed with every digit replaced by 0, a single C-level
+translate over the whole text, and counted per key. Only keys not seen
+before are masked and routed through the tree, so a burst of one
+repeating message costs one counter increment per line.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+from utils.dedup import TEMPLATE_PATTERNS
+
+PARAM = "<*>"
+
+# Lines that only differ in their digits share a cache key
+DIGIT_KEYS = str.maketrans("123456789", "000000000")
+
+class LogCluster:
+    """A log template with its occurrence count and a sample line"""
+
+    __slots__ = ("cluster_id", "tokens", "count", "sample")
+
+    def __init__(self, cluster_id: int, tokens: List[str], sample: str):
+        self.cluster_id = cluster_id
+        self.tokens = tokens
+        self.count = 0
+        self.sample = sample
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"id": self.cluster_id, "template": self.template, "count": self.count, "sample": self.sample}
+
+def mask_text(text: str) -> str:
+    """Replace variable parts with placeholders, keeping line breaks"""
+    for pattern, placeholder in TEMPLATE_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+class LogTemplateMiner:
+    """Drain-style online log template miner
+
+    depth bounds the prefix tree: token count, then depth - 2 leading
+    tokens. Lines join a cluster when at least similarity_threshold of
+    their tokens equal the template's.
+    """
+
+    def __init__(self, depth: int = 4, similarity_threshold: float = 0.4,
+                 max_children: int = 100, max_cache: int = 100_000):
+        self.prefix_tokens = max(depth - 2, 1)
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        self.max_cache = max_cache
+        self.clusters: List[LogCluster] = []
+        self.line_count = 0
+        # token count -> nested dicts of leading tokens -> leaf cluster list
+        self._tree: Dict[int, Dict] = {}
+        # digit-normalized line -> cluster, for lines seen before
+        self._cache: Dict[str, LogCluster] = {}
+
+    def add_text(self, text: str) -> "LogTemplateMiner":
+        """Mine every non-empty line of a log blob"""
+        return self.add_lines(text.splitlines(), text.translate(DIGIT_KEYS).splitlines())
+
+    def add_lines(self, lines: List[str], keys: Optional[List[str]] = None) -> "LogTemplateMiner":
+        """Mine lines; keys, if given, are the lines translated by DIGIT_KEYS"""
+        if keys is None:
+            keys = [line.translate(DIGIT_KEYS) for line in lines]
+        # One sample line per key, and per-key counts, both built in C
+        samples = dict(zip(keys, lines))
+        for key, count in Counter(keys).items():
+            cluster = self._cache.get(key)
+            if cluster is None:
+                tokens = mask_text(samples[key]).split()
+                if not tokens:
+                    continue
+                cluster = self._match(tokens, samples[key].strip())
+                if len(self._cache) >= self.max_cache:
+                    self._cache.clear()
+                self._cache[key] = cluster
+            cluster.count += count
+            self.line_count += count
+        return self
+
+    def add_line(self, line: str) -> Optional[LogCluster]:
+        """Mine one line, returning its cluster (None for blank lines)"""
+        self.add_lines([line])
+        return self._cache.get(line.translate(DIGIT_KEYS))
+
+    def _leaf(self, tokens: List[str]) -> List[LogCluster]:
+        node = self._tree.setdefault(len(tokens), {})
+        for token in tokens[:self.prefix_tokens]:
+            # Tokens holding digits are likely parameters; don't branch on them
+            key = PARAM if any(c.isdigit() for c in token) else token
+            if key not in node:
+                if len(node) >= self.max_children:
+                    key = PARAM
+                node = node.setdefault(key, {})
+            else:
+                node = node[key]
+        return node.setdefault(None, [])
+
+    def _match(self, tokens: List[str], sample: str) -> LogCluster:
+        leaf = self._leaf(tokens)
+        best, best_similarity, best_params = None, -1.0, -1
+        for cluster in leaf:
+            same = params = 0
+            for template_token, token in zip(cluster.tokens, tokens):
+                if template_token == PARAM:
+                    params += 1
+                elif template_token == token:
+                    same += 1
+            similarity = same / len(tokens)
+            if similarity > best_similarity or (similarity == best_similarity and params > best_params):
+                best, best_similarity, best_params = cluster, similarity, params
+
+        if best is not None and best_similarity >= self.similarity_threshold:
+            best.tokens = [t if t == token else PARAM for t, token in zip(best.tokens, tokens)]
+            return best
+
+        cluster = LogCluster(len(self.clusters), list(tokens), sample)
+        self.clusters.append(cluster)
+        leaf.append(cluster)
+        return cluster
+
+    def top(self, limit: Optional[int] = None) -> List[LogCluster]:
+        """Clusters by descending count"""
+        ranked = sorted(self.clusters, key=lambda cluster: -cluster.count)
+        return ranked[:limit] if limit is not None else ranked
+
+    def histogram(self, max_chars: Optional[int] = None, max_templates: Optional[int] = None) -> str:
+        """Compact "count x template" listing, most frequent first
+
+        Stops before max_chars, noting how many templates were left out.
+        """
+        lines = [f"{self.line_count} lines, {len(self.clusters)} templates"]
+        size = len(lines[0])
+        ranked = self.top(max_templates)
+        for shown, cluster in enumerate(ranked):
+            entry = f"{cluster.count}x {cluster.template}"
+            if max_chars is not None and size + len(entry) + 1 > max_chars - 40:
+                lines.append(f"... {len(self.clusters) - shown} more templates")
+                break
+            lines.append(entry)
+            size += len(entry) + 1
+        else:
+            if len(ranked) < len(self.clusters):
+                lines.append(f"... {len(self.clusters) - len(ranked)} more templates")
+        return "\n".join(lines)
+
+def summarize_logs(text: str, max_chars: int) -> str:
+    """Logs as-is when they fit in max_chars, otherwise their template histogram"""
+    if len(text) <= max_chars:
+        return text
+    return LogTemplateMiner().add_text(text).histogram(max_chars=max_chars)
@@ -0,0 +1,487 @@
+"""
+Metrics Engine
+==============
+
+Parses metrics into NumPy arrays keyed by series and computes per-series
+statistics: mean, standard deviation, min/max, p50/p95/p99, rate of change
+and z-score anomalies.
+
+Accepted formats are Prometheus exposition text, CSV (wide, one column
+per series, or long, with metric and value columns), JSON (Prometheus API
+responses, lists of samples or records, and series-to-values maps) and
+free text with "name: value" pairs.
+
+Samples are added in batches: each batch is grouped by series with one
+argsort and its count, mean, variance, min and max are merged into exact
+running totals per series. Samples themselves are kept for percentiles
+and anomalies within max_samples; past it, the largest series drop every
+other retained sample, so they keep an evenly spaced subset in time order
+plus every sample that was anomalous when it was thinned out.
+"""
+
+import csv
+import io
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_SAMPLES = 1_000_000
+BATCH_LINES = 100_000
+BLOCK_CHARS = 4 << 20
+
+# Samples this many standard deviations from their series mean are anomalous
+ANOMALY_Z = 3.0
+MAX_ANOMALIES = 5
+
+# name{labels} value [timestamp in ms]
+PROMETHEUS_SAMPLE = re.compile(
+    r'^[ \t]*([A-Za-z_:][A-Za-z0-9_:]*(?:\{[^}\n]*\})?)[ \t]+(\S+)(?:[ \t]+(-?\d+))?[ \t]*$',
+    re.MULTILINE
+)
+LABEL_WHITESPACE = re.compile(r'\{[^}\n]* ')
+# "cpu_usage: 85.2%" or "latency_ms=120" in free text
+TEXT_SAMPLE = re.compile(r'([A-Za-z_][\w.]*)\s*[:=]\s*(-?\d+(?:\.\d+)?)')
+LABEL_SPACE = re.compile(r'\s+(?=(?:[^"]*"[^"]*")*[^"]*$)')
+
+TIMESTAMP_COLUMNS = ("timestamp", "time", "ts", "date", "datetime", "@timestamp")
+METRIC_COLUMNS = ("metric", "name", "__name__", "series")
+
+# (series keys, values, timestamps in seconds or None; NaN when unknown)
+Batch = Tuple[Any, np.ndarray, Optional[np.ndarray]]
+
+def to_seconds(values: Any) -> np.ndarray:
+    """Epoch seconds for numeric or date string timestamps, NaN when unparseable
+
+    Numbers above 1e11 are taken as milliseconds, as Prometheus writes them.
+    """
+    series = pd.Series(values)
+    numeric = pd.to_numeric(series, errors="coerce")
+    seconds = numeric.to_numpy(dtype=np.float64)
+    seconds = np.where(np.abs(seconds) > 1e11, seconds / 1000.0, seconds)
+    # Only entries that aren't numbers are parsed as dates, so a missing
+    # timestamp doesn't turn epoch numbers into nanoseconds
+    dates = numeric.isna().to_numpy() & series.notna().to_numpy()
+    if dates.any():
+        parsed = pd.to_datetime(series[dates], utc=True, errors="coerce")
+        seconds[dates] = ((parsed - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)).to_numpy(
+            dtype=np.float64, na_value=np.nan)
+    return seconds
+
+class MetricSeries:
+    """Exact running statistics of one series plus its retained samples"""
+
+    __slots__ = ("key", "count", "mean", "m2", "minimum", "maximum",
+                 "first", "last", "first_time", "last_time",
+                 "stride", "seen", "_values", "_times", "_regular", "retained")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.count = 0
+        self.mean = 0.0
+        # Sum of squared deviations from the mean
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.first = self.last = np.nan
+        self.first_time = self.last_time = np.nan
+        # Only every stride-th sample is retained
+        self.stride = 1
+        self.seen = 0
+        self._values: List[np.ndarray] = []
+        self._times: List[np.ndarray] = []
+        # False for samples retained only for being anomalous
+        self._regular: List[np.ndarray] = []
+        self.retained = 0
+
+    def merge(self, values: np.ndarray, times: np.ndarray, anomaly_z: float = ANOMALY_Z):
+        """Fold in a batch of finite samples in time order"""
+        n = len(values)
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        # Chan et al.'s parallel variance update
+        total = self.count + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        if np.isnan(self.first):
+            self.first, self.first_time = float(values[0]), float(times[0])
+        self.last, self.last_time = float(values[-1]), float(times[-1])
+
+        if self.stride > 1:
+            regular = (self.seen + np.arange(n)) % self.stride == 0
+            keep = regular | self._outliers(values, anomaly_z)
+            values, times, regular = values[keep], times[keep], regular[keep]
+        else:
+            regular = np.ones(n, dtype=bool)
+        self.seen += n
+        self._values.append(values)
+        self._times.append(times)
+        self._regular.append(regular)
+        self.retained += len(values)
+
+    def samples(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Retained (values, timestamps, regular flags), consolidated into single arrays"""
+        if len(self._values) != 1:
+            self._values = [np.concatenate(self._values) if self._values else np.empty(0)]
+            self._times = [np.concatenate(self._times) if self._times else np.empty(0)]
+            self._regular = [np.concatenate(self._regular) if self._regular else np.empty(0, dtype=bool)]
+        return self._values[0], self._times[0], self._regular[0]
+
+    def _outliers(self, values: np.ndarray, anomaly_z: float) -> np.ndarray:
+        std = (self.m2 / self.count) ** 0.5
+        return np.abs(values - self.mean) >= anomaly_z * std if std else np.zeros(len(values), dtype=bool)
+
+    def halve(self, anomaly_z: float = ANOMALY_Z):
+        """Keep every other retained sample, and anomalies, and double the stride"""
+        values, times, regular = self.samples()
+        regular = regular.copy()
+        positions = np.flatnonzero(regular)
+        regular[positions[1::2]] = False
+        keep = regular | self._outliers(values, anomaly_z)
+        self._values, self._times, self._regular = [values[keep]], [times[keep]], [regular[keep]]
+        self.retained = len(self._values[0])
+        self.stride *= 2
+
+    def stats(self, anomaly_z: float = ANOMALY_Z) -> Dict[str, Any]:
+        values, times, regular = self.samples()
+        std = (self.m2 / self.count) ** 0.5 if self.count else 0.0
+        # Percentiles over the evenly spaced samples only
+        spaced = values[regular]
+        p50, p95, p99 = np.percentile(spaced, [50, 95, 99]) if len(spaced) else (np.nan,) * 3
+
+        duration = self.last_time - self.first_time
+        if np.isfinite(duration) and duration > 0:
+            rate = (self.last - self.first) / duration
+        else:
+            # Without timestamps, change per sample
+            rate = (self.last - self.first) / (self.count - 1) if self.count > 1 else 0.0
+
+        anomalies: List[Dict[str, Any]] = []
+        anomaly_count = 0
+        if std > 0:
+            z = (values - self.mean) / std
+            flagged = np.flatnonzero(np.abs(z) >= anomaly_z)
+            anomaly_count = len(flagged)
+            for index in flagged[np.argsort(-np.abs(z[flagged]), kind="stable")][:MAX_ANOMALIES]:
+                anomalies.append({
+                    "timestamp": _optional(times[index]),
+                    "value": float(values[index]),
+                    "z": round(float(z[index]), 2)
+                })
+
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": std,
+            "min": self.minimum,
+            "max": self.maximum,
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "first": self.first,
+            "last": self.last,
+            "start": _optional(self.first_time),
+            "end": _optional(self.last_time),
+            "rate": rate,
+            # Counted over retained samples when the series was thinned out
+            "anomaly_count": anomaly_count,
+            "anomalies": anomalies,
+            "sampled": self.stride > 1
+        }
+
+def _optional(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+class MetricsEngine:
+    """Per-series statistics over metrics in any of the supported formats
+
+    max_samples bounds the samples retained across all series for
+    percentiles and anomalies; counts, means, deviations, extremes and
+    rates stay exact regardless.
+    """
+
+    def __init__(self, max_samples: int = DEFAULT_MAX_SAMPLES, anomaly_z: float = ANOMALY_Z):
+        self.max_samples = max_samples
+        self.anomaly_z = anomaly_z
+        self.series: Dict[str, MetricSeries] = {}
+        self.retained = 0
+
+    def add_samples(self, keys: Any, values: Any, times: Optional[Any] = None) -> "MetricsEngine":
+        """Add a batch of samples; non-finite values are skipped"""
+        keys = np.asarray(keys, dtype=object)
+        values = np.asarray(values, dtype=np.float64)
+        times = np.full(len(values), np.nan) if times is None else np.asarray(times, dtype=np.float64)
+        finite = np.isfinite(values)
+        if not finite.all():
+            keys, values, times = keys[finite], values[finite], times[finite]
+        if not len(values):
+            return self
+
+        ids, names = pd.factorize(keys)
+        order = np.argsort(ids, kind="stable")
+        bounds = np.searchsorted(ids[order], np.arange(len(names) + 1))
+        values, times = values[order], times[order]
+        for position, key in enumerate(names):
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = MetricSeries(key)
+            before = series.retained
+            start, end = bounds[position], bounds[position + 1]
+            series.merge(values[start:end], times[start:end], self.anomaly_z)
+            self.retained += series.retained - before
+
+        while self.retained > self.max_samples:
+            largest = max(self.series.values(), key=lambda series: series.retained)
+            before = largest.retained
+            largest.halve(self.anomaly_z)
+            self.retained += largest.retained - before
+        return self
+
+    def add_batches(self, batches: Iterable[Batch]) -> "MetricsEngine":
+        for keys, values, times in batches:
+            self.add_samples(keys, values, times)
+        return self
+
+    def add_text(self, text: str) -> "MetricsEngine":
+        """Detect the format of text and add its samples"""
+        return self.add_batches(parse_metrics(text))
+
+    def add_file(self, path: str) -> "MetricsEngine":
+        """Stream a metrics file; Prometheus, CSV and free text are read in batches"""
+        if path.lower().endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                return self.add_text(f.read())
+        if path.lower().endswith(".csv"):
+            return self.add_batches(parse_csv(path))
+        with open(path, encoding="utf-8", errors="replace") as f:
+            head = [f.readline() for _ in range(20)]
+            f.seek(0)
+            parser = parse_prometheus if _is_prometheus(_sample_lines("".join(head))) else parse_free_text
+            for block in _line_blocks(f):
+                self.add_batches(parser(block))
+        return self
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Statistics of each series, by series key"""
+        return {key: series.stats(self.anomaly_z) for key, series in self.series.items()}
+
+def _line_blocks(lines: Iterable[str]) -> Iterator[str]:
+    batch: List[str] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= BATCH_LINES:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+def _text_blocks(text: str) -> Iterator[str]:
+    """text in pieces of about BLOCK_CHARS, split between lines"""
+    position = 0
+    while len(text) - position > BLOCK_CHARS:
+        end = text.find("\n", position + BLOCK_CHARS)
+        if end < 0:
+            break
+        yield text[position:end]
+        position = end + 1
+    yield text[position:] if position else text
+
+def parse_prometheus(text: str) -> Iterator[Batch]:
+    """Samples of Prometheus exposition text; # HELP / # TYPE lines are skipped
+
+    Regular text is split by pandas' C parser, the rest by PROMETHEUS_SAMPLE.
+    """
+    for block in _text_blocks(text):
+        frame = None
+        if _splits_on_spaces(block):
+            try:
+                frame = pd.read_csv(io.StringIO(block), sep=" ", header=None, names=["key", "value", "timestamp"],
+                                    comment="#", quoting=csv.QUOTE_NONE, dtype={"key": object})
+            except (pd.errors.ParserError, ValueError):
+                frame = None
+        if frame is not None:
+            values = pd.to_numeric(frame["value"], errors="coerce").to_numpy(np.float64)
+            stamps = pd.to_numeric(frame["timestamp"], errors="coerce").to_numpy(np.float64)
+            yield frame["key"].to_numpy(), values, stamps / 1000.0
+            continue
+
+        samples = PROMETHEUS_SAMPLE.findall(block)
+        if samples:
+            keys = [LABEL_SPACE.sub("", key) if " " in key or "\t" in key else key for key, _, _ in samples]
+            values = _to_floats([value for _, value, _ in samples])
+            stamps = np.array([stamp or "nan" for _, _, stamp in samples], dtype=np.float64) / 1000.0
+            yield keys, values, stamps
+
+def _splits_on_spaces(text: str) -> bool:
+    """Whether every line is "key value [timestamp]" separated by single spaces
+
+    False for tabs, indentation, spaces in label sets and # past the start
+    of a line, all of which pandas' C parser would split wrongly.
+    """
+    comments = text.count("#")
+    if comments and comments != text.count("\n#") + text.startswith("#"):
+        return False
+    return ("\t" not in text and "\n " not in text and not text.startswith(" ")
+            and not LABEL_WHITESPACE.search(text))
+
+def _to_floats(values: List[Any]) -> np.ndarray:
+    try:
+        floats = np.array(values, dtype=np.float64)
+        # Equal-length lists convert to a 2-D array; they aren't samples
+        if floats.ndim == 1:
+            return floats
+    except (TypeError, ValueError):
+        pass
+    series = pd.Series(values, dtype=object)
+    return pd.to_numeric(series.where(series.map(_is_scalar)), errors="coerce").to_numpy(np.float64)
+
+def parse_free_text(text: str) -> Iterator[Batch]:
+    """"name: value" and "name=value" pairs anywhere in text"""
+    for block in _text_blocks(text):
+        pairs = TEXT_SAMPLE.findall(block)
+        if pairs:
+            yield [name for name, _ in pairs], np.array([value for _, value in pairs], dtype=np.float64), None
+
+def _find_column(columns: List[str], names: Tuple[str, ...]) -> Optional[str]:
+    lowered = {str(column).strip().lower(): column for column in columns}
+    return next((lowered[name] for name in names if name in lowered), None)
+
+def _frame_batch(frame: pd.DataFrame) -> Optional[Batch]:
+    """Samples of one table, long (metric and value columns) or wide"""
+    columns = list(frame.columns)
+    time_column = _find_column(columns, TIMESTAMP_COLUMNS)
+    metric_column = _find_column(columns, METRIC_COLUMNS)
+    value_column = _find_column(columns, ("value",))
+    times = to_seconds(frame[time_column]) if time_column is not None else np.full(len(frame), np.nan)
+
+    if metric_column is not None and value_column is not None:
+        label_columns = [c for c in columns if c not in (time_column, metric_column, value_column)]
+        keys = frame[metric_column].astype(str)
+        if label_columns:
+            labels = None
+            for column in label_columns:
+                label = str(column).replace("labels.", "", 1)
+                part = f'{label}="' + frame[column].astype(str) + '"'
+                labels = part if labels is None else labels + "," + part
+            keys = keys + "{" + labels + "}"
+        values = _to_floats(frame[value_column].tolist())
+        return keys.tolist(), values, times
+
+    series_columns = [c for c in columns if c != time_column]
+    # Cells holding lists or objects are not samples
+    numeric = frame[series_columns].apply(
+        lambda column: pd.to_numeric(column.where(column.map(_is_scalar)), errors="coerce"))
+    numeric = numeric.loc[:, numeric.notna().any()]
+    if numeric.empty:
+        return None
+    # Column-major so each series' samples stay in time order
+    keys = [str(column) for column in numeric.columns for _ in range(len(numeric))]
+    return keys, numeric.to_numpy(np.float64).T.ravel(), np.tile(times, numeric.shape[1])
+
+def parse_csv(source: Any) -> Iterator[Batch]:
+    """Samples of CSV text or a CSV file path, read BATCH_LINES rows at a time"""
+    for frame in pd.read_csv(source, chunksize=BATCH_LINES, skipinitialspace=True):
+        batch = _frame_batch(frame)
+        if batch is not None:
+            yield batch
+
+def parse_json(data: Any) -> Iterator[Batch]:
+    """Samples of parsed JSON metrics
+
+    Accepts Prometheus API responses, lists of sample or record objects, and
+    maps of series to values, [timestamp, value] pairs or sample objects.
+    """
+    if isinstance(data, dict) and isinstance(data.get("data"), dict):
+        data = data["data"]
+    if isinstance(data, dict) and isinstance(data.get("result"), list):
+        data = data["result"]
+
+    if isinstance(data, list):
+        # Series without samples are skipped rather than read as records
+        if data and all(isinstance(item, dict) and isinstance(item.get("metric"), dict) for item in data) \
+                and any("values" in item or "value" in item for item in data):
+            yield from _prometheus_results(data)
+        elif data and all(isinstance(item, dict) for item in data):
+            batch = _frame_batch(pd.json_normalize(data))
+            if batch is not None:
+                yield batch
+        return
+
+    if isinstance(data, dict):
+        keys: List[str] = []
+        values: List[Any] = []
+        times: List[Any] = []
+        for name, samples in data.items():
+            if not isinstance(samples, list):
+                samples = [samples]
+            for sample in samples:
+                if isinstance(sample, (list, tuple)) and len(sample) == 2:
+                    stamp, value = sample
+                elif isinstance(sample, dict):
+                    stamp = next((sample[c] for c in TIMESTAMP_COLUMNS if c in sample), None)
+                    value = sample.get("value")
+                else:
+                    stamp, value = None, sample
+                keys.append(str(name))
+                values.append(_json_number(value))
+                times.append(stamp if _is_scalar(stamp) else None)
+        if keys:
+            yield keys, np.array(values, dtype=np.float64), to_seconds(times)
+
+def _prometheus_results(results: List[Dict[str, Any]]) -> Iterator[Batch]:
+    for result in results:
+        labels = dict(result["metric"])
+        name = labels.pop("__name__", "")
+        key = name + ("{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}" if labels else "")
+        pairs = result.get("values") if "values" in result else [result.get("value")]
+        # Malformed samples, and series without any, are skipped
+        pairs = [pair for pair in pairs or [] if isinstance(pair, (list, tuple)) and len(pair) == 2]
+        if not pairs:
+            continue
+        yield ([key] * len(pairs), np.array([_json_number(value) for _, value in pairs], dtype=np.float64),
+               np.array([_json_number(stamp) for stamp, _ in pairs], dtype=np.float64))
+
+def _is_scalar(value: Any) -> bool:
+    return isinstance(value, (int, float, str))
+
+def _json_number(value: Any) -> float:
+    """A JSON sample value as a float, NaN when it is not a number"""
+    if not _is_scalar(value):
+        return np.nan
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+def parse_metrics(text: str) -> Iterator[Batch]:
+    """Detect the format of a metrics blob and parse it"""
+    stripped = text.strip()
+    if not stripped:
+        return iter(())
+    if stripped[0] in "[{":
+        try:
+            return parse_json(json.loads(stripped))
+        except json.JSONDecodeError:
+            pass
+
+    lines = _sample_lines(stripped)
+    if _is_prometheus(lines):
+        return parse_prometheus(stripped)
+    if lines and "," in lines[0] and not TEXT_SAMPLE.search(lines[0]) \
+            and all(line.count(",") == lines[0].count(",") for line in lines):
+        return parse_csv(io.StringIO(stripped))
+    return parse_free_text(stripped)
+
+def _sample_lines(text: str) -> List[str]:
+    """The first non-comment lines, to detect the format from"""
+    lines = (line.strip() for line in text[:16384].splitlines()[:40])
+    return [line for line in lines if line and not line.startswith("#")][:20]
+
+def _is_prometheus(lines: List[str]) -> bool:
+    return bool(lines) and all(PROMETHEUS_SAMPLE.match(line) for line in lines)
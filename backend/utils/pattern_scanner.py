@@ -0,0 +1,326 @@
+"""
+Error Pattern Scanner
+=====================
+
+Scans logs for a pack of error patterns in blocks of whole lines. Each
+block is lowercased once and patterns run case-sensitively over the
+lowercased text with their literals folded to lowercase, several times
+faster than re.IGNORECASE; matches are read back from the original.
+
+Each pattern also names trigger literals: groups of words of which every
+match contains at least one per group. They are located with C-level
+str.find, so a pattern is skipped for blocks missing its triggers and
+only runs over the lines holding them when those are rare.
+
+Matches must not span lines (^ and $ match at line ends), so a log of any
+size can be read block by block in constant memory.
+"""
+
+import functools
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+# Above this share of a block's lines, a regex runs over the whole block
+DENSE_FRACTION = 0.05
+
+# Gaps between the two halves of a pattern are bounded so a long line with
+# many openers can't backtrack quadratically
+DEFAULT_PATTERNS: List[Dict[str, Any]] = [
+    {
+        'name': 'HTTP_ERROR',
+        'pattern': r'HTTP (\d{3})',
+        'description': 'HTTP status codes',
+        'triggers': [['http ']]
+    },
+    {
+        'name': 'EXCEPTION',
+        'pattern': r'(Exception|Error|Failed|Timeout)',
+        'description': 'General exceptions and errors',
+        'triggers': [['exception', 'error', 'failed', 'timeout']]
+    },
+    {
+        'name': 'DATABASE_ERROR',
+        'pattern': r'(database|sql|connection|query).{0,200}?(error|failed|timeout)',
+        'description': 'Database related errors',
+        'triggers': [['database', 'sql', 'connection', 'query'], ['error', 'failed', 'timeout']]
+    },
+    {
+        'name': 'NETWORK_ERROR',
+        'pattern': r'(network|connection|socket).{0,200}?(error|failed|refused|timeout)',
+        'description': 'Network connectivity issues',
+        'triggers': [['network', 'connection', 'socket'], ['error', 'failed', 'refused', 'timeout']]
+    },
+    {
+        'name': 'MEMORY_ERROR',
+        'pattern': r'(memory|heap|oom|out of memory)',
+        'description': 'Memory related issues',
+        'triggers': [['memory', 'heap', 'oom']]
+    },
+    {
+        'name': 'DISK_ERROR',
+        'pattern': r'(disk|storage|filesystem).{0,200}?(full|error|failed)',
+        'description': 'Disk and storage issues',
+        'triggers': [['disk', 'storage', 'filesystem'], ['full', 'error', 'failed']]
+    }
+]
+
+# Line spans by start offset, or None when a trigger is too frequent to be worth it
+Spans = Optional[Dict[int, int]]
+
+# Scoped flags turning case-insensitivity off can't be folded
+CASE_SENSITIVE_GROUP = re.compile(r'\(\?[aiLmsux]*-[msx]*i')
+
+def fold_pattern(source: str) -> Optional[str]:
+    """Lowercase a regex's literals, leaving escapes intact
+
+    The folded regex matches lowercased text case-sensitively, which re
+    does several times faster than IGNORECASE. None if it can't be folded.
+    """
+    if CASE_SENSITIVE_GROUP.search(source) or "\\N{" in source:
+        return None
+    folded = []
+    position = 0
+    while position < len(source):
+        char = source[position]
+        if char == "\\":
+            folded.append(source[position:position + 2])
+            position += 2
+        else:
+            folded.append(char.lower())
+            position += 1
+    return "".join(folded)
+
+class CompiledPattern:
+    """A pattern of a pack with its compiled regexes and trigger groups
+
+    regex runs over the original text; folded, when the pattern allows it,
+    over the lowercased text, with matches read back from the original.
+    """
+
+    __slots__ = ("name", "description", "regex", "folded", "triggers")
+
+    def __init__(self, spec: Dict[str, Any]):
+        missing = [key for key in ("name", "pattern") if not spec.get(key)]
+        if missing:
+            raise ValueError(f"Pattern {spec!r} is missing {', '.join(missing)}")
+        self.name = spec["name"]
+        self.description = spec.get("description", "")
+        try:
+            self.regex = re.compile(spec["pattern"], re.IGNORECASE | re.MULTILINE)
+        except re.error as e:
+            raise ValueError(f"Pattern {self.name} is not a valid regex: {e}")
+        folded = fold_pattern(spec["pattern"])
+        try:
+            self.folded = re.compile(folded, re.MULTILINE) if folded is not None else None
+        except re.error:
+            self.folded = None
+        if self.folded is not None and self.folded.groups != self.regex.groups:
+            self.folded = None
+
+        triggers = spec.get("triggers") or []
+        # A flat list of words is a single group
+        if triggers and all(isinstance(trigger, str) for trigger in triggers):
+            triggers = [triggers]
+        self.triggers: List[Tuple[str, ...]] = [
+            tuple(word.lower() for word in group) for group in triggers if group
+        ]
+
+    def findall(self, block: str, lowered: Optional[str], start: int = 0, end: Optional[int] = None) -> List[Any]:
+        """re.findall over block[start:end], using lowered when it is given"""
+        if end is None:
+            end = len(block)
+        if self.folded is None or lowered is None:
+            return self.regex.findall(block, start, end)
+        matches = self.folded.finditer(lowered, start, end)
+        groups = self.folded.groups
+        if groups == 0:
+            return [block[m.start():m.end()] for m in matches]
+        if groups == 1:
+            return [block[m.start(1):m.end(1)] for m in matches]
+        return [tuple(block[m.start(g):m.end(g)] for g in range(1, groups + 1)) for m in matches]
+
+def load_pattern_pack(path: str) -> List[Dict[str, Any]]:
+    """Read a JSON pattern pack: a list of patterns or {"patterns": [...]}
+
+    Each pattern has a name, a regex and optionally a description and
+    triggers, in the format of DEFAULT_PATTERNS.
+    """
+    with open(path, encoding="utf-8") as f:
+        pack = json.load(f)
+    if isinstance(pack, dict):
+        pack = pack.get("patterns")
+    if not isinstance(pack, list):
+        raise ValueError(f"{path} does not contain a list of patterns")
+    # Compile once to report a bad pattern on load
+    for spec in pack:
+        CompiledPattern(spec)
+    return pack
+
+class PatternScanner:
+    """Finds every pattern of a pack in logs, one block of lines at a time
+
+    max_matches caps the matches kept per pattern for very large inputs;
+    counts are always exact.
+    """
+
+    def __init__(self, patterns: Optional[List[Dict[str, Any]]] = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE, max_matches: Optional[int] = None):
+        self.patterns = [CompiledPattern(spec) for spec in (patterns or DEFAULT_PATTERNS)]
+        self.block_size = block_size
+        self.max_matches = max_matches
+
+    def scan_text(self, text: str) -> List[Dict[str, Any]]:
+        return self._scan(self._text_blocks(text))
+
+    def scan_lines(self, lines: Iterable[str]) -> List[Dict[str, Any]]:
+        """Scan an iterable of lines, such as an open file or a log stream"""
+        return self._scan(self._line_blocks(lines))
+
+    def scan_file(self, path: str, encoding: str = "utf-8") -> List[Dict[str, Any]]:
+        with open(path, encoding=encoding, errors="replace") as f:
+            return self._scan(self._file_blocks(f))
+
+    def _text_blocks(self, text: str) -> Iterator[str]:
+        position = 0
+        while len(text) - position > self.block_size:
+            end = text.find("\n", position + self.block_size)
+            if end < 0:
+                break
+            yield text[position:end]
+            position = end + 1
+        yield text[position:] if position else text
+
+    def _line_blocks(self, lines: Iterable[str]) -> Iterator[str]:
+        batch: List[str] = []
+        size = 0
+        for line in lines:
+            line = line.rstrip("\r\n")
+            batch.append(line)
+            size += len(line) + 1
+            if size >= self.block_size:
+                yield "\n".join(batch)
+                batch, size = [], 0
+        if batch:
+            yield "\n".join(batch)
+
+    def _file_blocks(self, f) -> Iterator[str]:
+        carry = ""
+        while True:
+            data = f.read(self.block_size)
+            if not data:
+                break
+            data = carry + data
+            # Keep the unfinished last line for the next block
+            end = data.rfind("\n")
+            if end < 0:
+                carry = data
+                continue
+            carry = data[end + 1:]
+            yield data[:end]
+        if carry:
+            yield carry
+
+    def _scan(self, blocks: Iterable[str]) -> List[Dict[str, Any]]:
+        matches: Dict[str, List[Any]] = {pattern.name: [] for pattern in self.patterns}
+        counts = {pattern.name: 0 for pattern in self.patterns}
+        for block in blocks:
+            for pattern, found in self.scan_block(block):
+                counts[pattern.name] += len(found)
+                kept = matches[pattern.name]
+                if self.max_matches is None:
+                    kept.extend(found)
+                elif len(kept) < self.max_matches:
+                    kept.extend(found[:self.max_matches - len(kept)])
+
+        return [
+            {
+                'pattern_name': pattern.name,
+                'description': pattern.description,
+                'matches': matches[pattern.name],
+                'count': counts[pattern.name]
+            }
+            for pattern in self.patterns if counts[pattern.name]
+        ]
+
+    def scan_block(self, block: str) -> Iterator[Tuple[CompiledPattern, List[Any]]]:
+        """Yield (pattern, findall result) for the patterns found in block"""
+        lowered = block.lower()
+        if len(lowered) != len(block):
+            # Offsets in the lowercased text no longer match the original
+            for pattern in self.patterns:
+                found = pattern.regex.findall(block)
+                if found:
+                    yield pattern, found
+            return
+
+        max_lines = int((lowered.count("\n") + 1) * DENSE_FRACTION)
+        # Line spans of each trigger literal, shared between patterns
+        literal_spans: Dict[str, Spans] = {}
+
+        for pattern in self.patterns:
+            # Lines of the rarest trigger group; the others are checked per line
+            candidates: Spans = None
+            for group in pattern.triggers:
+                spans = self._group_spans(lowered, group, literal_spans, max_lines)
+                if spans is not None and not spans:
+                    # A trigger group is absent: no line can match
+                    break
+                if spans is not None and (candidates is None or len(spans) < len(candidates)):
+                    candidates = spans
+            else:
+                if candidates is None:
+                    found = pattern.findall(block, lowered)
+                else:
+                    found = self._find_in_lines(pattern, block, lowered, candidates, pattern.triggers)
+                if found:
+                    yield pattern, found
+
+    @staticmethod
+    def _group_spans(lowered: str, group: Tuple[str, ...], literal_spans: Dict[str, Spans],
+                     max_lines: int) -> Spans:
+        """Line spans holding any literal of group, None if there are too many"""
+        spans: Dict[int, int] = {}
+        for literal in group:
+            if literal not in literal_spans:
+                literal_spans[literal] = PatternScanner._literal_spans(lowered, literal, max_lines)
+            found = literal_spans[literal]
+            if found is None:
+                return None
+            spans.update(found)
+            if len(spans) > max_lines:
+                return None
+        return spans
+
+    @staticmethod
+    def _literal_spans(lowered: str, literal: str, max_lines: int) -> Spans:
+        spans: Dict[int, int] = {}
+        position = lowered.find(literal)
+        while position >= 0:
+            start = lowered.rfind("\n", 0, position) + 1
+            end = lowered.find("\n", position)
+            if end < 0:
+                end = len(lowered)
+            spans[start] = end
+            if len(spans) > max_lines:
+                return None
+            position = lowered.find(literal, end)
+        return spans
+
+    @staticmethod
+    def _find_in_lines(pattern: CompiledPattern, block: str, lowered: str,
+                       candidates: Dict[int, int], groups: List[Tuple[str, ...]]) -> List[Any]:
+        found: List[Any] = []
+        for start in sorted(candidates):
+            end = candidates[start]
+            # The line must hold a literal of every group
+            if all(any(lowered.find(literal, start, end) >= 0 for literal in group) for group in groups):
+                found.extend(pattern.findall(block, lowered, start, end))
+        return found
+
+@functools.lru_cache(maxsize=None)
+def default_scanner() -> PatternScanner:
+    """The scanner for DEFAULT_PATTERNS, compiled on first use"""
+    return PatternScanner()
@@ -0,0 +1,190 @@
+"""
+Streaming Parsers
+=================
+
+Incremental parsers for bulk uploads. Each parser reads a binary file
+object in fixed-size chunks and yields records one at a time, so memory
+use does not grow with the size of the file.
+"""
+
+import codecs
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, BinaryIO, Iterator, List, Optional
+
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+def iter_text_chunks(fileobj: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     encoding: str = "utf-8") -> Iterator[str]:
+    """Yield decoded text chunks, never splitting a multi-byte character"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+def iter_lines(fileobj: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               encoding: str = "utf-8") -> Iterator[str]:
+    """Yield lines without trailing newlines"""
+    pending = ""
+    for text in iter_text_chunks(fileobj, chunk_size, encoding):
+        lines = (pending + text).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    if pending:
+        yield pending.rstrip("\r")
+
+def iter_text_documents(fileobj: BinaryIO, max_chars: int = DEFAULT_CHUNK_SIZE,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Group lines of a text file into documents of at most max_chars"""
+    lines: List[str] = []
+    size = 0
+    for line in iter_lines(fileobj, chunk_size):
+        if lines and size + len(line) + 1 > max_chars:
+            yield "\n".join(lines)
+            lines, size = [], 0
+        lines.append(line)
+        size += len(line) + 1
+    if lines and any(line.strip() for line in lines):
+        yield "\n".join(lines)
+
+def iter_json_records(fileobj: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array as they are decoded"""
+    decoder = json.JSONDecoder()
+    chunks = iter_text_chunks(fileobj, chunk_size)
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        text = next(chunks, None)
+        if text is None:
+            eof = True
+            return False
+        buffer = buffer[pos:] + text
+        pos = 0
+        return True
+
+    def skip(chars: str):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    skip(" \t\r\n\ufeff")
+    if pos >= len(buffer):
+        return
+
+    if buffer[pos] != "[":
+        # Not an array: the document is a single record and has to be read
+        # whole. It is stored as one document, as before.
+        while fill():
+            pass
+        yield str(json.loads(buffer[pos:]))
+        return
+
+    pos += 1
+    while True:
+        skip(" \t\r\n,")
+        if pos >= len(buffer):
+            raise ValueError("Unterminated JSON array")
+        if buffer[pos] == "]":
+            return
+
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+            # A value ending exactly at the buffer edge may be truncated
+            # (e.g. a number split across chunks), so read on and retry
+            if end == len(buffer) and not eof and fill():
+                continue
+        except json.JSONDecodeError:
+            if eof or not fill():
+                raise
+            continue
+
+        yield record
+        pos = end
+
+def iter_ndjson_records(fileobj: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield one record per non-empty line of newline-delimited JSON"""
+    for line_number, line in enumerate(iter_lines(fileobj, chunk_size), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+
+def iter_parquet_records(fileobj: BinaryIO, columns: Optional[List[str]] = None,
+                         batch_rows: int = 1000) -> Iterator[dict]:
+    """Yield Parquet rows as dicts, reading one row group at a time"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet support requires pyarrow. Install with: pip install pyarrow")
+
+    parquet_file = pq.ParquetFile(fileobj)
+    if columns:
+        missing = set(columns) - set(parquet_file.schema_arrow.names)
+        if missing:
+            raise ValueError(f"Unknown Parquet columns: {', '.join(sorted(missing))}")
+
+    # Only the projected columns of a single row group are materialized
+    for row_group in range(parquet_file.num_row_groups):
+        table = parquet_file.read_row_group(row_group, columns=columns)
+        for batch in table.to_batches(max_chunksize=batch_rows):
+            for row in batch.to_pylist():
+                yield {key: _to_plain_value(value) for key, value in row.items()}
+
+def _to_plain_value(value: Any) -> Any:
+    """Convert Arrow scalar types (timestamps, decimals, bytes) to JSON-friendly values"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, list):
+        return [_to_plain_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_plain_value(item) for key, item in value.items()}
+    return str(value)
+
+def iter_csv_records(fileobj: BinaryIO, chunk_rows: int = 1000) -> Iterator[dict]:
+    """Yield CSV rows as dicts, parsing chunk_rows rows at a time"""
+    for frame in pd.read_csv(fileobj, chunksize=chunk_rows):
+        yield from frame.to_dict("records")
+
+def iter_upload_records(filename: str, fileobj: BinaryIO, columns: Optional[List[str]] = None) -> Iterator[Any]:
+    """Pick a streaming parser for an uploaded file based on its extension"""
+    filename = filename.lower()
+    if filename.endswith((".ndjson", ".jsonl")):
+        return iter_ndjson_records(fileobj)
+    if filename.endswith(".parquet"):
+        return iter_parquet_records(fileobj, columns=columns)
+    if filename.endswith(".json"):
+        return iter_json_records(fileobj)
+    if filename.endswith(".csv"):
+        return iter_csv_records(fileobj)
+    if filename.endswith(".xlsx"):
+        # XLSX is a zip archive and cannot be parsed incrementally
+        return iter(pd.read_excel(fileobj).to_dict("records"))
+    # Treat as text
+    return iter_text_documents(fileobj)
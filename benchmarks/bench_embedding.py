@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Embedding Throughput Benchmark
+==============================
+
+Embeds synthetic log documents with the embedding worker pool at increasing
+worker counts, then runs a full pipelined bulk store into a temporary
+ChromaDB directory, to show how throughput scales with cores.
+
+The default embedder is the ONNX model ChromaDB uses for collections
+(downloaded on first use). --synthetic swaps in a matrix-multiply embedder
+with a similar cost profile, for machines without the model.
+
+Usage:
+    python benchmarks/bench_embedding.py [--documents N] [--batch-size N] [--workers 1 2 4 ...] [--synthetic]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from database.chroma_db import ChromaDBManager
+from database.embeddings import EmbeddingPipeline
+
+LEVELS = ["INFO", "WARN", "ERROR"]
+COMPONENTS = ["ApplicationService", "ConnectionPool", "PaymentGateway", "AuthService"]
+MESSAGES = [
+    "Database connection failed: timeout after {n}s",
+    "Retrying connection attempt {n}/3",
+    "Request completed in {n}ms",
+    "Cache miss for key user:{n}",
+]
+
+
+def make_documents(count: int):
+    rng = random.Random(42)
+    return [
+        f"2025-06-19 10:{i % 60:02d}:{i % 60:02d} {rng.choice(LEVELS)} [{rng.choice(COMPONENTS)}] "
+        + rng.choice(MESSAGES).format(n=rng.randint(1, 5000))
+        for i in range(count)
+    ]
+
+
+class SyntheticEmbedder:
+    """Hashes tokens into a matrix and projects it; numpy releases the GIL"""
+
+    def __init__(self, dimensions: int = 384, vocabulary: int = 4096, layers: int = 6):
+        rng = np.random.default_rng(0)
+        self.vocabulary = vocabulary
+        self.projection = rng.standard_normal((vocabulary, dimensions), dtype=np.float32)
+        self.layers = [
+            rng.standard_normal((dimensions, dimensions), dtype=np.float32) / np.sqrt(dimensions)
+            for _ in range(layers)
+        ]
+
+    def __call__(self, documents):
+        counts = np.zeros((len(documents), self.vocabulary), dtype=np.float32)
+        for row, document in enumerate(documents):
+            for token in document.split():
+                counts[row, hash(token) % self.vocabulary] += 1
+        vectors = counts @ self.projection
+        for layer in self.layers:
+            vectors = np.tanh(vectors @ layer)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-9
+        return vectors
+
+
+async def embed_all(pipeline: EmbeddingPipeline, documents, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(documents), batch_size):
+        await pipeline.embed(documents[i:i + batch_size])
+    return time.perf_counter() - start
+
+
+async def run(document_count: int, batch_size: int, worker_counts, synthetic: bool):
+    documents = make_documents(document_count)
+    embedding_function = SyntheticEmbedder() if synthetic else None
+
+    print(f"Embedding {document_count} documents in batches of {batch_size}")
+    baseline = None
+    for workers in worker_counts:
+        pipeline = EmbeddingPipeline(embedding_function=embedding_function, workers=workers)
+        # Load the model before timing
+        pipeline.embed_sync(documents[:1])
+        elapsed = await embed_all(pipeline, documents, batch_size)
+        pipeline.close()
+        rate = document_count / elapsed
+        baseline = baseline or rate
+        print(f"  {workers:>3} workers: {rate:10.1f} docs/s  ({rate / baseline:.2f}x)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in (worker_counts[0], worker_counts[-1]):
+            manager = ChromaDBManager(persist_directory=os.path.join(directory, str(workers)), embedding_workers=workers)
+            if embedding_function is not None:
+                manager.embedder = EmbeddingPipeline(embedding_function=embedding_function, workers=workers)
+            await manager.initialize()
+            manager.embedder.embed_sync(documents[:1])
+
+            start = time.perf_counter()
+            stored = await manager.bulk_store_records("logs", iter(documents), batch_size)
+            elapsed = time.perf_counter() - start
+            manager.embedder.close()
+            print(f"Bulk store with {workers} workers: {stored} records, {stored / elapsed:.1f} records/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding throughput benchmark")
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({n for n in (1, 2, 4, 8, 16, 32) if n <= (os.cpu_count() or 1)}
+                                       | {os.cpu_count() or 1}))
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Use a synthetic embedder instead of the ONNX model")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.documents, args.batch_size, args.workers, args.synthetic))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Error Pattern Scanning Benchmark
+================================
+
+Compares the pattern scanner behind extract_error_patterns with the
+previous implementation (one re.findall per pattern over the whole text)
+on synthetic logs, reporting MB/s for each and whether their results
+agree. --error-rate sets the share of lines that are errors; the scanner
+also runs over a file on disk to show streaming throughput.
+
+Usage:
+    python benchmarks/bench_error_patterns.py [--lines N] [--error-rate R]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from utils.pattern_scanner import DEFAULT_PATTERNS, PatternScanner
+
+INFO_MESSAGES = [
+    "INFO [Api] GET /api/orders/{n} HTTP 200 completed in {m}ms",
+    "INFO [Cache] Cache miss for key user:{n}",
+    "INFO [Scheduler] job {n} finished processing batch of {m} items successfully",
+    "INFO [Auth] user {n} logged in from 10.0.0.{m}",
+    "DEBUG [Pool] connection {m} returned to pool after {n}us",
+]
+ERROR_MESSAGES = [
+    "ERROR [PaymentService] Database connection failed: timeout after {m}s host=db-{n}.prod",
+    "ERROR [Api] POST /api/payments/{n} HTTP 503 upstream connection refused",
+    "ERROR [Worker] java.lang.OutOfMemoryError: Java heap space job={n}",
+    "WARN [Storage] disk usage at {m}% on /var/lib/data, filesystem almost full",
+]
+
+# The implementation before the scanner, kept for comparison
+OLD_PATTERNS = [
+    (r'HTTP (\d{3})', 'HTTP_ERROR'),
+    (r'(Exception|Error|Failed|Timeout)', 'EXCEPTION'),
+    (r'(database|sql|connection|query).*?(error|failed|timeout)', 'DATABASE_ERROR'),
+    (r'(network|connection|socket).*?(error|failed|refused|timeout)', 'NETWORK_ERROR'),
+    (r'(memory|heap|oom|out of memory)', 'MEMORY_ERROR'),
+    (r'(disk|storage|filesystem).*?(full|error|failed)', 'DISK_ERROR'),
+]
+
+
+def old_extract_error_patterns(log_text: str):
+    found = []
+    for pattern, name in OLD_PATTERNS:
+        matches = re.findall(pattern, log_text, re.IGNORECASE)
+        if matches:
+            found.append({'pattern_name': name, 'matches': matches, 'count': len(matches)})
+    return found
+
+
+def make_logs(count: int, error_rate: float) -> str:
+    rng = random.Random(42)
+    lines = []
+    for i in range(count):
+        messages = ERROR_MESSAGES if rng.random() < error_rate else INFO_MESSAGES
+        lines.append(f"2025-06-19T10:{i % 60:02d}:{i % 60:02d}.{i % 1000:03d}Z "
+                     + rng.choice(messages).format(n=rng.randint(1, 10 ** 6), m=rng.randint(1, 999)))
+    return "\n".join(lines)
+
+
+def timed(label: str, size: int, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:7.3f}s  {size / elapsed / 1e6:8.1f} MB/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Error pattern scanning benchmark")
+    parser.add_argument("--lines", type=int, default=300000)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    text = make_logs(args.lines, args.error_rate)
+    size = len(text.encode())
+    print(f"{args.lines} lines, {size / 1e6:.1f} MB, {args.error_rate:.0%} errors")
+
+    scanner = PatternScanner(DEFAULT_PATTERNS)
+    old = timed("re.findall per pattern", size, lambda: old_extract_error_patterns(text))
+    new = timed("scanner (text)", size, lambda: scanner.scan_text(text))
+
+    with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as f:
+        f.write(text)
+    try:
+        streamed = timed("scanner (file)", size, lambda: scanner.scan_file(f.name))
+    finally:
+        os.unlink(f.name)
+
+    def summary(results):
+        return [(r['pattern_name'], r['count'], r['matches']) for r in results]
+
+    print(f"results identical: {summary(old) == summary(new) == summary(streamed)}")
+    for result in new:
+        print(f"  {result['pattern_name']:<15} {result['count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+LLM Concurrency Benchmark
+=========================
+
+Runs N concurrent generate_response calls against a stub Ollama server with
+a fixed per-request latency. With a non-blocking transport the batch should
+finish in roughly one request's latency, not N times it.
+
+Usage:
+    python benchmarks/bench_llm_concurrency.py [--requests N] [--latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.llm_service import LLMService
+from stub_ollama import start_stub_server
+
+
+async def run(requests: int, latency: float) -> float:
+    server = start_stub_server(latency=latency)
+    llm_service = LLMService(host=server.url)
+
+    try:
+        # Warm up the connection pool
+        await llm_service.generate_response("warmup")
+
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            llm_service.generate_response(f"prompt {i}") for i in range(requests)
+        ])
+        elapsed = time.perf_counter() - start
+    finally:
+        await llm_service.close()
+        server.shutdown()
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM concurrency benchmark")
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    elapsed = asyncio.run(run(args.requests, args.latency))
+    ratio = elapsed / args.latency
+
+    print(f"{args.requests} concurrent requests @ {args.latency:.2f}s each: "
+          f"{elapsed:.2f}s total ({ratio:.2f}x single-request latency)")
+
+    # Serial execution would be ~N x; allow generous slack for scheduling.
+    if ratio > 2.0:
+        print("FAIL: requests did not overlap")
+        sys.exit(1)
+    print("OK: requests overlapped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Log Template Mining Benchmark
+=============================
+
+Mines templates from synthetic logs with a few message types, varying
+numbers, users and hosts, and reports lines/s and MB/s along with the
+resulting template histogram.
+
+Usage:
+    python benchmarks/bench_log_templates.py [--lines N]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from utils.log_templates import LogTemplateMiner
+
+MESSAGES = [
+    "ERROR [PaymentService] Database connection failed: timeout after {n}s host=db-{m}.prod",
+    "INFO [Api] GET /api/orders/{n} completed in {m}ms",
+    "WARN [ConnectionPool] Retrying connection attempt {m}/3 user={user}",
+    "INFO [Cache] Cache miss for key user:{n}",
+    "ERROR [Worker] java.lang.OutOfMemoryError: Java heap space job={user}",
+]
+USERS = ["alice", "bob", "carol", "dave"]
+
+
+def make_logs(count: int) -> str:
+    rng = random.Random(42)
+    return "\n".join(
+        f"2025-06-19T10:{i % 60:02d}:{i % 60:02d}.{i % 1000:03d}Z "
+        + rng.choice(MESSAGES).format(n=rng.randint(1, 10 ** 6), m=rng.randint(1, 999), user=rng.choice(USERS))
+        for i in range(count)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log template mining benchmark")
+    parser.add_argument("--lines", type=int, default=500000)
+    args = parser.parse_args()
+
+    text = make_logs(args.lines)
+    start = time.perf_counter()
+    miner = LogTemplateMiner().add_text(text)
+    elapsed = time.perf_counter() - start
+
+    print(f"Mined {miner.line_count} lines ({len(text) / 1e6:.1f} MB) in {elapsed:.2f}s: "
+          f"{miner.line_count / elapsed:,.0f} lines/s, {len(text) / elapsed / 1e6:.1f} MB/s")
+    print(miner.histogram())
+
+
+if __name__ == "__main__":
+    main()
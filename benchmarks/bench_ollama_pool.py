@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Ollama Host Pool Benchmark
+==========================
+
+Starts several stub Ollama servers, spreads concurrent generations across
+them, then fails one host to show retry, circuit breaking and recovery.
+
+Usage:
+    python benchmarks/bench_ollama_pool.py [--hosts N] [--requests N] [--latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.llm_service import LLMService
+from stub_ollama import start_stub_server
+
+
+async def burst(llm_service: LLMService, requests: int, tag: str) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        llm_service.generate_response(f"{tag} prompt {i}", use_cache=False) for i in range(requests)
+    ])
+    return time.perf_counter() - start
+
+
+async def run(hosts: int, requests: int, latency: float):
+    servers = [start_stub_server(latency=latency) for _ in range(hosts)]
+    llm_service = LLMService(
+        hosts=[server.url for server in servers],
+        max_connections=2
+    )
+    llm_service.pool.reset_timeout = 0.5
+
+    try:
+        elapsed = await burst(llm_service, requests, "balanced")
+        print(f"{requests} requests over {hosts} hosts in {elapsed:.2f}s")
+        for server in servers:
+            print(f"  {server.url}: {server.request_count} requests")
+
+        # Fail one host; requests must be retried elsewhere and its circuit open
+        servers[0].fail = True
+        for server in servers:
+            server.request_count = 0
+        elapsed = await burst(llm_service, requests, "failover")
+        state = llm_service.pool.hosts[0].state
+        print(f"With {servers[0].url} failing: {elapsed:.2f}s, circuit {state}")
+        for server in servers:
+            print(f"  {server.url}: {server.request_count} requests")
+
+        # Bring it back; the next health check closes the circuit again
+        servers[0].fail = False
+        await asyncio.sleep(llm_service.pool.reset_timeout)
+        await llm_service.pool.check_health()
+        print(f"After recovery: circuit {llm_service.pool.hosts[0].state}")
+    finally:
+        await llm_service.close()
+        for server in servers:
+            server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama host pool benchmark")
+    parser.add_argument("--hosts", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.hosts, args.requests, args.latency))
+
+
+if __name__ == "__main__":
+    main()
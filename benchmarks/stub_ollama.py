@@ -0,0 +1,103 @@
+"""
+Stub Ollama Server
+==================
+
+Minimal stand-in for the Ollama REST API used by the benchmarks. Every
+generation sleeps for a fixed latency before answering, which makes it easy
+to see whether concurrent requests overlap or queue up behind each other.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Handles /api/tags, /api/version, /api/pull and /api/chat"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.server.fail:
+            self._send_json({"error": "stub failure"}, status=500)
+        elif self.path == "/api/tags":
+            self._send_json({"models": [{"name": f"{self.server.model_name}:latest"}]})
+        elif self.path == "/api/version":
+            self._send_json({"version": "stub"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.request_count += 1
+
+        if self.server.fail:
+            self._send_json({"error": "stub failure"}, status=500)
+            return
+
+        if self.path == "/api/pull":
+            self._send_json({"status": "success"})
+            return
+
+        if self.path != "/api/chat":
+            self._send_json({"error": "not found"}, status=404)
+            return
+
+        time.sleep(self.server.latency)
+        content = self.server.reply
+
+        if not request.get("stream", True):
+            self._send_json({
+                "model": request.get("model"),
+                "message": {"role": "assistant", "content": content},
+                "done": True
+            })
+            return
+
+        # Newline-delimited JSON chunks, one per word, like Ollama streaming
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            token = word if i == 0 else f" {word}"
+            self._write_chunk({"message": {"role": "assistant", "content": token}, "done": False})
+        self._write_chunk({"message": {"role": "assistant", "content": ""}, "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, payload):
+        data = json.dumps(payload).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_stub_server(latency: float = 0.5, reply: str = "stub response",
+                      model_name: str = "llama3", port: int = 0):
+    """Start a stub server on a background thread and return it"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubOllamaHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.reply = reply
+    server.model_name = model_name
+    server.request_count = 0
+    # Set to True to make every request fail with HTTP 500
+    server.fail = False
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
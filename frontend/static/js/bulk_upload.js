@@ -134,7 +134,7 @@ class BulkUploader {
             'text/plain'
         ];
 
-        const allowedExtensions = ['.json', '.csv', '.xlsx', '.xls', '.txt'];
+        const allowedExtensions = ['.json', '.ndjson', '.jsonl', '.csv', '.xlsx', '.xls', '.parquet', '.txt'];
         const fileExtension = file.name.toLowerCase().substring(file.name.lastIndexOf('.'));
 
         if (file.size > maxSize) {
@@ -143,7 +143,7 @@ class BulkUploader {
         }
 
         if (!allowedExtensions.includes(fileExtension) && !allowedTypes.includes(file.type)) {
-            this.showStatus(`File ${file.name} has unsupported format. Please use JSON, CSV, XLSX, or TXT files.`, 'error');
+            this.showStatus(`File ${file.name} has unsupported format. Please use JSON, NDJSON, CSV, XLSX, Parquet, or TXT files.`, 'error');
             return false;
         }
 
@@ -182,10 +182,8 @@ class BulkUploader {
                 formData.append(`${type}_file`, file);
             });
 
-            // Simulate progress
-            this.simulateProgress();
-
-            const response = await fetch('/api/bulk-upload', {
+            // Files are spooled by the server and ingested by a background job
+            const response = await fetch('/api/jobs/bulk-upload', {
                 method: 'POST',
                 body: formData
             });
@@ -195,7 +193,10 @@ class BulkUploader {
                 throw new Error(errorData.detail || 'Upload failed');
             }
 
-            const result = await response.json();
+            const job = await response.json();
+            this.showStatus('Files uploaded, ingesting records...', 'info');
+            const result = await this.pollIngestJob(job.job_id);
+
             this.showProgress(100);
             this.displayUploadResults(result);
             this.showStatus('Bulk upload completed successfully!', 'success');
@@ -208,17 +209,37 @@ class BulkUploader {
         }
     }
 
-    simulateProgress() {
-        let progress = 0;
-        const interval = setInterval(() => {
-            progress += Math.random() * 20;
-            if (progress >= 90) {
-                clearInterval(interval);
-                this.showProgress(90);
-                return;
+    async pollIngestJob(jobId, intervalMs = 1000) {
+        while (true) {
+            const response = await fetch(`/api/jobs/${jobId}`);
+            if (!response.ok) {
+                throw new Error('Lost track of the ingest job');
+            }
+
+            const job = await response.json();
+            if (job.progress) {
+                this.showIngestProgress(job.progress);
+            }
+
+            if (job.status === 'succeeded') {
+                return job.result;
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Ingest failed');
             }
-            this.showProgress(Math.min(progress, 90));
-        }, 200);
+
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    }
+
+    showIngestProgress(progress) {
+        const percentage = progress.bytes_total > 0
+            ? Math.min(99, (progress.bytes_read / progress.bytes_total) * 100)
+            : 0;
+        this.showProgress(percentage);
+        this.progressText.textContent =
+            `${Math.round(percentage)}% | ${progress.written} written, ` +
+            `${progress.failed} failed | ${progress.records_per_second} records/s`;
     }
 
     showProgress(percentage) {
@@ -252,7 +273,7 @@ class BulkUploader {
                 fileElement.innerHTML = `
                     <div class="file-info">
                         <span class="file-name">${fileInfo.filename}</span>
-                        <span class="file-details">Type: ${fileInfo.type} | Size: ${this.formatFileSize(fileInfo.size)}</span>
+                        <span class="file-details">Type: ${fileInfo.type} | Size: ${this.formatFileSize(fileInfo.size)} | Records: ${fileInfo.records}${fileInfo.failed ? ` (${fileInfo.failed} failed)` : ''}</span>
                     </div>
                     <span class="text-success">✓ Uploaded</span>
                 `;
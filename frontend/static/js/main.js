@@ -92,7 +92,7 @@ class RCAAnalyzer {
         this.hideResults();
 
         try {
-            const response = await fetch('/api/analyze', {
+            const response = await fetch('/api/analyze/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -111,7 +111,7 @@ class RCAAnalyzer {
                 throw new Error(errorData.detail || 'Analysis failed');
             }
 
-            const result = await response.json();
+            const result = await this.readAnalysisStream(response);
             this.displayResults(result);
             this.showStatus('Analysis completed successfully!', 'success');
 
@@ -123,6 +123,49 @@ class RCAAnalyzer {
         }
     }
 
+    async readAnalysisStream(response) {
+        // Parse server-sent events and render tokens as they arrive
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let text = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+
+            for (const rawEvent of events) {
+                let eventType = 'message';
+                let data = '';
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) eventType = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                if (!data) continue;
+
+                const payload = JSON.parse(data);
+                if (eventType === 'start') {
+                    this.resultsSection.classList.remove('hidden');
+                    this.analysisId.textContent = `Analysis ID: ${payload.analysis_id}`;
+                    this.showStatus('Generating analysis...', 'info');
+                } else if (eventType === 'error') {
+                    throw new Error(payload.detail || 'Analysis failed');
+                } else if (eventType === 'done') {
+                    return payload;
+                } else if (payload.token) {
+                    text += payload.token;
+                    this.rcaResult.innerHTML = this.formatRCAResult(text);
+                }
+            }
+        }
+
+        throw new Error('Analysis stream ended unexpectedly');
+    }
+
     displayResults(result) {
         // Show results section
         this.resultsSection.classList.remove('hidden');
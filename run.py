@@ -14,6 +14,8 @@ Options:
     --reload        Enable auto-reload for development
     --debug         Enable debug mode
     --workers NUM   Number of worker processes (default: 1)
+    --backfill-summaries
+                    Precompute summaries for stored historical cases and exit
 
 Environment Variables:
     OLLAMA_HOST     Ollama server host (default: http://localhost:11434)
@@ -74,6 +76,12 @@ def parse_arguments():
         help="Number of worker processes (default: 1)"
     )
     
+    parser.add_argument(
+        "--backfill-summaries",
+        action="store_true",
+        help="Precompute summaries for stored historical cases and exit"
+    )
+    
     parser.add_argument(
         "--log-level",
         default="info",
@@ -158,6 +166,17 @@ def check_ollama_connection():
         print("  Make sure Ollama is running. Start with: ollama serve")
         return False
 
+def backfill_summaries():
+    """Precompute summaries for historical cases that do not have one yet"""
+    from backend.main import chroma_manager, rag_service
+    
+    async def run_backfill():
+        await chroma_manager.initialize()
+        queued = await rag_service.backfill_case_summaries(wait=True)
+        print(f"✓ Backfilled summaries for {queued} historical cases")
+    
+    asyncio.run(run_backfill())
+
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
     print(f"\n🛑 Received signal {signum}. Shutting down gracefully...")
@@ -183,6 +202,14 @@ def main():
         print("\n❌ Missing required dependencies. Please install them and try again.")
         sys.exit(1)
     
+    # One-off maintenance command
+    if args.backfill_summaries:
+        if not check_ollama_connection():
+            print("\n❌ Ollama server is required to backfill summaries.")
+            sys.exit(1)
+        backfill_summaries()
+        return
+    
     # Check Ollama connection
     if not check_ollama_connection():
         print("\n⚠ Ollama server is not available. Some features may not work.")
@@ -58,6 +58,9 @@ setup(
             "flake8>=5.0.0",
             "mypy>=0.991",
         ],
+        "parquet": [
+            "pyarrow>=14.0.0",
+        ],
         "docs": [
             "sphinx>=5.0.0",
             "sphinx-rtd-theme>=1.0.0",
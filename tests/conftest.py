@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# The app imports its packages from backend/; the stub Ollama server lives
+# with the benchmarks
+sys.path.insert(0, str(ROOT / "backend"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
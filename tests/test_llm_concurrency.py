@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+from services.llm_service import LLMService
+from stub_ollama import start_stub_server
+
+LATENCY = 0.3
+
+
+def test_concurrent_generations_overlap():
+    """N concurrent generations take about one request's latency, not N"""
+    server = start_stub_server(latency=LATENCY)
+
+    async def run():
+        llm_service = LLMService(host=server.url)
+        try:
+            await llm_service.generate_response("warmup", use_cache=False)
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[
+                llm_service.generate_response(f"prompt {i}", use_cache=False) for i in range(8)
+            ])
+            return time.perf_counter() - start, responses
+        finally:
+            await llm_service.close()
+
+    try:
+        elapsed, responses = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert responses == [server.reply] * 8
+    assert elapsed < 2 * LATENCY
@@ -0,0 +1,183 @@
+import json
+
+import pytest
+
+from utils.helpers import extract_metrics_summary
+from utils.metrics_engine import MetricsEngine, parse_json
+
+EMPTY = {
+    "cpu_usage": [],
+    "memory_usage": [],
+    "disk_io": [],
+    "network_io": [],
+    "error_rate": [],
+    "response_time": [],
+}
+
+
+def common(metric_type, values):
+    return {
+        f"{metric_type}_values": values,
+        f"{metric_type}_avg": sum(values) / len(values),
+        f"{metric_type}_max": max(values),
+        f"{metric_type}_min": min(values),
+    }
+
+
+def two_samples(first, last, start=None, end=None, rate=None):
+    """Statistics of a series with two evenly spaced samples"""
+    return {
+        "count": 2,
+        "mean": (first + last) / 2,
+        "std": abs(last - first) / 2,
+        "min": min(first, last),
+        "max": max(first, last),
+        "p50": first + 0.5 * (last - first),
+        "p95": first + 0.95 * (last - first),
+        "p99": first + 0.99 * (last - first),
+        "first": first,
+        "last": last,
+        "start": start,
+        "end": end,
+        "rate": rate if rate is not None else last - first,
+        "anomaly_count": 0,
+        "anomalies": [],
+        "sampled": False,
+    }
+
+
+def one_sample(value, stamp=None):
+    return {
+        "count": 1,
+        "mean": value,
+        "std": 0.0,
+        "min": value,
+        "max": value,
+        "p50": value,
+        "p95": value,
+        "p99": value,
+        "first": value,
+        "last": value,
+        "start": stamp,
+        "end": stamp,
+        "rate": 0.0,
+        "anomaly_count": 0,
+        "anomalies": [],
+        "sampled": False,
+    }
+
+
+def assert_summary(summary, expected):
+    assert summary.keys() == expected.keys()
+    for key, value in expected.items():
+        if key == "series":
+            assert summary[key].keys() == value.keys()
+            for series, stats in value.items():
+                assert summary[key][series] == pytest.approx(stats), series
+        else:
+            assert summary[key] == pytest.approx(value), key
+
+
+def test_prometheus_text():
+    text = """# HELP cpu_usage_percent CPU
+# TYPE cpu_usage_percent gauge
+cpu_usage_percent{host="a"} 40 1700000000000
+cpu_usage_percent{host="a"} 60 1700000010000
+memory_usage_bytes{host="a"} 1024 1700000000000"""
+    assert_summary(extract_metrics_summary(text), {
+        **EMPTY,
+        **common("cpu", [40.0, 60.0]),
+        **common("memory", [1024.0]),
+        "series": {
+            'cpu_usage_percent{host="a"}': two_samples(40.0, 60.0, 1700000000.0, 1700000010.0, rate=2.0),
+            'memory_usage_bytes{host="a"}': one_sample(1024.0, 1700000000.0),
+        },
+    })
+
+
+def test_wide_csv():
+    text = "timestamp,cpu_usage,memory_usage\n2025-01-01T00:00:00Z,10,50\n2025-01-01T00:00:10Z,30,70\n"
+    assert_summary(extract_metrics_summary(text), {
+        **EMPTY,
+        **common("cpu", [10.0, 30.0]),
+        **common("memory", [50.0, 70.0]),
+        "series": {
+            "cpu_usage": two_samples(10.0, 30.0, 1735689600.0, 1735689610.0, rate=2.0),
+            "memory_usage": two_samples(50.0, 70.0, 1735689600.0, 1735689610.0, rate=2.0),
+        },
+    })
+
+
+def test_long_csv_with_labels():
+    text = """timestamp,metric,host,value
+2025-01-01T00:00:00Z,response_time,a,100
+2025-01-01T00:00:10Z,response_time,a,300
+2025-01-01T00:00:00Z,error_rate,b,1.5
+"""
+    assert_summary(extract_metrics_summary(text), {
+        **EMPTY,
+        **common("error", [1.5]),
+        **common("response", [100.0, 300.0]),
+        "series": {
+            'response_time{host="a"}': two_samples(100.0, 300.0, 1735689600.0, 1735689610.0, rate=20.0),
+            'error_rate{host="b"}': one_sample(1.5, 1735689600.0),
+        },
+    })
+
+
+def test_prometheus_json_skips_malformed_series_and_samples():
+    response = {"status": "success", "data": {"resultType": "matrix", "result": [
+        {"metric": {"__name__": "cpu_usage", "job": "api"},
+         "values": [[1700000000, "20"], [1700000010, "40"], [1700000020], "bad", [1700000030, [1]]]},
+        {"metric": {"__name__": "memory_usage"}, "values": []},
+        {"metric": {"__name__": "disk_io"}},
+    ]}}
+    assert_summary(extract_metrics_summary(json.dumps(response)), {
+        **EMPTY,
+        **common("cpu", [20.0, 40.0]),
+        # The [timestamp, [1]] sample has no numeric value and is dropped
+        "series": {
+            'cpu_usage{job="api"}': two_samples(20.0, 40.0, 1700000000.0, 1700000010.0, rate=2.0),
+        },
+    })
+
+
+@pytest.mark.parametrize("data", [
+    {"data": {"result": [{"metric": {"__name__": "up"}, "values": []}]}},
+    {"data": {"result": [{"metric": {"__name__": "up"}, "value": None}]}},
+    {"cpu": [[1, 2, 3]]},
+    {"cpu": [{"value": {"nested": 1}}]},
+    [{"name": "cpu", "value": [1]}],
+])
+def test_malformed_json_yields_no_series(data):
+    assert_summary(extract_metrics_summary(json.dumps(data)), {**EMPTY, "series": {}})
+
+
+def test_json_map_keeps_valid_samples_next_to_malformed_ones():
+    batches = list(parse_json({"cpu": [[1, 2, 3], [1700000000, 5]], "mem": {"a": 1}}))
+    summary = MetricsEngine().add_batches(batches).summary()
+    assert summary == {"cpu": one_sample(5.0, 1700000000.0)}
+
+
+def test_free_text():
+    text = "CPU Usage: 85%\nmemory usage: 70.5%\nerror_rate=2\nresponse time 250"
+    assert_summary(extract_metrics_summary(text), {
+        **EMPTY,
+        **common("cpu", [85.0]),
+        **common("memory", [70.5]),
+        **common("error", [2.0]),
+        **common("response", [250.0]),
+        # Free-text series are named by the word before the separator
+        "series": {
+            "Usage": one_sample(85.0),
+            "usage": one_sample(70.5),
+            "error_rate": one_sample(2.0),
+        },
+    })
+
+
+def test_free_text_value_must_be_on_the_metric_line():
+    # Intended change: a value on the next line belongs to that line, so
+    # "cpu usage" followed by a bare number no longer yields cpu values
+    assert_summary(extract_metrics_summary("cpu usage\n85"), {**EMPTY, "series": {}})
+    assert extract_metrics_summary("cpu usage \t85")["cpu_values"] == [85.0]
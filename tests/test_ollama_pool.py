@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+from services.llm_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from services.llm_service import LLMService
+from services.ollama_pool import OllamaHost
+from stub_ollama import start_stub_server
+
+
+def run_with_hosts(count, latency, scenario):
+    servers = [start_stub_server(latency=latency) for _ in range(count)]
+
+    async def run():
+        llm_service = LLMService(hosts=[server.url for server in servers], max_connections=2)
+        try:
+            return await scenario(llm_service, servers)
+        finally:
+            await llm_service.close()
+
+    try:
+        return asyncio.run(run())
+    finally:
+        for server in servers:
+            server.shutdown()
+
+
+def generate_all(llm_service, count, tag):
+    return asyncio.gather(*[
+        llm_service.generate_response(f"{tag} {i}", use_cache=False) for i in range(count)
+    ])
+
+
+def test_requests_are_balanced_across_hosts():
+    async def scenario(llm_service, servers):
+        await generate_all(llm_service, 12, "balanced")
+        return [server.request_count for server in servers]
+
+    counts = run_with_hosts(3, 0.1, scenario)
+    assert sum(counts) == 12
+    assert min(counts) >= 2
+
+
+def test_failing_host_is_retried_elsewhere_and_circuit_opens():
+    async def scenario(llm_service, servers):
+        servers[0].fail = True
+        responses = await generate_all(llm_service, 12, "failover")
+        return responses, llm_service.pool.hosts[0].state
+
+    responses, state = run_with_hosts(3, 0.05, scenario)
+    assert responses == ["stub response"] * 12
+    assert state == OllamaHost.OPEN
+
+
+def test_cancelled_requests_release_their_host():
+    async def scenario(llm_service, servers):
+        pool = llm_service.pool
+        pool.hosts[0].state = OllamaHost.HALF_OPEN
+        for _ in range(2):
+            try:
+                await asyncio.wait_for(pool.request("POST", "/api/chat", {"messages": []}), 0.1)
+            except asyncio.TimeoutError:
+                pass
+        return pool.hosts[0].outstanding, pool.hosts[0].trial_in_flight
+
+    outstanding, trial_in_flight = run_with_hosts(1, 0.5, scenario)
+    assert outstanding == 0
+    assert not trial_in_flight
+
+
+def test_host_concurrency_is_limited_per_host():
+    async def scenario(llm_service, servers):
+        down = llm_service.pool.hosts[1]
+        down.state, down.opened_at = OllamaHost.OPEN, time.monotonic()
+        host = llm_service.pool.hosts[0]
+        peak = 0
+
+        async def watch():
+            nonlocal peak
+            while True:
+                peak = max(peak, host.active)
+                await asyncio.sleep(0.01)
+
+        watcher = asyncio.create_task(watch())
+        try:
+            responses = await generate_all(llm_service, 4, "limited")
+        finally:
+            watcher.cancel()
+        return responses, peak, host.outstanding, llm_service.scheduler.stats()
+
+    # 2 requests per host, with one of the two hosts down
+    responses, peak, outstanding, stats = run_with_hosts(2, 0.2, scenario)
+    assert responses == ["stub response"] * 4
+    assert peak == 2
+    assert outstanding == 0
+    assert stats["capacity"] == 2
+    assert stats["wait_times"]["interactive"]["max_seconds"] > 0.1
+
+
+def test_waiting_requests_are_served_by_priority_when_hosts_are_down():
+    async def scenario(llm_service, servers):
+        down = llm_service.pool.hosts[1]
+        down.state, down.opened_at = OllamaHost.OPEN, time.monotonic()
+        order = []
+
+        async def generate(tag, priority):
+            await llm_service.generate_response(tag, use_cache=False, priority=priority)
+            order.append(tag)
+
+        # Fill the live host with staggered requests so slots free up one at
+        # a time, then queue background work ahead of an interactive request
+        first = []
+        for i in range(2):
+            first.append(asyncio.create_task(generate(f"first {i}", PRIORITY_INTERACTIVE)))
+            await asyncio.sleep(0.08)
+        background = asyncio.create_task(generate("background", PRIORITY_BACKGROUND))
+        await asyncio.sleep(0.01)
+        interactive = asyncio.create_task(generate("interactive", PRIORITY_INTERACTIVE))
+        await asyncio.gather(*first, background, interactive)
+        return order
+
+    order = run_with_hosts(2, 0.2, scenario)
+    assert order.index("interactive") < order.index("background")
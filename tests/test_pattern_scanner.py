@@ -0,0 +1,197 @@
+import json
+
+import pytest
+
+from utils.helpers import extract_error_patterns
+from utils.pattern_scanner import DEFAULT_PATTERNS, PatternScanner, load_pattern_pack
+
+MIXED_CASE = """2025-06-19T10:00:00Z ERROR [Api] request failed with Timeout
+2025-06-19T10:00:01Z error [Api] Database Connection ERROR on primary
+2025-06-19T10:00:02Z Warn [Worker] OOM killer invoked, Out Of Memory in HEAP
+2025-06-19T10:00:03Z INFO [Net] Socket connection REFUSED by upstream
+2025-06-19T10:00:04Z FATAL [Storage] Disk FULL on /var/lib/data, filesystem Error
+2025-06-19T10:00:05Z info [Sql] query completed in 12ms"""
+
+PYTHON_TRACEBACK = """Traceback (most recent call last):
+  File "/app/services/payment.py", line 42, in charge
+    conn = pool.acquire(timeout=5)
+  File "/app/db/pool.py", line 88, in acquire
+    raise ConnectionError("database connection failed: timeout after 5s")
+ConnectionError: database connection failed: timeout after 5s
+During handling of the above exception, another exception occurred:
+sqlalchemy.exc.OperationalError: (psycopg2.OperationalError) SQL query failed
+MemoryError"""
+
+JAVA_TRACEBACK = """Exception in thread "main" java.lang.OutOfMemoryError: Java heap space
+    at java.util.Arrays.copyOf(Arrays.java:3332)
+    at com.acme.orders.OrderService.load(OrderService.java:118)
+Caused by: java.net.SocketTimeoutException: Read timed out
+    at java.net.SocketInputStream.socketRead0(Native Method)
+Caused by: java.sql.SQLException: Connection refused: database unavailable, query failed
+    ... 12 more"""
+
+HTTP_CODES = """GET /api/orders/1 HTTP 200 ok
+POST /api/payments HTTP 503 upstream connection refused
+GET /api/users HTTP 404 not found
+http 500 internal error
+PUT /api/items HTTP/1.1 201"""
+
+LONG_LINE = ("x" * 4000 + " database query timeout " + "y" * 3000 + " disk almost full "
+             + "z" * 2000 + " HTTP 502 " + "w" * 1000 + " network error")
+
+# (pattern, count, matches) from extract_error_patterns before the scanner:
+# one re.findall(pattern, text, re.IGNORECASE) per pattern
+BASELINE = {
+    "mixed_case": [
+        ("EXCEPTION", 6, ["ERROR", "failed", "Timeout", "error", "ERROR", "Error"]),
+        ("DATABASE_ERROR", 1, [("Database", "ERROR")]),
+        ("NETWORK_ERROR", 2, [("Connection", "ERROR"), ("Socket", "REFUSED")]),
+        ("MEMORY_ERROR", 3, ["OOM", "Out Of Memory", "HEAP"]),
+        ("DISK_ERROR", 2, [("Storage", "FULL"), ("filesystem", "Error")]),
+    ],
+    "python_traceback": [
+        ("EXCEPTION", 13, [
+            "timeout", "Error", "failed", "timeout", "Error", "failed", "timeout", "exception", "exception",
+            "Error", "Error", "failed", "Error"
+        ]),
+        ("DATABASE_ERROR", 6, [
+            ("Connection", "Error"), ("database", "failed"), ("Connection", "Error"), ("database", "failed"),
+            ("sql", "Error"), ("SQL", "failed")
+        ]),
+        ("NETWORK_ERROR", 4, [
+            ("Connection", "Error"), ("connection", "failed"), ("Connection", "Error"),
+            ("connection", "failed")
+        ]),
+        ("MEMORY_ERROR", 1, ["Memory"]),
+    ],
+    "java_traceback": [
+        ("EXCEPTION", 6, ["Exception", "Error", "Timeout", "Exception", "Exception", "failed"]),
+        ("DATABASE_ERROR", 1, [("sql", "failed")]),
+        ("NETWORK_ERROR", 2, [("Socket", "Timeout"), ("Connection", "refused")]),
+        ("MEMORY_ERROR", 2, ["Memory", "heap"]),
+    ],
+    "http_codes": [
+        ("HTTP_ERROR", 4, ["200", "503", "404", "500"]),
+        ("EXCEPTION", 1, ["error"]),
+        ("NETWORK_ERROR", 1, [("connection", "refused")]),
+    ],
+    "long_line": [
+        ("HTTP_ERROR", 1, ["502"]),
+        ("EXCEPTION", 2, ["timeout", "error"]),
+        ("DATABASE_ERROR", 1, [("database", "timeout")]),
+        ("NETWORK_ERROR", 1, [("network", "error")]),
+        ("DISK_ERROR", 1, [("disk", "full")]),
+    ],
+}
+
+FIXTURES = {
+    "mixed_case": MIXED_CASE,
+    "python_traceback": PYTHON_TRACEBACK,
+    "java_traceback": JAVA_TRACEBACK,
+    "http_codes": HTTP_CODES,
+    "long_line": LONG_LINE,
+}
+
+
+def summarize(results):
+    return [(result["pattern_name"], result["count"], result["matches"]) for result in results]
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+def test_default_patterns_match_the_baseline(name):
+    assert summarize(extract_error_patterns(FIXTURES[name])) == BASELINE[name]
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+def test_line_by_line_and_file_scans_match_the_whole_text(name, tmp_path):
+    text = FIXTURES[name]
+    # Blocks far smaller than the input, so every fixture spans several
+    scanner = PatternScanner(block_size=64)
+    expected = summarize(scanner.scan_text(text))
+    assert summarize(scanner.scan_lines(text.splitlines(keepends=True))) == expected
+    assert summarize(PatternScanner(block_size=1 << 20).scan_lines(iter(text.split("\n")))) == expected
+
+    path = tmp_path / "input.log"
+    path.write_text(text, encoding="utf-8")
+    assert summarize(scanner.scan_file(str(path))) == expected
+
+
+def test_text_whose_lowercase_changes_length_is_scanned_unfolded():
+    # "İ" lowercases to two code points, so offsets can't be read back
+    text = "İstanbul gateway: Connection Timeout\nHTTP 504 from İzmir"
+    assert summarize(extract_error_patterns(text)) == [
+        ("HTTP_ERROR", 1, ["504"]),
+        ("EXCEPTION", 1, ["Timeout"]),
+        ("DATABASE_ERROR", 1, [("Connection", "Timeout")]),
+        ("NETWORK_ERROR", 1, [("Connection", "Timeout")]),
+    ]
+
+
+def test_pairs_further_apart_than_the_gap_bound_are_not_matched():
+    # Intended change: the baseline's unbounded .*? paired words any
+    # distance apart on a line; gaps are now capped at 200 characters
+    near = "connection " + "a" * 150 + " refused"
+    far = "connection " + "a" * 250 + " refused"
+    names = [result["pattern_name"] for result in extract_error_patterns(far)]
+    assert "NETWORK_ERROR" in [result["pattern_name"] for result in extract_error_patterns(near)]
+    assert "NETWORK_ERROR" not in names
+
+
+def test_max_matches_caps_kept_matches_but_not_counts():
+    results = PatternScanner(max_matches=2).scan_text(MIXED_CASE)
+    exception = next(result for result in results if result["pattern_name"] == "EXCEPTION")
+    assert exception["count"] == 6
+    assert exception["matches"] == ["ERROR", "failed"]
+
+
+CUSTOM_PACK = [
+    {
+        "name": "GRPC_ERROR",
+        "pattern": r"grpc status (UNAVAILABLE|DEADLINE_EXCEEDED)",
+        "description": "gRPC failures",
+        "triggers": [["grpc"], ["unavailable", "deadline"]]
+    },
+    {
+        "name": "RETRY",
+        "pattern": r"retry (\d+)/(\d+)",
+        "description": "Retries"
+    },
+    {
+        "name": "KILLED",
+        "pattern": r"(?-i:KILLED)",
+        "description": "Case-sensitive marker",
+        "triggers": ["killed"]
+    }
+]
+
+CUSTOM_TEXT = """grpc status UNAVAILABLE from orders
+GRPC Status deadline_exceeded after retry 3/5
+retry 1/5 scheduled
+worker KILLED by supervisor
+worker killed (lowercase, not matched)"""
+
+
+def test_custom_pattern_pack_replaces_the_defaults():
+    assert summarize(extract_error_patterns(CUSTOM_TEXT, patterns=CUSTOM_PACK)) == [
+        ("GRPC_ERROR", 2, ["UNAVAILABLE", "deadline_exceeded"]),
+        ("RETRY", 2, [("3", "5"), ("1", "5")]),
+        ("KILLED", 1, ["KILLED"]),
+    ]
+    # The default pack is unaffected
+    assert summarize(extract_error_patterns(MIXED_CASE)) == BASELINE["mixed_case"]
+
+
+def test_pattern_pack_is_loaded_from_json(tmp_path):
+    path = tmp_path / "pack.json"
+    path.write_text(json.dumps({"patterns": CUSTOM_PACK}), encoding="utf-8")
+    assert load_pattern_pack(str(path)) == CUSTOM_PACK
+
+    path.write_text(json.dumps([{"name": "BROKEN", "pattern": "("}]), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_pattern_pack(str(path))
+
+
+def test_default_pack_is_used_when_none_is_given():
+    assert [spec["name"] for spec in DEFAULT_PATTERNS] == [
+        pattern.name for pattern in PatternScanner().patterns
+    ]